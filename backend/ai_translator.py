@@ -3,9 +3,23 @@ AI Translation Module for Bytecode Translation
 Supports: DeepSeek, OpenAI, Claude, Gemini
 """
 import json
+import math
 import httpx
 import os
-from typing import List, Dict
+import time
+from contextlib import aclosing
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple
+
+from json_stream import JSONArrayParser
+from metrics import PROVIDER_BATCH_SECONDS, PROVIDER_RESPONSES
+from string_filter import should_translate
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 
 def get_http_proxy():
@@ -24,139 +38,323 @@ def get_http_proxy():
     return None
 
 
+LANG_NAMES = {
+    "zh_cn": "Simplified Chinese",
+    "zh_tw": "Traditional Chinese",
+    "en_us": "English",
+    "ja_jp": "Japanese",
+    "de_de": "German",
+    "es_es": "Spanish",
+    "fr_fr": "French",
+    "ru_ru": "Russian",
+    "pt_br": "Brazilian Portuguese",
+    "ko_kr": "Korean",
+    "it_it": "Italian"
+}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+# Reason given for a complete answer array with more or fewer strings than requested, its alignment is unknown
+WRONG_LENGTH = "wrong number of strings"
+
+
+class TranslationAPIError(Exception):
+    """Provider returned an HTTP error, e.g. a rate limit or a server error"""
+    
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class HTTPClientRegistry:
+    """Process-wide httpx clients, one long-lived pool per provider
+    
+    Reusing the pools keeps TCP/TLS connections warm between tasks. The app
+    lifespan closes them on shutdown. A transport (e.g. httpx.MockTransport)
+    replaces the network for every new client, the benchmarks use that.
+    """
+    
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.transport = transport
+    
+    def get_client(self, translator: "AITranslator") -> httpx.AsyncClient:
+        client = self.clients.get(translator.NAME)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_keepalive_connections=translator.MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=translator.MAX_CONNECTIONS
+            )
+            # Get only HTTP/HTTPS proxy, ignore socks
+            proxy = get_http_proxy() if self.transport is None else None
+            client = httpx.AsyncClient(
+                timeout=60.0,
+                proxy=proxy,
+                limits=limits,
+                http2=translator.HTTP2 and HTTP2_AVAILABLE,
+                transport=self.transport
+            )
+            self.clients[translator.NAME] = client
+        return client
+    
+    async def close(self):
+        """Close every client, called on shutdown"""
+        clients = list(self.clients.values())
+        self.clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+http_clients = HTTPClientRegistry()
+
+
 class AITranslator:
     """Base class for AI translation"""
     
-    def __init__(self, api_key: str):
+    NAME = "AI"
+    MODEL = ""
+    MAX_BATCH_TOKENS = 3000  # Estimated prompt tokens of the strings in one batch
+    MAX_BATCH_ITEMS = 50  # Strings per batch, keeps the returned array easy to align
+    
+    # Connection pool of the shared client for this provider
+    MAX_CONNECTIONS = 50
+    MAX_KEEPALIVE_CONNECTIONS = 20
+    HTTP2 = False  # Multiplex requests over one connection when the provider supports it
+    
+    def __init__(self, api_key: str, stream: bool = True):
         self.api_key = api_key
-        # Get only HTTP/HTTPS proxy, ignore socks
-        proxy = get_http_proxy()
-        # Create client with higher limits for concurrent requests
-        limits = httpx.Limits(max_keepalive_connections=20, max_connections=50)
-        # Create client with or without proxy
-        if proxy:
-            self.client = httpx.AsyncClient(timeout=60.0, proxy=proxy, limits=limits)
-        else:
-            self.client = httpx.AsyncClient(timeout=60.0, limits=limits)
+        self.stream = stream  # Read answers as they are generated instead of waiting for the whole body
+        # Shared across tasks and API keys, keys are sent per request
+        self.client = http_clients.get_client(self)
     
     def _should_translate(self, text: str) -> bool:
         """Check if text should be translated - STRICT: only obvious user messages"""
-        if not text or len(text) < 4:  # Minimum 4 characters
-            return False
+        return should_translate(text)
+    
+    @property
+    def cache_key(self) -> str:
+        """Identifies the provider and model in the translation memory"""
+        return f"{self.NAME}/{self.MODEL}"
+    
+    def estimate_tokens(self, text: str) -> int:
+        """Rough token estimate for one string in the prompt (1 token ≈ 4 characters)"""
+        # JSON quoting, comma and indentation add a few tokens per item
+        return len(text) // 4 + 3
+    
+    def pack_batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into evenly filled batches within this provider's limits
         
-        # Must contain at least 2 letters (to skip single letter + numbers)
-        letter_count = sum(1 for c in text if c.isalpha())
-        if letter_count < 2:
-            return False
+        Each string weighs whichever share of a batch it uses up more of, its
+        estimated tokens against MAX_BATCH_TOKENS or one slot against
+        MAX_BATCH_ITEMS. We use about the fewest batches the total weight allows
+        and cut them at even points of the cumulative weight. Order is preserved so
+        strings from the same class stay together.
+        """
+        if not texts:
+            return []
         
-        # Skip obvious technical strings
-        skip_patterns = [
-            # Package/class names
-            text.startswith("net.") or text.startswith("com.") or text.startswith("org."),
-            text.startswith("java.") or text.startswith("javax.") or text.startswith("mojang."),
-            text.startswith("forge.") or text.startswith("minecraft.") or text.startswith("mixin."),
-            
-            # File paths and extensions
-            "/" in text or "\\" in text,
-            any(text.endswith(ext) for ext in [".class", ".java", ".png", ".json", ".jar", 
-                                                ".properties", ".xml", ".txt", ".cfg", ".lang",
-                                                ".mcmeta", ".yml", ".yaml", ".toml", ".mod",
-                                                ".ogg", ".wav", ".nbt", ".dat"]),
-            
-            # Java internals
-            text.startswith("L") and text.endswith(";"),
-            text in ["V", "I", "Z", "B", "S", "C", "D", "F", "J", "L"],
-            text.startswith("(") and ")" in text,
-            "<init>" in text or "<clinit>" in text,
-            text.startswith("["),
-            "$" in text,  # Inner classes
-            "<" in text and ">" in text,  # Generics/HTML
-            
-            # Java keywords and common variables
-            text in ["Code", "LineNumberTable", "LocalVariableTable", "SourceFile", "Signature", 
-                    "InnerClasses", "EnclosingMethod", "Exceptions", "ConstantValue", "Deprecated",
-                    "RuntimeVisibleAnnotations", "StackMapTable", "BootstrapMethods", "MethodParameters",
-                    "this", "super", "null", "true", "false", "void", "int", "boolean", "String"],
-            
-            # Naming patterns
-            any(text[i].islower() and text[i+1].isupper() for i in range(len(text)-1)) and " " not in text,  # camelCase
-            text.islower() and "_" in text and " " not in text,  # snake_case (likely modid)
-            text.isupper() and "_" in text and " " not in text,  # CONSTANT_CASE
-            text.isupper() and " " not in text and len(text) < 20,  # All caps without space
-            
-            # Resource locations and registry
-            ":" in text and " " not in text,  # namespace:path
-            text.startswith("@"),  # Annotations
-            text.startswith("{") or text.endswith("}"),  # NBT-like
-            
-            # Technical patterns
-            "." in text and " " not in text and any(c.isdigit() for c in text),  # Version numbers
-            text.startswith("#"),  # Hex colors or comments
-            "=" in text and " " not in text,  # Assignments
-            
-            # Single word lowercase (likely variable/method)
-            " " not in text and text.islower() and not any(c.isupper() for c in text),
-        ]
+        token_counts = [self.estimate_tokens(text) for text in texts]
+        item_weight = 1 / self.MAX_BATCH_ITEMS
+        weights = [max(tokens / self.MAX_BATCH_TOKENS, item_weight) for tokens in token_counts]
+        total_weight = sum(weights)
+        # Leave some headroom so the cut points rarely have to be forced by a limit
+        batch_count = max(1, math.ceil(total_weight / 0.9))
         
-        # Additional positive checks - must have at least one to proceed
-        positive_patterns = [
-            " " in text,  # Contains space (likely sentence)
-            text[0].isupper() and any(c in text for c in [" ", ".", "!", "?"]),  # Starts capital with punctuation
-        ]
+        batches = []
+        batch = []
+        batch_tokens = 0
+        current_slot = 0
+        cumulative = 0.0
+        for text, tokens, weight in zip(texts, token_counts, weights):
+            # Each string goes to the batch its weight midpoint falls in
+            slot = min(batch_count - 1, int((cumulative + weight / 2) / total_weight * batch_count))
+            cumulative += weight
+            
+            over_limit = (
+                batch_tokens + tokens > self.MAX_BATCH_TOKENS
+                or len(batch) >= self.MAX_BATCH_ITEMS
+            )
+            if batch and (slot != current_slot or over_limit):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            current_slot = slot
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
         
-        return not any(skip_patterns) and any(positive_patterns)
+        return batches
+    
+    def get_lang_name(self, lang_code: str) -> str:
+        return LANG_NAMES.get(lang_code.lower(), "English")
     
-    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
-        """Translate a batch of texts"""
+    def build_prompt(self, texts_json: str, target_lang_name: str) -> str:
+        """Build the translation prompt for a JSON array of strings"""
         raise NotImplementedError
     
-    async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
-
-
-class DeepSeekTranslator(AITranslator):
-    """DeepSeek AI Translator"""
+    def build_request(self, prompt: str, stream: bool) -> Tuple[str, dict, dict]:
+        """(url, headers, JSON body) of a completion request for the prompt"""
+        raise NotImplementedError
     
-    API_URL = "https://api.deepseek.com/v1/chat/completions"
+    def completion_text(self, result: dict) -> str:
+        """Answer text of a complete (non-streamed) response body"""
+        raise NotImplementedError
     
-    def get_lang_name(self, lang_code: str) -> str:
-        lang_map = {
-            "zh_cn": "Simplified Chinese",
-            "zh_tw": "Traditional Chinese",
-            "en_us": "English",
-            "ja_jp": "Japanese",
-            "de_de": "German",
-            "es_es": "Spanish",
-            "fr_fr": "French",
-            "ru_ru": "Russian",
-            "pt_br": "Brazilian Portuguese",
-            "ko_kr": "Korean",
-            "it_it": "Italian"
-        }
-        return lang_map.get(lang_code.lower(), "English")
+    def stream_delta(self, event: dict) -> str:
+        """Text added by one server-sent event of a streamed response"""
+        raise NotImplementedError
+    
+    async def request_completion(self, prompt: str) -> str:
+        """Send the prompt to the provider and return the raw response text"""
+        url, headers, body = self.build_request(prompt, stream=False)
+        response = await self.client.post(url, headers=headers, json=body)
+        self.check_response(response)
+        return self.completion_text(response.json())
+    
+    async def stream_completion(self, prompt: str) -> AsyncIterator[str]:
+        """Send the prompt with streaming on and yield the answer text as it arrives"""
+        url, headers, body = self.build_request(prompt, stream=True)
+        async with self.client.stream("POST", url, headers=headers, json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+            self.check_response(response)
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                if data:
+                    text = self.stream_delta(json.loads(data))
+                    if text:
+                        yield text
+    
+    def check_response(self, response: httpx.Response):
+        """Raise TranslationAPIError for any non-200 provider response"""
+        PROVIDER_RESPONSES.inc(provider=self.NAME, status=str(response.status_code))
+        if response.status_code != 200:
+            raise TranslationAPIError(
+                f"{self.NAME} API error: {response.status_code} {response.text}",
+                response.status_code,
+                parse_retry_after(response.headers.get("retry-after"))
+            )
     
-    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
-        """Translate texts using DeepSeek API"""
+    async def translate_items(self, texts: List[str], target_lang: str,
+                              on_item: Optional[Callable[[int, object], object]] = None) -> Tuple[list, Optional[str]]:
+        """Send one batch and return the answer's elements as far as they arrived, with why it fell short
+        
+        on_item(index, element) is called for each element as soon as it is
+        complete, elements are not checked in any way. The reason is None when
+        the answer is a complete array of the right length. HTTP and network
+        errors raise, also after some elements were reported.
+        """
         if not texts:
-            return []
+            return [], None
         
-        # Filter out technical strings
-        filtered_texts = []
-        indices = []
-        for i, text in enumerate(texts):
-            if self._should_translate(text):
-                filtered_texts.append(text)
-                indices.append(i)
+        target_lang_name = self.get_lang_name(target_lang)
+        texts_json = json.dumps(texts, ensure_ascii=False, indent=2)
+        prompt = self.build_prompt(texts_json, target_lang_name)
         
-        if not filtered_texts:
-            return texts
+        parser = JSONArrayParser()
+        elements = []
         
-        target_lang_name = self.get_lang_name(target_lang)
+        def take(new_elements):
+            for element in new_elements:
+                if len(elements) >= len(texts):
+                    return
+                elements.append(element)
+                if on_item:
+                    on_item(len(elements) - 1, element)
+        
+        started = time.perf_counter()
+        try:
+            if self.stream:
+                async with aclosing(self.stream_completion(prompt)) as chunks:
+                    async for chunk in chunks:
+                        take(parser.feed(chunk))
+                        if parser.error:
+                            break
+            else:
+                take(parser.feed(await self.request_completion(prompt)))
+        except TranslationAPIError:
+            raise
+        except httpx.HTTPError:
+            PROVIDER_RESPONSES.inc(provider=self.NAME, status="error")
+            raise
+        except Exception as e:
+            # e.g. a response body without the expected fields
+            return elements, f"unusable response: {e}"
+        finally:
+            PROVIDER_BATCH_SECONDS.observe(time.perf_counter() - started, provider=self.NAME)
+        
+        if parser.error:
+            return elements, f"malformed JSON: {parser.error}"
+        if not parser.started:
+            return elements, "no JSON array in the answer"
+        if not parser.done:
+            return elements, "answer ended before the array was complete"
+        if parser.count != len(texts):
+            return elements, f"{WRONG_LENGTH}: {parser.count} for {len(texts)}"
+        return elements, None
+    
+    async def translate_batch(self, texts: List[str], target_lang: str,
+                              on_item: Optional[Callable[[int, str], None]] = None) -> List[str]:
+        """Translate a batch of texts with a single request
+        
+        Callers are expected to filter out technical strings first, every text
+        in the batch is sent to the provider. on_item(index, translated) is
+        called for each string as soon as it is complete. Texts the answer does
+        not cover (truncation, a malformed element, a dropped stream) come back
+        unchanged. HTTP errors raise TranslationAPIError when nothing was
+        translated yet. BatchRetrier in batch_retry.py retries what is missing.
+        """
+        translated = []
         
-        # Build prompt
-        texts_json = json.dumps(filtered_texts, ensure_ascii=False, indent=2)
-        prompt = f"""You are a professional Minecraft mod translator. Translate the following strings to {target_lang_name}.
+        def take(index, element):
+            # Anything but a string cannot replace a string literal, keep the original there
+            translated.append(element if isinstance(element, str) else texts[index])
+            if on_item:
+                on_item(index, translated[index])
+        
+        try:
+            _, reason = await self.translate_items(texts, target_lang, take)
+        except (TranslationAPIError, httpx.HTTPError) as e:
+            # Errors before the first element go to the caller so it can back off
+            if not translated:
+                raise
+            reason = f"cut off: {e}"
+        
+        if reason:
+            print(f"{self.NAME}: {reason}, kept {len(translated)} of {len(texts)} strings")
+        return translated + texts[len(translated):]
+
+
+class DeepSeekTranslator(AITranslator):
+    """DeepSeek AI Translator"""
+    
+    NAME = "DeepSeek"
+    MODEL = "deepseek-chat"
+    API_URL = "https://api.deepseek.com/v1/chat/completions"
+    MAX_BATCH_TOKENS = 4000
+    
+    def build_prompt(self, texts_json: str, target_lang_name: str) -> str:
+        return f"""You are a professional Minecraft mod translator. Translate the following strings to {target_lang_name}.
 
 CRITICAL RULES - DO NOT TRANSLATE:
 1. MOD IDs (e.g., "examplemod", "my_mod", lowercase with underscores)
@@ -186,95 +384,41 @@ Input strings (JSON array):
 {texts_json}
 
 Output only the translated JSON array, nothing else."""
-
-        try:
-            response = await self.client.post(
-                self.API_URL,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "deepseek-chat",
-                    "messages": [
-                        {"role": "system", "content": "You are a professional Minecraft mod translator."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"DeepSeek API error: {response.status_code} {response.text}")
-            
-            result = response.json()
-            translated_text = result["choices"][0]["message"]["content"].strip()
-            
-            # Extract JSON array from response
-            translated_text = translated_text.strip()
-            if translated_text.startswith("```json"):
-                translated_text = translated_text[7:]
-            if translated_text.startswith("```"):
-                translated_text = translated_text[3:]
-            if translated_text.endswith("```"):
-                translated_text = translated_text[:-3]
-            translated_text = translated_text.strip()
-            
-            translated_list = json.loads(translated_text)
-            
-            # Merge back
-            result_texts = texts.copy()
-            for i, idx in enumerate(indices):
-                if i < len(translated_list):
-                    result_texts[idx] = translated_list[i]
-            
-            return result_texts
-            
-        except Exception as e:
-            print(f"DeepSeek translation error: {e}")
-            return texts
+    
+    def build_request(self, prompt: str, stream: bool) -> Tuple[str, dict, dict]:
+        """Request for the DeepSeek chat completions API"""
+        return self.API_URL, {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }, {
+            "model": self.MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a professional Minecraft mod translator."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "stream": stream
+        }
+    
+    def completion_text(self, result: dict) -> str:
+        return result["choices"][0]["message"]["content"]
+    
+    def stream_delta(self, event: dict) -> str:
+        choices = event.get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content") or ""
 
 
 class OpenAITranslator(AITranslator):
     """OpenAI GPT Translator"""
     
+    NAME = "OpenAI"
+    HTTP2 = True
+    MODEL = "gpt-4o-mini"
     API_URL = "https://api.openai.com/v1/chat/completions"
+    MAX_BATCH_TOKENS = 3000
     
-    def get_lang_name(self, lang_code: str) -> str:
-        lang_map = {
-            "zh_cn": "Simplified Chinese",
-            "zh_tw": "Traditional Chinese",
-            "en_us": "English",
-            "ja_jp": "Japanese",
-            "de_de": "German",
-            "es_es": "Spanish",
-            "fr_fr": "French",
-            "ru_ru": "Russian",
-            "pt_br": "Brazilian Portuguese",
-            "ko_kr": "Korean",
-            "it_it": "Italian"
-        }
-        return lang_map.get(lang_code.lower(), "English")
-    
-    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
-        """Translate texts using OpenAI GPT-4o-mini"""
-        if not texts:
-            return []
-        
-        filtered_texts = []
-        indices = []
-        for i, text in enumerate(texts):
-            if self._should_translate(text):
-                filtered_texts.append(text)
-                indices.append(i)
-        
-        if not filtered_texts:
-            return texts
-        
-        target_lang_name = self.get_lang_name(target_lang)
-        texts_json = json.dumps(filtered_texts, ensure_ascii=False, indent=2)
-        
-        prompt = f"""Translate the following Minecraft mod strings to {target_lang_name}.
+    def build_prompt(self, texts_json: str, target_lang_name: str) -> str:
+        return f"""Translate the following Minecraft mod strings to {target_lang_name}.
 
 CRITICAL - DO NOT TRANSLATE:
 1. MOD IDs (lowercase_with_underscores)
@@ -296,92 +440,42 @@ Output only JSON array.
 
 Input:
 {texts_json}"""
-
-        try:
-            response = await self.client.post(
-                self.API_URL,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [
-                        {"role": "system", "content": "You are a Minecraft mod translator."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error: {response.status_code} {response.text}")
-            
-            result = response.json()
-            translated_text = result["choices"][0]["message"]["content"].strip()
-            
-            # Clean response
-            if translated_text.startswith("```json"):
-                translated_text = translated_text[7:]
-            if translated_text.startswith("```"):
-                translated_text = translated_text[3:]
-            if translated_text.endswith("```"):
-                translated_text = translated_text[:-3]
-            translated_text = translated_text.strip()
-            
-            translated_list = json.loads(translated_text)
-            
-            result_texts = texts.copy()
-            for i, idx in enumerate(indices):
-                if i < len(translated_list):
-                    result_texts[idx] = translated_list[i]
-            
-            return result_texts
-            
-        except Exception as e:
-            print(f"OpenAI translation error: {e}")
-            return texts
     
+    def build_request(self, prompt: str, stream: bool) -> Tuple[str, dict, dict]:
+        """Request for the OpenAI chat completions API with GPT-4o-mini"""
+        return self.API_URL, {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }, {
+            "model": self.MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a Minecraft mod translator."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "stream": stream
+        }
+    
+    def completion_text(self, result: dict) -> str:
+        return result["choices"][0]["message"]["content"]
+    
+    def stream_delta(self, event: dict) -> str:
+        choices = event.get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content") or ""
+
+
 class ClaudeTranslator(AITranslator):
     """Anthropic Claude Translator"""
     
+    NAME = "Claude"
+    HTTP2 = True
+    MODEL = "claude-3-haiku-20240307"
     API_URL = "https://api.anthropic.com/v1/messages"
+    # Output is capped by max_tokens=4096, so keep the input well below that
+    MAX_BATCH_TOKENS = 2500
     
-    def get_lang_name(self, lang_code: str) -> str:
-        lang_map = {
-            "zh_cn": "Simplified Chinese",
-            "zh_tw": "Traditional Chinese",
-            "en_us": "English",
-            "ja_jp": "Japanese",
-            "de_de": "German",
-            "es_es": "Spanish",
-            "fr_fr": "French",
-            "ru_ru": "Russian",
-            "pt_br": "Brazilian Portuguese",
-            "ko_kr": "Korean",
-            "it_it": "Italian"
-        }
-        return lang_map.get(lang_code.lower(), "English")
-    
-    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
-        """Translate texts using Claude Haiku"""
-        if not texts:
-            return []
-        
-        filtered_texts = []
-        indices = []
-        for i, text in enumerate(texts):
-            if self._should_translate(text):
-                filtered_texts.append(text)
-                indices.append(i)
-        
-        if not filtered_texts:
-            return texts
-        
-        target_lang_name = self.get_lang_name(target_lang)
-        texts_json = json.dumps(filtered_texts, ensure_ascii=False, indent=2)
-        
-        prompt = f"""Translate these Minecraft mod strings to {target_lang_name}.
+    def build_prompt(self, texts_json: str, target_lang_name: str) -> str:
+        return f"""Translate these Minecraft mod strings to {target_lang_name}.
 
 CRITICAL - DO NOT TRANSLATE:
 1. MOD IDs, Java packages, Mixin paths
@@ -394,94 +488,53 @@ Preserve color codes (§) and placeholders (%s, {{0}}).
 Output only JSON array.
 
 {texts_json}"""
-
-        try:
-            response = await self.client.post(
-                self.API_URL,
-                headers={
-                    "x-api-key": self.api_key,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "claude-3-haiku-20240307",
-                    "max_tokens": 4096,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Claude API error: {response.status_code} {response.text}")
-            
-            result = response.json()
-            translated_text = result["content"][0]["text"].strip()
-            
-            # Clean response
-            if translated_text.startswith("```json"):
-                translated_text = translated_text[7:]
-            if translated_text.startswith("```"):
-                translated_text = translated_text[3:]
-            if translated_text.endswith("```"):
-                translated_text = translated_text[:-3]
-            translated_text = translated_text.strip()
-            
-            translated_list = json.loads(translated_text)
-            
-            result_texts = texts.copy()
-            for i, idx in enumerate(indices):
-                if i < len(translated_list):
-                    result_texts[idx] = translated_list[i]
-            
-            return result_texts
-            
-        except Exception as e:
-            print(f"Claude translation error: {e}")
-            return texts
     
+    def build_request(self, prompt: str, stream: bool) -> Tuple[str, dict, dict]:
+        """Request for the Anthropic messages API with Claude Haiku"""
+        return self.API_URL, {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json"
+        }, {
+            "model": self.MODEL,
+            "max_tokens": 4096,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "stream": stream
+        }
+    
+    def completion_text(self, result: dict) -> str:
+        return result["content"][0]["text"]
+    
+    def stream_delta(self, event: dict) -> str:
+        if event.get("type") == "error":
+            # Errors after the response started arrive as an event, e.g. overloaded_error
+            error = event.get("error", {})
+            status_code = 529 if error.get("type") == "overloaded_error" else 500
+            raise TranslationAPIError(f"{self.NAME} API error: {error.get('message', error)}", status_code)
+        if event.get("type") == "content_block_delta":
+            return event.get("delta", {}).get("text") or ""
+        return ""
+
+
 class GeminiTranslator(AITranslator):
     """Google Gemini Translator"""
     
-    def get_api_url(self) -> str:
-        return f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={self.api_key}"
+    NAME = "Gemini"
+    HTTP2 = True
+    MODEL = "gemini-1.5-flash"
+    MAX_BATCH_TOKENS = 6000
     
-    def get_lang_name(self, lang_code: str) -> str:
-        lang_map = {
-            "zh_cn": "Simplified Chinese",
-            "zh_tw": "Traditional Chinese",
-            "en_us": "English",
-            "ja_jp": "Japanese",
-            "de_de": "German",
-            "es_es": "Spanish",
-            "fr_fr": "French",
-            "ru_ru": "Russian",
-            "pt_br": "Brazilian Portuguese",
-            "ko_kr": "Korean",
-            "it_it": "Italian"
-        }
-        return lang_map.get(lang_code.lower(), "English")
+    def get_api_url(self, stream: bool = False) -> str:
+        base = f"https://generativelanguage.googleapis.com/v1beta/models/{self.MODEL}"
+        if stream:
+            return f"{base}:streamGenerateContent?alt=sse&key={self.api_key}"
+        return f"{base}:generateContent?key={self.api_key}"
     
-    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
-        """Translate texts using Gemini Pro"""
-        if not texts:
-            return []
-        
-        filtered_texts = []
-        indices = []
-        for i, text in enumerate(texts):
-            if self._should_translate(text):
-                filtered_texts.append(text)
-                indices.append(i)
-        
-        if not filtered_texts:
-            return texts
-        
-        target_lang_name = self.get_lang_name(target_lang)
-        texts_json = json.dumps(filtered_texts, ensure_ascii=False, indent=2)
-        
-        prompt = f"""Translate these Minecraft mod strings to {target_lang_name}.
+    def build_prompt(self, texts_json: str, target_lang_name: str) -> str:
+        return f"""Translate these Minecraft mod strings to {target_lang_name}.
 
 CRITICAL - DO NOT TRANSLATE:
 1. MOD IDs (lowercase_with_underscores)
@@ -495,55 +548,34 @@ Preserve color codes and placeholders.
 Output only JSON array.
 
 {texts_json}"""
-
-        try:
-            response = await self.client.post(
-                self.get_api_url(),
-                headers={
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "contents": [{
-                        "parts": [{
-                            "text": prompt
-                        }]
-                    }],
-                    "generationConfig": {
-                        "temperature": 0.3,
-                        "maxOutputTokens": 8192
-                    }
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Gemini API error: {response.status_code} {response.text}")
-            
-            result = response.json()
-            translated_text = result["candidates"][0]["content"]["parts"][0]["text"].strip()
-            
-            # Clean response
-            if translated_text.startswith("```json"):
-                translated_text = translated_text[7:]
-            if translated_text.startswith("```"):
-                translated_text = translated_text[3:]
-            if translated_text.endswith("```"):
-                translated_text = translated_text[:-3]
-            translated_text = translated_text.strip()
-            
-            translated_list = json.loads(translated_text)
-            
-            result_texts = texts.copy()
-            for i, idx in enumerate(indices):
-                if i < len(translated_list):
-                    result_texts[idx] = translated_list[i]
-            
-            return result_texts
-            
-        except Exception as e:
-            print(f"Gemini translation error: {e}")
-            return texts
     
-def get_translator(ai_model: str, api_key: str) -> AITranslator:
+    def build_request(self, prompt: str, stream: bool) -> Tuple[str, dict, dict]:
+        """Request for the Gemini generateContent API with Gemini Flash"""
+        return self.get_api_url(stream), {
+            "Content-Type": "application/json"
+        }, {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }],
+            "generationConfig": {
+                "temperature": 0.3,
+                "maxOutputTokens": 8192
+            }
+        }
+    
+    def completion_text(self, result: dict) -> str:
+        return result["candidates"][0]["content"]["parts"][0]["text"]
+    
+    def stream_delta(self, event: dict) -> str:
+        # The last event may only carry finishReason
+        candidates = event.get("candidates") or [{}]
+        parts = candidates[0].get("content", {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+
+
+def get_translator(ai_model: str, api_key: str, stream: bool = True) -> AITranslator:
     """Factory function to get appropriate translator"""
     translators = {
         "Deepseek": DeepSeekTranslator,
@@ -556,4 +588,4 @@ def get_translator(ai_model: str, api_key: str) -> AITranslator:
     if not translator_class:
         raise ValueError(f"Unsupported AI model: {ai_model}")
     
-    return translator_class(api_key)
+    return translator_class(api_key, stream)
@@ -0,0 +1,179 @@
+"""
+Partial retries for translation batches
+Every answer is checked element by element, validated strings are kept and only the missing or
+rejected ones are sent again, in smaller groups when a group keeps failing
+"""
+import asyncio
+import math
+import random
+import re
+from collections import Counter, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from ai_translator import WRONG_LENGTH, TranslationAPIError
+from metrics import BATCH_RETRIES
+from scheduler import is_overload_error
+
+# printf-style (%s, %1$d, %.2f, %%) and MessageFormat ({0}) placeholders, the game breaks when they change
+PLACEHOLDER = re.compile(r"%(?:\d+\$)?[-#+0,(]*\d*(?:\.\d+)?[a-zA-Z%]|\{\d+\}")
+
+
+def check_translation(original: str, translated, batch_texts: frozenset) -> Optional[str]:
+    """Why a translation cannot be used, None when it can"""
+    if not isinstance(translated, str):
+        return "answer element is not a string"
+    if original.strip() and not translated.strip():
+        return "empty translation"
+    if translated != original and translated in batch_texts:
+        # The model answered with a different input string, the array is shifted
+        return "misaligned answer"
+    if Counter(PLACEHOLDER.findall(original)) != Counter(PLACEHOLDER.findall(translated)):
+        return "placeholders changed"
+    return None
+
+
+def error_reason(error: BaseException) -> str:
+    if isinstance(error, TranslationAPIError):
+        return f"HTTP {error.status_code}"
+    return f"network error: {type(error).__name__}"
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, timeouts, server errors and network failures may pass, a bad key or request will not"""
+    if isinstance(error, TranslationAPIError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return isinstance(error, httpx.HTTPError)
+
+
+class BatchRetrier:
+    """Translate a batch until every string has a validated translation or is out of attempts
+
+    Elements are accepted as they arrive. A complete answer of the wrong
+    length is misaligned, so its elements are taken back. A string costs an
+    attempt each time it is sent again unchanged after coming back missing
+    or rejected. Strings a cut-off answer never reached are sent again for
+    free.
+
+    A group that fails split_after times in a row for content reasons
+    (malformed or misaligned answers) is split in half, and keeps halving
+    on further failures, so one string the model chokes on cannot sink its
+    batch. Rate limits, server and network errors are waited out instead.
+    Waits grow exponentially with full jitter and are never shorter than a
+    Retry-After. A batch sends at most max_attempts requests plus enough to
+    bisect it down to single strings.
+    """
+
+    def __init__(self, max_attempts: int = 5, split_after: int = 2, base_delay: float = 1.0, max_delay: float = 30.0,
+                 on_error: Callable[[BaseException], None] = None, rng: random.Random = None):
+        self.max_attempts = max_attempts
+        self.split_after = split_after
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_error = on_error  # e.g. the concurrency limiter's record_failure
+        self.rng = rng or random.Random()
+
+    def delay(self, failures: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before the next attempt of a group"""
+        delay = 0.0
+        if failures:
+            delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (failures - 1)))
+        return max(delay, retry_after or 0.0)
+
+    def request_budget(self, size: int) -> int:
+        return self.max_attempts + 2 * math.ceil(math.log2(max(size, 1)))
+
+    async def translate(self, translator, texts: List[str], target_lang: str,
+                        on_item: Callable[[int, Optional[str]], None] = None) -> Tuple[List[str], Dict[int, str]]:
+        """Returns (texts with every validated translation, {index: reason} of the strings that failed)
+
+        on_item(index, translated) is called when a translation is accepted and
+        on_item(index, None) when a misaligned answer takes it back. Failed
+        strings keep their original text.
+        """
+        results = list(texts)
+        accepted = [False] * len(texts)
+        attempts = [0] * len(texts)
+        reasons: Dict[int, str] = {}
+        batch_texts = frozenset(texts)
+        groups = deque([(list(range(len(texts))), 0)])  # (indices, content failures in a row)
+        budget = self.request_budget(len(texts))
+        requests = 0
+
+        while groups and requests < budget:
+            indices, failures = groups.popleft()
+            rejected = {}
+            taken = []
+
+            def take(position, element):
+                index = indices[position]
+                reason = check_translation(texts[index], element, batch_texts)
+                if reason:
+                    rejected[index] = reason
+                    return False
+                results[index] = element
+                accepted[index] = True
+                taken.append(index)
+                rejected.pop(index, None)
+                if on_item:
+                    on_item(index, element)
+                return True
+
+            requests += 1
+            error = None
+            try:
+                _, reason = await translator.translate_items([texts[index] for index in indices], target_lang, take)
+            except (TranslationAPIError, httpx.HTTPError) as e:
+                error = e
+                reason = error_reason(e)
+                if self.on_error:
+                    self.on_error(e)
+
+            if reason and reason.startswith(WRONG_LENGTH):
+                # Nothing tells which elements are shifted, none of them can be trusted
+                for index in taken:
+                    results[index] = texts[index]
+                    accepted[index] = False
+                    rejected[index] = "misaligned answer"
+                    if on_item:
+                        on_item(index, None)
+                taken = []
+
+            remaining = [index for index in indices if not accepted[index]]
+            if not remaining:
+                continue
+            for index in remaining:
+                reasons[index] = rejected.get(index, reason or "not translated")
+            if error is not None and not is_retryable(error):
+                continue
+
+            progressed = bool(taken)
+            content_failure = not progressed and (error is None or not is_overload_error(error))
+            if content_failure:
+                failures += 1
+            split = content_failure and failures >= self.split_after and len(remaining) > 1
+            for index in remaining:
+                # Strings a cut-off answer never got to, or that move to a smaller group, are not charged
+                if index in rejected or not (progressed or split):
+                    attempts[index] += 1
+            remaining = [index for index in remaining if attempts[index] < self.max_attempts]
+            if not remaining:
+                continue
+
+            rate_limited = isinstance(error, TranslationAPIError) and error.status_code == 429
+            cause = "rate_limited" if rate_limited else "partial" if progressed else "split" if split else "failed"
+            BATCH_RETRIES.inc(provider=translator.NAME, cause=cause)
+            # Back off by how often these strings failed, a group that just made progress goes again at once
+            backoff = 0 if progressed else max(1, max(attempts[index] for index in remaining))
+            await asyncio.sleep(self.delay(backoff, getattr(error, "retry_after", None)))
+
+            if split:
+                middle = len(remaining) // 2
+                groups.appendleft((remaining[middle:], failures))
+                groups.appendleft((remaining[:middle], failures))
+            else:
+                groups.appendleft((remaining, failures))
+
+        failed = {index: reasons.get(index, "not translated") for index in range(len(texts)) if not accepted[index]}
+        return results, failed
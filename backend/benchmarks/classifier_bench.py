@@ -0,0 +1,190 @@
+"""
+Differential check and microbenchmark for string_filter.should_translate
+
+Compares the compiled classifier with the original rule list on a corpus of
+edge cases, random strings and (optionally) every Utf8 constant of the given
+jars, then times both.
+
+Usage: python benchmarks/classifier_bench.py [mod.jar ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bytecode import extract_class_strings, list_class_entries  # noqa: E402
+from string_filter import CLASSIFIER_CACHE_SIZE, should_translate  # noqa: E402
+
+RANDOM_STRINGS = 200000
+RANDOM_SEED = 1234
+ROUNDS = 5
+
+EDGE_CASES = [
+    "", "abc", "abcd", "Abcd", "A1", "A1b2", "1234", "ab12", "VVVV",
+    "Hello world", "Hello.", "Hello!", "Hello?", "hello.", "HELLO.", "HELLO WORLD",
+    "HELLO_WORLD.", "ABCDEFGHIJKLMNOPQRST.", "ABCDEFGHIJKLMNOPQRS.", "Done!",
+    "net.minecraft.Foo", "com.example. a", "Net. work", "java.lang", "Mixin. x",
+    "path/to file", "C:\\dir file", "Some text.png", "Config file.toml", "A b.class",
+    "Ljava/lang/String;", "Lfoo bar;", "LFoo.;", "(I)V and", "(see below) text",
+    "<init>", "a <b> c", "Price < 5 > 3", "[Ljava;", "[ok] done", "Outer$Inner x",
+    "Code", "Code.", "String.", "LineNumberTable", "this", "Deprecated.",
+    "camelCase.", "CamelCase.", "CamelCase text", "Hello.World", "HelloWorld!",
+    "snake_case.", "Snake_case.", "CONSTANT_CASE.", "CONST_CASE!", "SHORT.",
+    "minecraft:stone", "Minecraft:Stone.", "Ratio: 1 to 2", "@Override", "@ test",
+    "{a b}", "Text }", "Version 1.2", "V1.2", "Version.1", "1.2.3", "#fff text",
+    "#Fff.", "A=b.", "Key = value", "Word.", "Word", "Wörter.", "Ärger!", "Éa.",
+    "Ünïcödé text", "Ǆemal.", "ǅungla.", "ǆ.", "Xǅy.", "Straße.", "ΑΒΓ.", "Αβγ.",
+    "Ω2.", "Ω².", "Version².", "Item①.", "日本語のテキスト", "日本語。", "Ab\u00b2.",
+    "A\u0660.", "Hi\tthere.", "Hi\nthere.", "A.b", "Ab.", " leading", "trailing ",
+    "    ", "A. ", "a.B", "aB.", "Ab.Cd", "Mr.X", "Ok?", "No!", "Quit?!",
+]
+
+ALPHABET = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    " ._-:;=/\\$<>()[]{}@#!?,'\"LV"
+    "äöüÄÖÜßéÉΩωǅ²①٠日本"
+)
+
+
+def legacy_should_translate(text: str) -> bool:
+    """The original AITranslator._should_translate rules, kept verbatim as the reference"""
+    if not text or len(text) < 4:  # Minimum 4 characters
+        return False
+
+    # Must contain at least 2 letters (to skip single letter + numbers)
+    letter_count = sum(1 for c in text if c.isalpha())
+    if letter_count < 2:
+        return False
+
+    # Skip obvious technical strings
+    skip_patterns = [
+        # Package/class names
+        text.startswith("net.") or text.startswith("com.") or text.startswith("org."),
+        text.startswith("java.") or text.startswith("javax.") or text.startswith("mojang."),
+        text.startswith("forge.") or text.startswith("minecraft.") or text.startswith("mixin."),
+
+        # File paths and extensions
+        "/" in text or "\\" in text,
+        any(text.endswith(ext) for ext in [".class", ".java", ".png", ".json", ".jar",
+                                            ".properties", ".xml", ".txt", ".cfg", ".lang",
+                                            ".mcmeta", ".yml", ".yaml", ".toml", ".mod",
+                                            ".ogg", ".wav", ".nbt", ".dat"]),
+
+        # Java internals
+        text.startswith("L") and text.endswith(";"),
+        text in ["V", "I", "Z", "B", "S", "C", "D", "F", "J", "L"],
+        text.startswith("(") and ")" in text,
+        "<init>" in text or "<clinit>" in text,
+        text.startswith("["),
+        "$" in text,  # Inner classes
+        "<" in text and ">" in text,  # Generics/HTML
+
+        # Java keywords and common variables
+        text in ["Code", "LineNumberTable", "LocalVariableTable", "SourceFile", "Signature",
+                "InnerClasses", "EnclosingMethod", "Exceptions", "ConstantValue", "Deprecated",
+                "RuntimeVisibleAnnotations", "StackMapTable", "BootstrapMethods", "MethodParameters",
+                "this", "super", "null", "true", "false", "void", "int", "boolean", "String"],
+
+        # Naming patterns
+        any(text[i].islower() and text[i+1].isupper() for i in range(len(text)-1)) and " " not in text,  # camelCase
+        text.islower() and "_" in text and " " not in text,  # snake_case (likely modid)
+        text.isupper() and "_" in text and " " not in text,  # CONSTANT_CASE
+        text.isupper() and " " not in text and len(text) < 20,  # All caps without space
+
+        # Resource locations and registry
+        ":" in text and " " not in text,  # namespace:path
+        text.startswith("@"),  # Annotations
+        text.startswith("{") or text.endswith("}"),  # NBT-like
+
+        # Technical patterns
+        "." in text and " " not in text and any(c.isdigit() for c in text),  # Version numbers
+        text.startswith("#"),  # Hex colors or comments
+        "=" in text and " " not in text,  # Assignments
+
+        # Single word lowercase (likely variable/method)
+        " " not in text and text.islower() and not any(c.isupper() for c in text),
+    ]
+
+    # Additional positive checks - must have at least one to proceed
+    positive_patterns = [
+        " " in text,  # Contains space (likely sentence)
+        text[0].isupper() and any(c in text for c in [" ", ".", "!", "?"]),  # Starts capital with punctuation
+    ]
+
+    return not any(skip_patterns) and any(positive_patterns)
+
+
+def random_corpus(count: int) -> list:
+    rng = random.Random(RANDOM_SEED)
+    corpus = []
+    for _ in range(count):
+        length = rng.choice((3, 4, 5, 6, 8, 12, 20, 24, 40))
+        text = "".join(rng.choice(ALPHABET) for _ in range(length))
+        # Bias towards the shapes the prefix/suffix rules look at
+        roll = rng.random()
+        if roll < 0.1:
+            text = rng.choice(("net.", "java.", "L", "(", "[", "@", "{", "#", "Mixin.")) + text
+        elif roll < 0.2:
+            text += rng.choice((".png", ".json", ";", "}", ".", "!", "?", ".lang"))
+        corpus.append(text)
+    return corpus
+
+
+def jar_corpus(jar_paths: list) -> list:
+    corpus = []
+    for jar_path in jar_paths:
+        for _, strings in extract_class_strings(jar_path, list_class_entries(jar_path)):
+            corpus.extend(text for _, text in strings)
+    return corpus
+
+
+def check(corpus: list) -> int:
+    mismatches = 0
+    for text in corpus:
+        expected = legacy_should_translate(text)
+        if should_translate.__wrapped__(text) != expected or should_translate(text) != expected:
+            mismatches += 1
+            if mismatches <= 20:
+                print(f"MISMATCH {text!r}: expected {expected}")
+    return mismatches
+
+
+def bench(name: str, classify, corpus: list) -> float:
+    best = None
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for text in corpus:
+            classify(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<26} {best * 1000:9.1f} ms  {len(corpus) / best / 1e6:6.2f} M strings/s")
+    return best
+
+
+def main():
+    corpus = EDGE_CASES + random_corpus(RANDOM_STRINGS) + jar_corpus(sys.argv[1:])
+    print(f"Corpus: {len(corpus)} strings ({len(set(corpus))} unique), "
+          f"{sum(map(legacy_should_translate, corpus))} translatable")
+
+    mismatches = check(corpus)
+    if mismatches:
+        print(f"FAILED: {mismatches} mismatches")
+        sys.exit(1)
+    print("Classifier matches the original rules")
+
+    legacy = bench("original rules", legacy_should_translate, corpus)
+    compiled = bench("compiled", should_translate.__wrapped__, corpus)
+    print(f"Speedup: {legacy / compiled:.1f}x")
+
+    # The memo pays off when the same strings come back, e.g. shared libraries across a modpack
+    repeated = corpus[:CLASSIFIER_CACHE_SIZE // 2] * 4
+    legacy = bench("original rules, repeats", legacy_should_translate, repeated)
+    should_translate.cache_clear()
+    memo = bench("compiled + memo, repeats", should_translate, repeated)
+    print(f"Speedup: {legacy / memo:.1f}x with memo")
+
+
+if __name__ == "__main__":
+    main()
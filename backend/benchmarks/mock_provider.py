@@ -0,0 +1,144 @@
+"""
+Local stand-in for the translation APIs, plugged in through httpx.MockTransport
+
+Answers DeepSeek/OpenAI, Claude and Gemini requests with their own response
+shapes after a configurable latency, streamed as server-sent events when the
+request asks for it, and fails a configurable share of them with 500s or 429s
+(with Retry-After) or cuts the answer off halfway. Nothing leaves the process.
+"""
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class MockProviderConfig:
+    latency_ms: float = 200.0  # Fixed part of every response
+    per_string_ms: float = 2.0  # Added per string in the batch, like output tokens
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0  # Share of requests answered with a 500
+    rate_limit_rate: float = 0.0  # Share of requests answered with a 429
+    retry_after: float = 1.0  # Retry-After seconds sent with 429s
+    truncate_rate: float = 0.0  # Share of answers cut off in the middle of the array
+    slow_rate: float = 0.0  # Share of requests that stall for slow_ms before answering, the latency tail
+    slow_ms: float = 10000.0
+    down_hosts: tuple = ()  # Hosts that answer every request with a 500
+    fenced: bool = True  # Wrap the JSON array in a ```json block like real models often do
+    stream_chunk_chars: int = 24  # Answer text per streamed event
+    seed: int = 7
+
+
+@dataclass
+class MockProviderStats:
+    requests: int = 0
+    strings: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    truncated: int = 0
+    streamed: int = 0
+    slow: int = 0
+    by_host: dict = field(default_factory=dict)
+
+
+def extract_texts(prompt: str) -> list:
+    """Pull the JSON array the translators embed in their prompts (json.dumps with indent=2)"""
+    start = prompt.find('[\n  "')
+    if start < 0:
+        return []
+    texts, _ = json.JSONDecoder().raw_decode(prompt, start)
+    return texts
+
+
+def fake_translate(text: str) -> str:
+    return f"【{text}】"
+
+
+def stream_event(host: str, text: str) -> dict:
+    """One streamed chunk of answer text in the provider's event shape"""
+    if host == "api.anthropic.com":
+        return {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}}
+    if host == "generativelanguage.googleapis.com":
+        return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+    return {"choices": [{"index": 0, "delta": {"content": text}}]}
+
+
+class MockProvider:
+    """httpx handler emulating every provider the app talks to"""
+
+    def __init__(self, config: MockProviderConfig = None):
+        self.config = config or MockProviderConfig()
+        self.rng = random.Random(self.config.seed)
+        self.stats = MockProviderStats()
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        config = self.config
+        stats = self.stats
+        host = request.url.host
+        body = json.loads(request.content)
+
+        if host == "api.anthropic.com":
+            prompt = body["messages"][-1]["content"]
+        elif host == "generativelanguage.googleapis.com":
+            prompt = body["contents"][0]["parts"][0]["text"]
+        else:
+            prompt = body["messages"][-1]["content"]
+        texts = extract_texts(prompt)
+
+        stream = bool(body.get("stream")) or "streamGenerateContent" in request.url.path
+        stats.requests += 1
+        stats.by_host[host] = stats.by_host.get(host, 0) + 1
+        # A streamed answer starts after the fixed latency and spends the per-string time while streaming
+        generation_ms = config.per_string_ms * len(texts)
+        delay = config.latency_ms + self.rng.uniform(0, config.jitter_ms) + (0 if stream else generation_ms)
+        if self.rng.random() < config.slow_rate:
+            stats.slow += 1
+            delay += config.slow_ms
+        await asyncio.sleep(delay / 1000)
+
+        if host in config.down_hosts:
+            stats.errors += 1
+            return httpx.Response(500, json={"error": "mock provider down"})
+
+        roll = self.rng.random()
+        if roll < config.rate_limit_rate:
+            stats.rate_limited += 1
+            return httpx.Response(429, headers={"retry-after": str(config.retry_after)}, json={"error": "rate limited"})
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats.errors += 1
+            return httpx.Response(500, json={"error": "mock server error"})
+
+        stats.strings += len(texts)
+        content = json.dumps([fake_translate(text) for text in texts], ensure_ascii=False, indent=2)
+        if config.fenced:
+            content = f"```json\n{content}\n```"
+        if self.rng.random() < config.truncate_rate:
+            stats.truncated += 1
+            content = content[:len(content) // 2]
+
+        if stream:
+            stats.streamed += 1
+            size = max(1, config.stream_chunk_chars)
+            chunks = [content[i:i + size] for i in range(0, len(content), size)]
+
+            async def events():
+                for chunk in chunks:
+                    await asyncio.sleep(generation_ms / max(1, len(chunks)) / 1000)
+                    yield f"data: {json.dumps(stream_event(host, chunk), ensure_ascii=False)}\n\n".encode("utf-8")
+                if host not in ("api.anthropic.com", "generativelanguage.googleapis.com"):
+                    yield b"data: [DONE]\n\n"
+
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=events())
+
+        if host == "api.anthropic.com":
+            payload = {"content": [{"type": "text", "text": content}]}
+        elif host == "generativelanguage.googleapis.com":
+            payload = {"candidates": [{"content": {"parts": [{"text": content}]}}]}
+        else:
+            payload = {"choices": [{"message": {"role": "assistant", "content": content}}]}
+        return httpx.Response(200, json=payload)
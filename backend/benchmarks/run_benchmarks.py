@@ -0,0 +1,206 @@
+"""
+Offline end-to-end benchmark of the bytecode pipeline
+
+Generates a synthetic jar, runs process_jar's review pass against the mock
+provider and then applies every changed translation, the same two calls the
+API makes. Reports the stage timings process_jar records (parse, filter,
+memory, translate, apply, repack), strings per second and peak RSS. No
+network access is needed.
+
+Usage: python benchmarks/run_benchmarks.py --classes 2000 --provider Claude --latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_provider import MockProvider, MockProviderConfig  # noqa: E402
+from synthetic_jar import JarSpec, write_jar  # noqa: E402
+
+PROVIDER_HOSTS = {
+    "Deepseek": "api.deepseek.com",
+    "OpenAI": "api.openai.com",
+    "Claude": "api.anthropic.com",
+    "Gemini": "generativelanguage.googleapis.com",
+}
+STAGES = ("parse", "filter", "memory", "translate", "load_index", "apply", "repack")
+
+
+def peak_rss_mb() -> tuple:
+    """Peak resident set size of this process and of its finished children, in MB (Linux reports KB)"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    jar = parser.add_argument_group("synthetic jar")
+    jar.add_argument("--classes", type=int, default=JarSpec.classes)
+    jar.add_argument("--strings-per-class", type=int, default=JarSpec.strings_per_class)
+    jar.add_argument("--identifiers-per-class", type=int, default=JarSpec.identifiers_per_class)
+    jar.add_argument("--duplication", type=float, default=JarSpec.duplication)
+    jar.add_argument("--technical-share", type=float, default=JarSpec.technical_share)
+    jar.add_argument("--resources", type=int, default=JarSpec.resources)
+    jar.add_argument("--resource-kb", type=int, default=JarSpec.resource_kb)
+    jar.add_argument("--seed", type=int, default=JarSpec.seed)
+
+    mock = parser.add_argument_group("mock provider")
+    mock.add_argument("--provider", default="Deepseek", choices=("Deepseek", "OpenAI", "Claude", "Gemini"))
+    mock.add_argument("--latency-ms", type=float, default=MockProviderConfig.latency_ms)
+    mock.add_argument("--per-string-ms", type=float, default=MockProviderConfig.per_string_ms)
+    mock.add_argument("--jitter-ms", type=float, default=MockProviderConfig.jitter_ms)
+    mock.add_argument("--error-rate", type=float, default=MockProviderConfig.error_rate)
+    mock.add_argument("--rate-limit-rate", type=float, default=MockProviderConfig.rate_limit_rate)
+    mock.add_argument("--retry-after", type=float, default=MockProviderConfig.retry_after)
+    mock.add_argument("--truncate-rate", type=float, default=MockProviderConfig.truncate_rate)
+    mock.add_argument("--slow-rate", type=float, default=MockProviderConfig.slow_rate)
+    mock.add_argument("--slow-ms", type=float, default=MockProviderConfig.slow_ms)
+    mock.add_argument("--down", action="append", default=[], choices=tuple(PROVIDER_HOSTS),
+                      help="Provider that answers every request with a 500, may be repeated")
+
+    parser.add_argument("--runs", type=int, default=1, help="Repeat the pipeline, each run starts with an empty translation memory")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (0 runs parsing in threads)")
+    parser.add_argument("--no-stream", action="store_true", help="Wait for whole provider responses instead of streaming them")
+    parser.add_argument("--hedge-percentile", type=float, default=None, help="Hedge batches slower than this share of recent answers, e.g. 0.9")
+    parser.add_argument("--failover", action="append", default=[], choices=tuple(PROVIDER_HOSTS),
+                        help="Secondary provider to fail over to, may be repeated")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+async def run_once(main, jar_path: str, args, run: int) -> dict:
+    from translation_memory import TranslationMemory
+
+    # Fresh translation memory so every run actually translates
+    main.translation_memory = TranslationMemory(f"tm_{run}.db", main.TRANSLATION_MEMORY_MAX_ENTRIES, main.TRANSLATION_MEMORY_MAX_AGE)
+    task_id = f"bench_{run}"
+    main.task_store.create(task_id, {"status": "processing"})
+
+    started = time.perf_counter()
+    review = await main.process_jar(jar_path, "zh_cn", args.provider, "mock-key", task_id, return_translations=True)
+    review_seconds = time.perf_counter() - started
+
+    selected = {pair["original"]: pair["translated"] for pair in review["translation_pairs"] if pair["changed"]}
+    started = time.perf_counter()
+    output_jar = await main.process_jar(jar_path, "zh_cn", args.provider, "mock-key", task_id, selected_translations=selected)
+    apply_seconds = time.perf_counter() - started
+    main.discard_review_index(task_id)
+
+    task = main.task_store[task_id]
+    return {
+        "stage_seconds": task.get("stage_seconds", {}),
+        "review_seconds": round(review_seconds, 4),
+        "apply_seconds": round(apply_seconds, 4),
+        "candidates": review["total_strings"],
+        "occurrences": review["total_occurrences"],
+        "changed": review["changed_strings"],
+        "failed": task.get("failed_strings", 0),
+        "batches": task.get("total_batches", 0),
+        "provider_requests": task.get("provider_requests", {}),
+        "hedged_requests": task.get("hedged_requests", 0),
+        "hedges_won": task.get("hedges_won", 0),
+        "output_bytes": os.path.getsize(output_jar),
+    }
+
+
+async def run_benchmarks(args, workdir: str) -> dict:
+    spec = JarSpec(
+        classes=args.classes, strings_per_class=args.strings_per_class,
+        identifiers_per_class=args.identifiers_per_class, duplication=args.duplication,
+        technical_share=args.technical_share, resources=args.resources,
+        resource_kb=args.resource_kb, seed=args.seed,
+    )
+    jar_path = os.path.join(workdir, "benchmod.jar")
+    started = time.perf_counter()
+    jar_info = write_jar(jar_path, spec)
+    print(f"Generated {jar_path}: {os.path.getsize(jar_path) / 1e6:.1f} MB, {spec.classes} classes, "
+          f"{jar_info['literals']} literals ({jar_info['unique_literals']} unique) in {time.perf_counter() - started:.1f}s")
+
+    # main creates its data directories and databases in the working directory on import
+    import main
+    from ai_translator import http_clients
+
+    if args.workers is not None:
+        main.PROCESS_POOL_WORKERS = args.workers
+    main.PROVIDER_STREAMING = not args.no_stream
+    main.HEDGE_PERCENTILE = args.hedge_percentile
+    main.FAILOVER_PROVIDERS = [(ai_model, "mock-key") for ai_model in args.failover]
+    provider = MockProvider(MockProviderConfig(
+        latency_ms=args.latency_ms, per_string_ms=args.per_string_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        truncate_rate=args.truncate_rate, slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+        down_hosts=tuple(PROVIDER_HOSTS[ai_model] for ai_model in args.down),
+    ))
+    http_clients.transport = provider.transport()
+
+    runs = []
+    try:
+        for run in range(args.runs):
+            runs.append(await run_once(main, jar_path, args, run))
+    finally:
+        await http_clients.close()
+        if main.process_pool is not None:
+            main.process_pool.shutdown()
+
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        "jar": {**vars(spec), **jar_info, "bytes": os.path.getsize(jar_path)},
+        "provider": {"name": args.provider, **vars(provider.config)},
+        "mock_stats": {key: value for key, value in vars(provider.stats).items()},
+        "runs": runs,
+        "peak_rss_mb": {"main": round(own_rss, 1), "pool_workers": round(children_rss, 1)},
+    }
+
+
+def print_report(results: dict):
+    unique_literals = results["jar"]["unique_literals"]
+    for number, run in enumerate(results["runs"], 1):
+        print(f"\nRun {number}: {run['candidates']} candidates ({run['occurrences']} occurrences), "
+              f"{run['changed']} changed, {run['failed']} failed, {run['batches']} batches")
+        requests = ", ".join(f"{name} {count}" for name, count in run["provider_requests"].items())
+        print(f"  Requests: {requests or 'none'}, {run['hedged_requests']} hedged ({run['hedges_won']} won)")
+        stage_seconds = run["stage_seconds"]
+        for stage in STAGES:
+            if stage not in stage_seconds:
+                continue
+            seconds = stage_seconds[stage]
+            # Parsing sees every literal, later stages only the candidates
+            items = unique_literals if stage == "parse" else run["candidates"]
+            rate = f"{items / seconds:12.0f} strings/s" if seconds > 0 else ""
+            print(f"  {stage:<11} {seconds * 1000:10.1f} ms {rate}")
+        total = run["review_seconds"] + run["apply_seconds"]
+        print(f"  {'review pass':<11} {run['review_seconds'] * 1000:10.1f} ms")
+        print(f"  {'apply pass':<11} {run['apply_seconds'] * 1000:10.1f} ms")
+        print(f"  {'total':<11} {total * 1000:10.1f} ms {unique_literals / total:12.0f} strings/s")
+
+    stats = results["mock_stats"]
+    print(f"\nMock provider: {stats['requests']} requests, {stats['strings']} strings, "
+          f"{stats['errors']} errors, {stats['rate_limited']} rate limited, {stats['truncated']} truncated, "
+          f"{stats['streamed']} streamed, {stats['slow']} slow")
+    rss = results["peak_rss_mb"]
+    print(f"Peak RSS: {rss['main']} MB main process, {rss['pool_workers']} MB largest pool worker")
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="xtmc-bench-") as workdir:
+        os.chdir(workdir)
+        results = asyncio.run(run_benchmarks(args, workdir))
+        os.chdir(BACKEND_DIR)
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Synthetic mod jars for benchmarking the bytecode pipeline
+
+Classes are valid enough for ClassFileModifier: a constant pool with string
+literals, method/field references and descriptors, fields, and one method
+whose Code loads every literal with ldc_w.
+"""
+import random
+import struct
+import zipfile
+from dataclasses import dataclass
+
+WORDS = (
+    "the", "energy", "stored", "click", "to", "open", "machine", "is", "full", "of",
+    "items", "please", "wait", "while", "crafting", "recipe", "not", "found", "power",
+    "level", "too", "low", "right", "insert", "fuel", "slot", "upgrade", "installed",
+    "speed", "range", "your", "inventory", "has", "no", "space", "left", "enabled",
+    "disabled", "progress", "complete", "failed", "warning", "player", "world", "block",
+)
+
+TECHNICAL = (
+    "{modid}:{word}", "textures/gui/{word}.png", "{word}_{word}", "{Word}{Word}",
+    "net.{word}.{word}", "tag.{word}.{word}", "%s/%s", "{word}", "CONFIG_{WORD}",
+)
+
+
+@dataclass
+class JarSpec:
+    classes: int = 500
+    strings_per_class: int = 20  # String literals (ldc) per class
+    identifiers_per_class: int = 40  # Method/field references, i.e. non-literal Utf8 entries
+    duplication: float = 0.5  # Share of literals drawn from a pool shared by all classes
+    technical_share: float = 0.4  # Share of literals that are identifiers rather than text
+    resources: int = 100  # Non-class entries (textures, models, lang files)
+    resource_kb: int = 8
+    seed: int = 42
+
+
+def make_sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(2, 8))
+    sentence = " ".join(words).capitalize()
+    return sentence + rng.choice((".", "!", "", ": %s", " (%d)"))
+
+
+def make_technical(rng: random.Random) -> str:
+    word = rng.choice(WORDS)
+    return rng.choice(TECHNICAL).format(
+        modid="benchmod", word=word, Word=word.capitalize(), WORD=word.upper()
+    )
+
+
+def make_literal(rng: random.Random, spec: JarSpec, unique_suffix: str = None) -> str:
+    """A sentence or an identifier, the suffix makes it unique without changing which kind it looks like"""
+    if rng.random() < spec.technical_share:
+        text = make_technical(rng)
+        return f"{text}_{unique_suffix}" if unique_suffix else text
+    text = make_sentence(rng)
+    return f"{text} #{unique_suffix}" if unique_suffix else text
+
+
+def make_class(name: str, literals, identifiers) -> bytes:
+    """Build a class file that ldc's every literal and references every identifier"""
+    cp = []
+    utf8_cache = {}
+
+    def add(entry):
+        cp.append(entry)
+        return len(cp)
+
+    def utf8(text):
+        index = utf8_cache.get(text)
+        if index is None:
+            data = text.encode("utf-8")
+            index = utf8_cache[text] = add(b"\x01" + struct.pack(">H", len(data)) + data)
+        return index
+
+    this_class = add(b"\x07" + struct.pack(">H", utf8(name)))
+    super_class = add(b"\x07" + struct.pack(">H", utf8("java/lang/Object")))
+    string_entries = [add(b"\x08" + struct.pack(">H", utf8(text))) for text in literals]
+    for identifier in identifiers:
+        name_and_type = add(b"\x0c" + struct.pack(">HH", utf8(identifier), utf8("()V")))
+        add(b"\x0a" + struct.pack(">HH", this_class, name_and_type))
+    code_name = utf8("Code")
+    field_names = [(utf8(f"field{i}"), utf8("Ljava/lang/String;")) for i in range(4)]
+    method_name = utf8("init")
+    method_desc = utf8("()V")
+
+    code = b"".join(b"\x13" + struct.pack(">H", index) + b"\x57" for index in string_entries) + b"\xb1"
+    code_attribute = struct.pack(">HHI", 1, 1, len(code)) + code + struct.pack(">HH", 0, 0)
+
+    out = bytearray(struct.pack(">IHHH", 0xCAFEBABE, 0, 52, len(cp) + 1))
+    for entry in cp:
+        out += entry
+    out += struct.pack(">HHHH", 0x21, this_class, super_class, 0)
+    out += struct.pack(">H", len(field_names))
+    for field_name, field_desc in field_names:
+        out += struct.pack(">HHHH", 0x02, field_name, field_desc, 0)
+    out += struct.pack(">H", 1)
+    out += struct.pack(">HHHH", 0x01, method_name, method_desc, 1)
+    out += struct.pack(">HI", code_name, len(code_attribute)) + code_attribute
+    out += struct.pack(">H", 0)
+    return bytes(out)
+
+
+def write_jar(path: str, spec: JarSpec) -> dict:
+    """Write a synthetic jar to path, returns counts describing what went in"""
+    rng = random.Random(spec.seed)
+    shared_pool = [make_literal(rng, spec) for _ in range(max(1, spec.strings_per_class * 4))]
+    literal_count = 0
+    unique_literals = set()
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as jar:
+        jar.writestr("META-INF/MANIFEST.MF", "Manifest-Version: 1.0\n")
+        for i in range(spec.classes):
+            literals = []
+            seen = set()
+            while len(literals) < spec.strings_per_class:
+                if rng.random() < spec.duplication:
+                    text = rng.choice(shared_pool)
+                else:
+                    text = make_literal(rng, spec, f"{i}_{len(literals)}")
+                if text not in seen:
+                    seen.add(text)
+                    literals.append(text)
+            identifiers = [f"{rng.choice(WORDS)}{rng.choice(WORDS).capitalize()}{j}" for j in range(spec.identifiers_per_class)]
+            jar.writestr(f"com/benchmod/pkg{i % 16}/Class{i}.class", make_class(f"com/benchmod/pkg{i % 16}/Class{i}", literals, identifiers))
+            literal_count += len(literals)
+            unique_literals.update(literals)
+
+        for i in range(spec.resources):
+            kind = i % 4
+            if kind == 0:
+                # Textures are incompressible, store them like real jars usually do
+                info = zipfile.ZipInfo(f"assets/benchmod/textures/block/tex{i}.png")
+                info.compress_type = zipfile.ZIP_STORED
+                jar.writestr(info, b"\x89PNG" + rng.randbytes(spec.resource_kb * 1024))
+            elif kind == 1:
+                jar.writestr(f"assets/benchmod/models/item/model{i}.json",
+                             '{"parent": "item/generated", "textures": {"layer0": "benchmod:item/x"}}\n' * (spec.resource_kb * 12))
+            elif kind == 2:
+                jar.writestr(f"assets/benchmod/lang/part{i}.json",
+                             "{" + ", ".join(f'"item.benchmod.i{j}": "{make_sentence(rng)}"' for j in range(spec.resource_kb * 20)) + "}")
+            else:
+                jar.writestr(f"data/benchmod/recipes/recipe{i}.json",
+                             '{"type": "minecraft:crafting_shaped", "pattern": ["###"]}\n' * (spec.resource_kb * 16))
+
+    return {"literals": literal_count, "unique_literals": len(unique_literals)}
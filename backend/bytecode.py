@@ -0,0 +1,481 @@
+"""
+Java class file and JAR helpers for bytecode translation
+These functions run inside the process pool, so they only depend on the stdlib
+"""
+import bisect
+import copy
+import struct
+import zipfile
+from array import array
+from typing import Dict, List, Tuple
+
+ZIP_COPY_CHUNK_SIZE = 1024 * 1024  # Read size when copying raw JAR entries
+
+# Java Class File Constants
+CONSTANT_Utf8 = 1
+CONSTANT_Integer = 3
+CONSTANT_Float = 4
+CONSTANT_Long = 5
+CONSTANT_Double = 6
+CONSTANT_Class = 7
+CONSTANT_String = 8
+CONSTANT_Fieldref = 9
+CONSTANT_Methodref = 10
+CONSTANT_InterfaceMethodref = 11
+CONSTANT_NameAndType = 12
+CONSTANT_MethodHandle = 15
+CONSTANT_MethodType = 16
+CONSTANT_InvokeDynamic = 18
+CONSTANT_Dynamic = 17
+CONSTANT_Module = 19
+CONSTANT_Package = 20
+
+# Encoded size (tag byte included) of every fixed-length constant pool entry
+CONSTANT_ENTRY_SIZES = {
+    CONSTANT_Integer: 5,
+    CONSTANT_Float: 5,
+    CONSTANT_Long: 9,
+    CONSTANT_Double: 9,
+    CONSTANT_Class: 3,
+    CONSTANT_String: 3,
+    CONSTANT_Fieldref: 5,
+    CONSTANT_Methodref: 5,
+    CONSTANT_InterfaceMethodref: 5,
+    CONSTANT_NameAndType: 5,
+    CONSTANT_MethodHandle: 4,
+    CONSTANT_MethodType: 3,
+    CONSTANT_Dynamic: 5,
+    CONSTANT_InvokeDynamic: 5,
+    CONSTANT_Module: 3,
+    CONSTANT_Package: 3,
+}
+
+# Entries whose single u2 operand names a Utf8 entry that must keep its value
+CONSTANT_NAME_REFERENCES = (CONSTANT_Class, CONSTANT_MethodType, CONSTANT_Module, CONSTANT_Package)
+
+# Size of target_info for each type annotation target_type (JVMS 4.7.20.1), localvar targets are variable length
+TYPE_ANNOTATION_TARGET_SIZES = {
+    0x00: 1, 0x01: 1, 0x10: 2, 0x11: 2, 0x12: 2, 0x13: 0, 0x14: 0, 0x15: 0, 0x16: 1, 0x17: 2,
+    0x42: 2, 0x43: 2, 0x44: 2, 0x45: 2, 0x46: 2, 0x47: 3, 0x48: 3, 0x49: 3, 0x4A: 3, 0x4B: 3,
+}
+TYPE_ANNOTATION_LOCALVAR_TARGETS = (0x40, 0x41)
+
+
+class ClassFileModifier:
+    """Offset-indexed view of a class file's CONSTANT_Utf8 entries
+
+    parse() only records where each Utf8 entry lives (constant pool index,
+    byte offset and length) and which Utf8 entries the constant pool itself
+    points at; every other entry is skipped without allocating anything.
+    analyze_references() walks fields, methods and attributes to find the
+    remaining Utf8 references, so literal_indices() can tell string literals
+    apart from names, descriptors and signatures. Modified strings are kept
+    aside and build() splices them into copies of the untouched byte ranges.
+    """
+    __slots__ = ("data", "view", "utf8_indices", "utf8_offsets", "utf8_lengths", "modified",
+                 "body_offset", "string_refs", "name_refs", "annotation_refs")
+
+    def __init__(self, data):
+        self.data = data
+        self.view = memoryview(data)
+        self.utf8_indices = array("H")  # Constant pool index of each Utf8 entry
+        self.utf8_offsets = array("I")  # Offset of the entry's bytes (after the u2 length)
+        self.utf8_lengths = array("H")
+        self.modified = {}  # Constant pool index -> replacement bytes
+        self.body_offset = 0  # Offset of access_flags, right after the constant pool
+        self.string_refs = set()  # Utf8 entries behind CONSTANT_String (ldc literals, ConstantValue)
+        self.name_refs = set()  # Utf8 entries used as names, descriptors, signatures, ...
+        self.annotation_refs = set()  # Utf8 entries used as annotation string values
+
+    def parse(self):
+        data = self.data
+        if len(data) < 10 or data[:4] != b"\xca\xfe\xba\xbe":
+            raise ValueError("Not a valid Java class file")
+
+        constant_pool_count = (data[8] << 8) | data[9]
+        entry_sizes = CONSTANT_ENTRY_SIZES
+        indices = self.utf8_indices
+        offsets = self.utf8_offsets
+        lengths = self.utf8_lengths
+        string_refs = self.string_refs
+        name_refs = self.name_refs
+
+        pos = 10
+        i = 1
+        while i < constant_pool_count:
+            tag = data[pos]
+            
+            if tag == CONSTANT_Utf8:
+                length = (data[pos + 1] << 8) | data[pos + 2]
+                indices.append(i)
+                offsets.append(pos + 3)
+                lengths.append(length)
+                pos += 3 + length
+            else:
+                size = entry_sizes.get(tag)
+                if size is None:
+                    raise ValueError(f"Unknown constant pool tag: {tag}")
+                if tag == CONSTANT_String:
+                    string_refs.add((data[pos + 1] << 8) | data[pos + 2])
+                elif tag == CONSTANT_NameAndType:
+                    name_refs.add((data[pos + 1] << 8) | data[pos + 2])
+                    name_refs.add((data[pos + 3] << 8) | data[pos + 4])
+                elif tag in CONSTANT_NAME_REFERENCES:
+                    name_refs.add((data[pos + 1] << 8) | data[pos + 2])
+                pos += size
+                # Long and Double take up two constant pool slots
+                if tag == CONSTANT_Long or tag == CONSTANT_Double:
+                    i += 1
+            
+            i += 1
+
+        if pos > len(data):
+            raise ValueError("Truncated constant pool")
+        self.body_offset = pos
+
+    def _u2(self, pos):
+        data = self.data
+        return (data[pos] << 8) | data[pos + 1]
+
+    def analyze_references(self):
+        """Record the Utf8 entries referenced from fields, methods and attributes
+
+        Must run after parse(). Attributes this walker does not know are
+        skipped; the standard ones only point at Utf8 entries through the
+        places handled below.
+        """
+        u2 = self._u2
+        name_refs = self.name_refs
+        # access_flags, this_class, super_class, then the interfaces
+        pos = self.body_offset + 6
+        pos += 2 + 2 * u2(pos)
+        for _ in range(2):  # Fields, then methods
+            count = u2(pos)
+            pos += 2
+            for _ in range(count):
+                name_refs.add(u2(pos + 2))
+                name_refs.add(u2(pos + 4))
+                pos = self._scan_attributes(pos + 6)
+        pos = self._scan_attributes(pos)
+        if pos > len(self.data):
+            raise ValueError("Truncated class file")
+
+    def _scan_attributes(self, pos):
+        """Walk an attributes table starting at its u2 count, returns the offset after it"""
+        data = self.data
+        u2 = self._u2
+        name_refs = self.name_refs
+        count = u2(pos)
+        pos += 2
+        for _ in range(count):
+            name_index = u2(pos)
+            length = int.from_bytes(data[pos + 2:pos + 6], "big")
+            start = pos + 6
+            pos = start + length
+            if pos > len(data):
+                raise ValueError("Truncated attribute")
+            name_refs.add(name_index)
+            name = self.get_utf8(name_index)
+
+            if name == b"Code":
+                code_length = int.from_bytes(data[start + 4:start + 8], "big")
+                offset = start + 8 + code_length
+                offset += 2 + 8 * u2(offset)  # Exception table
+                self._scan_attributes(offset)
+            elif name in (b"Signature", b"SourceFile"):
+                name_refs.add(u2(start))
+            elif name in (b"LocalVariableTable", b"LocalVariableTypeTable"):
+                for offset in range(start + 2, start + 2 + 10 * u2(start), 10):
+                    name_refs.add(u2(offset + 4))
+                    name_refs.add(u2(offset + 6))
+            elif name == b"MethodParameters":
+                for offset in range(start + 1, start + 1 + 4 * data[start], 4):
+                    name_refs.add(u2(offset))
+            elif name == b"InnerClasses":
+                for offset in range(start + 2, start + 2 + 8 * u2(start), 8):
+                    name_refs.add(u2(offset + 4))
+            elif name == b"Record":
+                offset = start + 2
+                for _ in range(u2(start)):
+                    name_refs.add(u2(offset))
+                    name_refs.add(u2(offset + 2))
+                    offset = self._scan_attributes(offset + 4)
+            elif name in (b"RuntimeVisibleAnnotations", b"RuntimeInvisibleAnnotations"):
+                offset = start + 2
+                for _ in range(u2(start)):
+                    offset = self._scan_annotation(offset)
+            elif name in (b"RuntimeVisibleParameterAnnotations", b"RuntimeInvisibleParameterAnnotations"):
+                offset = start + 1
+                for _ in range(data[start]):
+                    annotation_count = u2(offset)
+                    offset += 2
+                    for _ in range(annotation_count):
+                        offset = self._scan_annotation(offset)
+            elif name in (b"RuntimeVisibleTypeAnnotations", b"RuntimeInvisibleTypeAnnotations"):
+                offset = start + 2
+                for _ in range(u2(start)):
+                    offset = self._scan_type_annotation(offset)
+            elif name == b"AnnotationDefault":
+                self._scan_element_value(start)
+        return pos
+
+    def _scan_annotation(self, pos):
+        u2 = self._u2
+        self.name_refs.add(u2(pos))  # Type descriptor
+        pair_count = u2(pos + 2)
+        pos += 4
+        for _ in range(pair_count):
+            self.name_refs.add(u2(pos))  # Element name
+            pos = self._scan_element_value(pos + 2)
+        return pos
+
+    def _scan_type_annotation(self, pos):
+        target_type = self.data[pos]
+        pos += 1
+        if target_type in TYPE_ANNOTATION_LOCALVAR_TARGETS:
+            pos += 2 + 6 * self._u2(pos)
+        else:
+            size = TYPE_ANNOTATION_TARGET_SIZES.get(target_type)
+            if size is None:
+                raise ValueError(f"Unknown type annotation target: {target_type:#x}")
+            pos += size
+        pos += 1 + 2 * self.data[pos]  # type_path
+        return self._scan_annotation(pos)
+
+    def _scan_element_value(self, pos):
+        u2 = self._u2
+        tag = self.data[pos]
+        pos += 1
+        if tag == 0x73:  # 's': String constant, points straight at a Utf8 entry
+            self.annotation_refs.add(u2(pos))
+            return pos + 2
+        if tag == 0x65:  # 'e': enum type descriptor and constant name
+            self.name_refs.add(u2(pos))
+            self.name_refs.add(u2(pos + 2))
+            return pos + 4
+        if tag == 0x63:  # 'c': return descriptor of a class literal
+            self.name_refs.add(u2(pos))
+            return pos + 2
+        if tag == 0x40:  # '@': nested annotation
+            return self._scan_annotation(pos)
+        if tag == 0x5B:  # '[': array of element values
+            count = u2(pos)
+            pos += 2
+            for _ in range(count):
+                pos = self._scan_element_value(pos)
+            return pos
+        if tag in b"BCDFIJSZ":  # Primitive constants live in Integer/Float/Long/Double entries
+            return pos + 2
+        raise ValueError(f"Unknown annotation element tag: {tag:#x}")
+
+    def literal_indices(self, include_annotations=False):
+        """Constant pool indices of Utf8 entries that are only used as string literals
+
+        A Utf8 entry shared with a name, descriptor or signature is left out,
+        changing it would break linkage. Annotation string values count as
+        literals only when include_annotations is set, otherwise they block
+        the entries they share.
+        """
+        literals = set(self.string_refs)
+        if include_annotations:
+            literals |= self.annotation_refs
+            return literals - self.name_refs
+        return literals - self.name_refs - self.annotation_refs
+
+    def iter_utf8_strings(self, only=None):
+        """Yield (constant pool index, decoded text) for every Utf8 entry, or those in only
+
+        Entries that are not valid UTF-8 (e.g. modified UTF-8 with embedded
+        nulls) are skipped.
+        """
+        view = self.view
+        for index, offset, length in zip(self.utf8_indices, self.utf8_offsets, self.utf8_lengths):
+            if only is not None and index not in only:
+                continue
+            try:
+                yield index, str(view[offset:offset + length], "utf-8")
+            except UnicodeDecodeError:
+                continue
+
+    def _slot(self, index):
+        slot = bisect.bisect_left(self.utf8_indices, index)
+        if slot == len(self.utf8_indices) or self.utf8_indices[slot] != index:
+            raise KeyError(f"Constant pool entry {index} is not a Utf8 entry")
+        return slot
+
+    def get_utf8(self, index):
+        """Return the current bytes of the Utf8 entry at a constant pool index"""
+        if index in self.modified:
+            return self.modified[index]
+        slot = self._slot(index)
+        offset = self.utf8_offsets[slot]
+        return bytes(self.view[offset:offset + self.utf8_lengths[slot]])
+
+    def set_utf8(self, index, value):
+        """Replace the Utf8 entry at a constant pool index, returns True if it changed"""
+        slot = self._slot(index)
+        if len(value) > 0xFFFF:
+            raise ValueError(f"Utf8 entry {index} is too long ({len(value)} bytes)")
+        offset = self.utf8_offsets[slot]
+        if self.view[offset:offset + self.utf8_lengths[slot]] == value:
+            self.modified.pop(index, None)
+            return False
+        self.modified[index] = value
+        return True
+
+    def modify_utf8_strings(self, modifier_func):
+        """Modify UTF-8 strings in constant pool"""
+        for index, text in list(self.iter_utf8_strings()):
+            try:
+                self.set_utf8(index, modifier_func(text).encode("utf-8"))
+            except Exception:
+                pass
+
+    def build(self):
+        """Rebuild the class file, splicing modified strings into the original bytes"""
+        if not self.modified:
+            return bytes(self.data)
+
+        view = self.view
+        parts = []
+        prev = 0
+        for index in sorted(self.modified):
+            slot = self._slot(index)
+            offset = self.utf8_offsets[slot]
+            value = self.modified[index]
+            # Copy everything up to this entry's u2 length field
+            parts.append(view[prev:offset - 2])
+            parts.append(struct.pack(">H", len(value)))
+            parts.append(value)
+            prev = offset + self.utf8_lengths[slot]
+        parts.append(view[prev:])
+        
+        return b"".join(parts)
+
+
+def copy_zip_entry_raw(zin: zipfile.ZipFile, zout: zipfile.ZipFile, info: zipfile.ZipInfo):
+    """Copy an entry's compressed bytes from zin to zout without recompressing
+
+    zipfile has no public API for this, so we read the data straight after the
+    local file header and write a fresh header that points at it.
+    """
+    zin.fp.seek(info.header_offset)
+    local_header = zin.fp.read(30)
+    if local_header[:4] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+    name_len, extra_len = struct.unpack("<HH", local_header[26:30])
+    zin.fp.seek(info.header_offset + 30 + name_len + extra_len)
+
+    out_info = copy.copy(info)
+    # Sizes and CRC go in the local header, so no data descriptor follows the data
+    out_info.flag_bits &= ~0x08
+    out_info.extra = zipfile._strip_extra(info.extra, (1,))
+    out_info.header_offset = zout.fp.tell()
+    zout.fp.write(out_info.FileHeader(zip64=None))
+
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = zin.fp.read(min(remaining, ZIP_COPY_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated entry data for {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    zout.filelist.append(out_info)
+    zout.NameToInfo[out_info.filename] = out_info
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+
+def repack_jar(jar_path: str, output_jar: str, patched_entries: Dict[str, bytes]):
+    """Write output_jar with patched_entries replaced and everything else copied raw
+
+    Entry order and metadata (timestamps, attributes, comments, compression
+    method) are taken from the source jar. Patched entries the source jar
+    does not have are added at the end.
+    """
+    with zipfile.ZipFile(jar_path, 'r') as zin, zipfile.ZipFile(output_jar, 'w') as zout:
+        for info in zin.infolist():
+            patched = patched_entries.get(info.filename)
+            if patched is None:
+                copy_zip_entry_raw(zin, zout, info)
+            else:
+                zout.writestr(copy.copy(info), patched)
+        existing = set(zin.namelist())
+        for name, data in patched_entries.items():
+            if name not in existing:
+                zout.writestr(name, data, zipfile.ZIP_DEFLATED)
+        zout.comment = zin.comment
+
+
+def check_jar_archive(fileobj):
+    """Raise zipfile.BadZipFile unless fileobj holds a readable, non-empty zip central directory"""
+    fileobj.seek(0)
+    with zipfile.ZipFile(fileobj) as zin:
+        if not zin.infolist():
+            raise zipfile.BadZipFile("Archive is empty")
+    fileobj.seek(0)
+
+
+def list_class_entries(jar_path: str) -> List[str]:
+    """Return the names of all .class entries in a jar, in archive order
+
+    module-info and package-info carry no code, so they are left out.
+    """
+    with zipfile.ZipFile(jar_path, 'r') as zin:
+        return [
+            info.filename for info in zin.infolist()
+            if not info.is_dir() and info.filename.endswith('.class')
+            and info.filename.rsplit('/', 1)[-1] not in ('module-info.class', 'package-info.class')
+        ]
+
+
+def extract_class_strings(jar_path: str, class_names: List[str],
+                          include_annotations: bool = False) -> List[Tuple[str, List[Tuple[int, str]]]]:
+    """Parse a shard of class entries and return their decodable string literals
+
+    Returns [(class name, [(constant pool index, text), ...]), ...]. Only Utf8
+    entries behind CONSTANT_String (plus annotation string values when
+    include_annotations is set) that are not also names or descriptors are
+    returned. Classes that fail to parse are reported and left out.
+    """
+    results = []
+    with zipfile.ZipFile(jar_path, 'r') as zin:
+        for name in class_names:
+            try:
+                modifier = ClassFileModifier(zin.read(name))
+                modifier.parse()
+                modifier.analyze_references()
+                literals = modifier.literal_indices(include_annotations)
+                results.append((name, list(modifier.iter_utf8_strings(literals))))
+            except Exception as e:
+                print(f"Failed to parse {name}: {e}")
+    return results
+
+
+def patch_class_entries(jar_path: str, replacements: Dict[str, Dict[int, str]]) -> Dict[str, bytes]:
+    """Apply {class name: {constant pool index: new text}} to a shard of classes
+
+    Returns the rebuilt bytes of every class that actually changed.
+    """
+    patched = {}
+    with zipfile.ZipFile(jar_path, 'r') as zin:
+        for name, class_replacements in replacements.items():
+            try:
+                modifier = ClassFileModifier(zin.read(name))
+                modifier.parse()
+            except Exception as e:
+                print(f"Failed to parse {name}: {e}")
+                continue
+            
+            changed = False
+            for index, text in class_replacements.items():
+                try:
+                    if modifier.set_utf8(index, text.encode("utf-8")):
+                        changed = True
+                except (KeyError, ValueError) as e:
+                    print(f"Skipping translation in {name}: {e}")
+            
+            if changed:
+                patched[name] = modifier.build()
+    return patched
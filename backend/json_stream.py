@@ -0,0 +1,125 @@
+"""
+Incremental parser for the JSON array a model answers with
+Elements are decoded as soon as their closing delimiter arrives, so a streamed answer can be used
+while it is still being generated and everything before a truncation or a syntax error is kept
+"""
+import json
+import re
+from typing import List, Optional
+
+# Characters that end or escape a run of plain string content
+STRING_SPECIAL = re.compile(r'["\\]')
+WHITESPACE = " \t\r\n"
+
+
+class JSONArrayParser:
+    """Feed text chunks, get back the top-level array elements completed by each chunk
+
+    Anything before the first "[" (a ```json fence, a sentence) is skipped and
+    so is anything after the closing "]". After a malformed element the
+    parser stops and error holds the reason, elements decoded before it stay
+    valid. A trailing comma before "]" is tolerated.
+    """
+
+    def __init__(self):
+        self.text = ""  # Unconsumed input, starts at the current element
+        self.pos = 0  # Scan position in text
+        self.started = False
+        self.done = False
+        self.error: Optional[str] = None
+        self.count = 0  # Elements decoded so far
+        self.depth = 0  # Nesting inside the current element
+        self.in_string = False
+        self.escape = False
+        self.element_start: Optional[int] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.done or self.error is not None
+
+    def feed(self, chunk: str) -> list:
+        if self.finished or not chunk:
+            return []
+        self.text += chunk
+        elements = []
+        text = self.text
+        pos = self.pos
+
+        if not self.started:
+            start = text.find("[", pos)
+            if start < 0:
+                self.text, self.pos = "", 0
+                return []
+            self.started = True
+            pos = start + 1
+
+        length = len(text)
+        while pos < length:
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                    pos += 1
+                    continue
+                match = STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    pos = length
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    self.escape = True
+                else:
+                    self.in_string = False
+                continue
+
+            c = text[pos]
+            if c in WHITESPACE:
+                pass
+            elif c == '"':
+                self.in_string = True
+                if self.element_start is None:
+                    self.element_start = pos
+            elif c in "[{":
+                self.depth += 1
+                if self.element_start is None:
+                    self.element_start = pos
+            elif c in "]}" and self.depth:
+                self.depth -= 1
+            elif c == "]" or (c == "," and not self.depth):
+                if self.element_start is not None:
+                    if not self._decode(text[self.element_start:pos], elements):
+                        break
+                elif c == ",":
+                    self.error = f"empty element at position {self.count}"
+                    break
+                if c == "]":
+                    self.done = True
+                    break
+                # Drop the consumed prefix so long answers are not rescanned
+                text = text[pos + 1:]
+                length = len(text)
+                pos = -1
+            elif c == "}":
+                self.error = f"unbalanced '}}' in element {self.count}"
+                break
+            elif self.element_start is None:
+                self.element_start = pos
+            pos += 1
+
+        self.text = text
+        self.pos = pos
+        return elements
+
+    def _decode(self, raw: str, elements: list) -> bool:
+        try:
+            elements.append(json.loads(raw))
+        except ValueError as e:
+            self.error = f"element {self.count}: {e}"
+            return False
+        self.count += 1
+        self.element_start = None
+        return True
+
+
+def parse_json_array(text: str) -> List[object]:
+    """Every complete element of the first JSON array in text"""
+    return JSONArrayParser().feed(text)
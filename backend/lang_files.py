@@ -0,0 +1,137 @@
+"""
+Minecraft language files (assets/<namespace>/lang/<locale>.json or .lang) inside mod jars
+Lang strings are indexed like class strings, as (entry name, translation key) locations,
+so the same string index, review and translation map cover both and shared text is translated once
+"""
+import json
+import os
+import re
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+LANG_ENTRY_PATTERN = re.compile(r"^assets/[^/]+/lang/([^/]+)\.(json|lang)$")
+RESOURCE_PACK_FORMAT = 15  # pack.mcmeta format written into resource packs (Minecraft 1.20)
+
+
+def is_lang_entry(name: str) -> bool:
+    return LANG_ENTRY_PATTERN.match(name) is not None
+
+
+def locale_name(locale: str, like: str) -> str:
+    """Spell a locale the way an existing file name does, 1.12 and older use en_US.lang"""
+    language, _, region = locale.lower().partition("_")
+    if region and like != like.lower():
+        return f"{language}_{region.upper()}"
+    return locale.lower()
+
+
+def target_entry(source_entry: str, target_lang: str) -> str:
+    """Entry name of the target language file next to a source language file"""
+    directory, file_name = source_entry.rsplit("/", 1)
+    stem, ext = os.path.splitext(file_name)
+    return f"{directory}/{locale_name(target_lang, stem)}{ext}"
+
+
+def parse_lang(data: bytes, entry_name: str) -> Dict[str, object]:
+    """{translation key: value} of a lang file in file order, raises ValueError when it is unreadable"""
+    text = data.decode("utf-8-sig")
+    if entry_name.endswith(".json"):
+        entries = json.loads(text)
+        if not isinstance(entries, dict):
+            raise ValueError("lang file must contain a JSON object")
+        return entries
+    entries = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or line.startswith("//"):
+            continue
+        key, sep, value = line.partition("=")
+        if sep and key.strip():
+            entries[key.strip()] = value.strip()
+    return entries
+
+
+def render_lang(entries: Dict[str, object], entry_name: str) -> bytes:
+    if entry_name.endswith(".json"):
+        return (json.dumps(entries, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+    return "".join(f"{key}={value}\n" for key, value in entries.items()).encode("utf-8")
+
+
+def find_lang_entries(jar_path: str, source_lang: str, entries: Optional[List[str]] = None) -> List[str]:
+    """Source language files in a jar, in archive order, optionally limited to the given entry names"""
+    with zipfile.ZipFile(jar_path, "r") as zin:
+        names = [
+            info.filename for info in zin.infolist()
+            if not info.is_dir() and (match := LANG_ENTRY_PATTERN.match(info.filename))
+            and match.group(1).lower() == source_lang.lower()
+        ]
+    if entries:
+        wanted = set(entries)
+        names = [name for name in names if name in wanted]
+    return names
+
+
+def read_entry(zin: zipfile.ZipFile, name: str) -> Optional[Dict[str, object]]:
+    """Parsed lang file, None when it is missing or unreadable"""
+    try:
+        return parse_lang(zin.read(name), name)
+    except KeyError:
+        return None
+    except (ValueError, UnicodeDecodeError) as e:
+        print(f"Skipping unreadable lang file {name}: {e}")
+        return None
+
+
+def extract_lang_strings(jar_path: str, source_lang: str, target_lang: str,
+                         entries: Optional[List[str]] = None) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """[(source entry name, [(translation key, text), ...]), ...], the same shape as extract_class_strings
+
+    Keys the jar already translates in its own target language file are
+    left out, the mod author's translation wins.
+    """
+    lang_strings = []
+    with zipfile.ZipFile(jar_path, "r") as zin:
+        for name in find_lang_entries(jar_path, source_lang, entries):
+            source = read_entry(zin, name)
+            if not source:
+                continue
+            existing = read_entry(zin, target_entry(name, target_lang)) or {}
+            lang_strings.append((name, [
+                (key, value) for key, value in source.items()
+                if isinstance(value, str) and value and key not in existing
+            ]))
+    return lang_strings
+
+
+def build_lang_files(jar_path: str, replacements: Dict[str, Dict[str, str]], target_lang: str) -> Dict[str, bytes]:
+    """Target language files for {source entry name: {translation key: translated}}
+
+    Each file keeps the source file's key order, existing target language
+    entries are kept and keys without a translation keep the source text.
+    """
+    files = {}
+    with zipfile.ZipFile(jar_path, "r") as zin:
+        for name, translated in replacements.items():
+            source = read_entry(zin, name) or {}
+            output_name = target_entry(name, target_lang)
+            existing = read_entry(zin, output_name) or {}
+            merged = {key: existing.get(key, translated.get(key, value)) for key, value in source.items()}
+            for key, value in existing.items():
+                merged.setdefault(key, value)
+            files[output_name] = render_lang(merged, output_name)
+    return files
+
+
+def resource_pack_name(jar_name: str, target_lang: str) -> str:
+    stem = os.path.splitext(os.path.basename(jar_name))[0]
+    return f"{stem}_{target_lang}_resources.zip"
+
+
+def write_resource_pack(output_path: str, files: Dict[str, bytes], description: str,
+                        pack_format: int = RESOURCE_PACK_FORMAT):
+    """Write a resource pack holding the given assets/ files"""
+    mcmeta = {"pack": {"pack_format": pack_format, "description": description}}
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+        zout.writestr("pack.mcmeta", json.dumps(mcmeta, ensure_ascii=False, indent=2) + "\n")
+        for name, data in files.items():
+            zout.writestr(name, data)
@@ -1,61 +1,193 @@
 import asyncio
+import functools
+import gzip
+import hashlib
 import json
+import multiprocessing
 import os
 import shutil
-import struct
-import zipfile
 import aiofiles
 import time
-from typing import List, Dict
+import uuid
+import zipfile
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
 import uvicorn
 
-from ai_translator import get_translator
+from ai_translator import get_translator, http_clients
+from batch_retry import BatchRetrier
+from bytecode import check_jar_archive, extract_class_strings, list_class_entries, patch_class_entries, repack_jar
+from lang_files import build_lang_files, extract_lang_strings, find_lang_entries, is_lang_entry, resource_pack_name, write_resource_pack
+import metrics
+from metrics import BYTES_PROCESSED, EVENT_STREAMS, INFLIGHT_BATCHES, STAGE_SECONDS, STRINGS_PROCESSED, TASKS_FINISHED
+from modpack import extract_pack_jars, pack_digest, qualify_class, split_class, split_replacements, write_pack_archive
+from provider_pool import HealthRegistry, LatencyWindow, ProviderPool, parse_provider_keys
+from scheduler import AIMDConcurrencyLimiter, FairTaskQueue, run_sliding_window
+from result_cache import ResultCache, cache_key
+from string_filter import should_translate_lang
+from task_events import TaskEventHub
+from task_store import ACTIVE_STATUSES, REVIEW_SORTS, TERMINAL_STATUSES, TaskStore
+from translation_memory import TranslationMemory
+from usage_stats import UsageStats
 
 # Configuration
 UPLOAD_DIR = "uploads"
 OUTPUT_DIR = "outputs"
 STATS_FILE = "stats.json"
+STATS_FLUSH_INTERVAL = 30  # Seconds between writes of changed usage counters
+STATS_KEEP_DAYS = 90  # Per-day usage buckets kept in stats.json
 QUEUE_MAX_SIZE = 20
-MAX_CONCURRENT_BATCHES = 5  # Number of translation batches to process concurrently
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read per chunk when storing uploads
+WORKER_COUNT = 4  # Jobs processed at the same time
+MAX_ACTIVE_JOBS_PER_KEY = 1  # Jobs of one API key running at once
+MAX_ACTIVE_JOBS_PER_PROVIDER = 3  # Jobs of one provider running at once
+DEFAULT_JOB_SECONDS = 120  # Assumed job duration until real jobs have finished
+MAX_CONCURRENT_BATCHES = 5  # Number of translation batches to start with concurrently
+MAX_CONCURRENT_BATCHES_LIMIT = 16  # Upper bound while concurrency ramps up on a healthy provider
+PROVIDER_STREAMING = True  # Read provider answers as they are generated, progress then moves per string
+RETRY_MAX_ATTEMPTS = 5  # Requests a string may fail in before it is reported as failed
+RETRY_SPLIT_AFTER = 2  # Failed requests in a row before a group of strings is split in half
+RETRY_BASE_DELAY = 1.0  # Seconds before the first retry, doubled per failure with full jitter, Retry-After wins when longer
+RETRY_MAX_DELAY = 30.0
+FAILURE_REPORT_LIMIT = 100  # Failed strings listed with their reason in the task status
+HEDGE_PERCENTILE = None  # e.g. 0.95: batches slower than this share of recent answers get a duplicate request, None turns hedging off
+HEDGE_MIN_SAMPLES = 20  # Answers of a provider seen before its batches are hedged
+HEDGE_MIN_DELAY = 2.0  # Seconds a batch always gets before it is hedged
+HEDGE_TO_SECONDARY = True  # Send the duplicate to a failover provider when one is healthy, otherwise to the same provider
+HEDGE_BUDGET = 0.1  # Share of a job's strings that may be sent twice by hedging
+# Secondary providers as "Claude:<key>,Gemini:<key>", batches move to them while the job's provider keeps failing
+FAILOVER_PROVIDERS = parse_provider_keys(os.environ.get("XTMC_FAILOVER_PROVIDERS", ""))
+FAILOVER_ERROR_RATE = 0.5  # Share of failed requests among a provider's recent ones that makes it rest
+FAILOVER_WINDOW = 20  # Recent requests the error rate is taken over
+FAILOVER_MIN_REQUESTS = 5
+FAILOVER_COOLDOWN = 60  # Seconds a failing provider is skipped before it gets requests again
+FAILOVER_BUDGET = 1.0  # Share of a job's strings that may go to secondary providers
+PROCESS_POOL_WORKERS = os.cpu_count() or 1  # Processes for class parsing/patching, 0 runs them in a thread
+CLASS_SHARD_SIZE = 500  # Class files handled per process pool job
+REVIEW_INDEX_MAX_LOCATIONS = 2000000  # String locations kept in memory for apply, older indexes go to disk
+RESULT_CACHE_DIR = "cache"
+RESULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # Disk budget for cached reviews and translated jars
+TRANSLATION_MEMORY_FILE = "translation_memory.db"
+TRANSLATION_MEMORY_MAX_ENTRIES = 500000  # Least recently used entries beyond this are evicted
+TRANSLATION_MEMORY_MAX_AGE = 30 * 24 * 3600  # Entries unused for 30 days are evicted
+TASK_DB_FILE = "tasks.db"
+TASK_TTL = 24 * 3600  # Finished tasks are forgotten a day after their last update
+TASK_STORE_MAX_TASKS = 5000  # Oldest finished tasks beyond this are evicted
+TASK_LIST_MAX_LIMIT = 200
+REVIEW_PAGE_MAX_LIMIT = 1000  # Translation pairs per review page
+GZIP_MINIMUM_SIZE = 1024  # Smaller responses are sent uncompressed
+MODPACK_MAX_JARS = 500  # Jars accepted in one modpack task
+MODPACK_MAX_BYTES = 4 * 1024 * 1024 * 1024  # Uncompressed size of the jars inside an uploaded modpack zip
+MODPACK_OUTPUT_NAME = "modpack.zip"
+LANG_OUTPUTS = ("jar", "resourcepack")  # Lang tasks add the translated files to the jar or write a resource pack
+EVENT_HISTORY_SIZE = 256  # Events per task kept for clients resuming with Last-Event-ID
+EVENT_HEARTBEAT_SECONDS = 15  # Idle event streams send a keepalive (or queue position) this often
+
+# Task storage, survives restarts
+task_store = TaskStore(TASK_DB_FILE, TASK_TTL, TASK_STORE_MAX_TASKS)
+task_counter = task_store.next_counter("bytecode")
+modpack_counter = task_store.next_counter("modpack")
+lang_counter = task_store.next_counter("lang")
+
+# Latency and error rate of recent requests per provider, shared by all jobs for hedging and failover
+provider_latency = LatencyWindow()
+provider_health = HealthRegistry(FAILOVER_WINDOW, FAILOVER_ERROR_RATE, FAILOVER_MIN_REQUESTS, FAILOVER_COOLDOWN)
+
+# Progress pushed to clients over server-sent events
+task_events = TaskEventHub(EVENT_HISTORY_SIZE, EVENT_HEARTBEAT_SECONDS)
+STATE_EVENT_FIELDS = (
+    "status", "progress", "error", "total_strings", "changed_strings", "failed_strings", "failure_reasons", "from_cache",
+)
+PROGRESS_EVENT_FIELDS = ("progress", "current_batch", "total_batches", "strings_done", "strings_total", "eta_seconds")
+
+def event_data(record, fields) -> dict:
+    return {field: record[field] for field in fields if field in record}
 
-# Task storage
-bytecode_tasks = {}
-task_counter = 0
+# Every saved state change becomes a "state" event
+task_store.listeners.append(
+    lambda task_id, record: task_events.publish(task_id, "state", event_data(record, STATE_EVENT_FIELDS))
+)
 
 # Ensure directories exist
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Stats management
-def load_stats():
-    if not os.path.exists(STATS_FILE):
-        return {"visits": 0, "usage": 0}
-    with open(STATS_FILE, "r") as f:
-        return json.load(f)
+# Translations we already paid for, reused across tasks
+translation_memory = TranslationMemory(
+    TRANSLATION_MEMORY_FILE,
+    TRANSLATION_MEMORY_MAX_ENTRIES,
+    TRANSLATION_MEMORY_MAX_AGE
+)
+
+# Whole-jar results keyed by (jar sha256, target_lang, ai_model)
+result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+
+# Stats management, counted in memory and written by periodic_stats_flush
+usage_stats = UsageStats(STATS_FILE, STATS_KEEP_DAYS)
+
+def check_provider(ai_model: str, api_key: str):
+    """400 for a missing API key or an unknown provider, so neither reaches the queue or the usage stats"""
+    if not api_key:
+        raise HTTPException(status_code=400, detail="API key is required")
+    try:
+        get_translator(ai_model, api_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def increment_stat(key, provider: str = None):
+    usage_stats.increment(key, provider)
+
+async def periodic_stats_flush():
+    """Write changed usage counters to disk every STATS_FLUSH_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(STATS_FLUSH_INTERVAL)
+        await asyncio.to_thread(usage_stats.flush)
+
+# Global Queue, shared fairly between providers and API keys
+processing_queue = FairTaskQueue(
+    QUEUE_MAX_SIZE,
+    max_active_per_owner=MAX_ACTIVE_JOBS_PER_KEY,
+    max_active_per_provider=MAX_ACTIVE_JOBS_PER_PROVIDER
+)
+recent_job_seconds = deque(maxlen=20)  # Durations of recently finished jobs, for wait estimates
+metrics.registry.gauge("xtmc_queue_depth", "Jobs waiting in the processing queue", function=processing_queue.qsize)
+metrics.registry.gauge("xtmc_active_jobs", "Jobs currently held by a worker", function=processing_queue.active_count)
 
-def save_stats(stats):
-    with open(STATS_FILE, "w") as f:
-        json.dump(stats, f)
+def queue_owner(api_key: str) -> str:
+    """Queue owner for an API key, the key itself is not kept in the queue"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
 
-def increment_stat(key):
-    stats = load_stats()
-    stats[key] = stats.get(key, 0) + 1
-    save_stats(stats)
+def get_queue_estimate(task_id: str):
+    """Return (queue position, estimated wait in seconds) for a queued task, or None"""
+    order = [item[0] for item in processing_queue.dispatch_order()]
+    if task_id not in order:
+        return None
+    position = order.index(task_id)
+    avg_job_seconds = sum(recent_job_seconds) / len(recent_job_seconds) if recent_job_seconds else DEFAULT_JOB_SECONDS
+    # Jobs ahead of us (running or waiting) are worked off WORKER_COUNT at a time
+    waves = (position + processing_queue.active_count()) // WORKER_COUNT
+    return position + 1, int(waves * avg_job_seconds)
 
-# Global Queue
-processing_queue = asyncio.Queue(maxsize=QUEUE_MAX_SIZE)
+def queue_info(task_id: str) -> Optional[dict]:
+    estimate = get_queue_estimate(task_id)
+    if not estimate:
+        return None
+    return {"queue_position": estimate[0], "estimated_wait_seconds": estimate[1]}
 
 # Cleanup settings
 CLEANUP_INTERVAL = 3600  # Check every hour
 MAX_FILE_AGE = 3600  # Delete files older than 2 hours
 
 def cleanup_old_files():
-    """Clean up old files from uploads and outputs directories"""
+    """Clean up old files from uploads and outputs directories, blocks on disk so run it in a thread"""
     import time
     current_time = time.time()
     cleaned_count = 0
@@ -80,405 +212,834 @@ def cleanup_old_files():
     if cleaned_count > 0:
         print(f"Cleanup completed: removed {cleaned_count} old files")
     
+    # The result cache is bounded by size instead of age
+    result_cache.evict()
+    
     return cleaned_count
 
+async def evict_finished_tasks():
+    """Forget expired finished tasks, their event channels and review indexes"""
+    expired_tasks = await task_store.evict()
+    if expired_tasks:
+        print(f"Forgot {expired_tasks} finished tasks")
+    task_events.prune(lambda task_id: task_id in task_store)
+    # Spilled indexes went with the task rows, drop the ones still in memory
+    for task_id in [task_id for task_id in review_indexes if task_id not in task_store]:
+        review_indexes.pop(task_id)
+        review_index_sizes.pop(task_id)
+
 async def periodic_cleanup():
-    """Periodically clean up old files"""
+    """Periodically clean up old files, finished tasks and stale translation memory entries"""
     while True:
         await asyncio.sleep(CLEANUP_INTERVAL)
-        cleanup_old_files()
-
-# Java Class File Constants
-CONSTANT_Utf8 = 1
-CONSTANT_Integer = 3
-CONSTANT_Float = 4
-CONSTANT_Long = 5
-CONSTANT_Double = 6
-CONSTANT_Class = 7
-CONSTANT_String = 8
-CONSTANT_Fieldref = 9
-CONSTANT_Methodref = 10
-CONSTANT_InterfaceMethodref = 11
-CONSTANT_NameAndType = 12
-CONSTANT_MethodHandle = 15
-CONSTANT_MethodType = 16
-CONSTANT_InvokeDynamic = 18
-
-
-class ClassFileModifier:
-    def __init__(self, data):
-        self.data = data
-        self.pos = 0
-        self.constant_pool = []
-        self.rest_of_file = b""
-
-    def read_u1(self):
-        val = self.data[self.pos]
-        self.pos += 1
-        return val
-
-    def read_u2(self):
-        val = struct.unpack(">H", self.data[self.pos:self.pos+2])[0]
-        self.pos += 2
-        return val
-
-    def read_u4(self):
-        val = struct.unpack(">I", self.data[self.pos:self.pos+4])[0]
-        self.pos += 4
-        return val
-
-    def read_bytes(self, n):
-        val = self.data[self.pos:self.pos+n]
-        self.pos += n
-        return val
-
-    def parse(self):
-        magic = self.read_u4()
-        if magic != 0xCAFEBABE:
-            raise ValueError("Not a valid Java class file")
-
-        minor_version = self.read_u2()
-        major_version = self.read_u2()
-        constant_pool_count = self.read_u2()
-
-        self.constant_pool = [None]
-
-        i = 1
-        while i < constant_pool_count:
-            tag = self.read_u1()
-            
-            if tag == CONSTANT_Utf8:
-                length = self.read_u2()
-                bytes_val = self.read_bytes(length)
-                self.constant_pool.append({"tag": tag, "bytes": bytes_val})
-            elif tag in [CONSTANT_Integer, CONSTANT_Float]:
-                val = self.read_u4()
-                self.constant_pool.append({"tag": tag, "value": val})
-            elif tag in [CONSTANT_Long, CONSTANT_Double]:
-                val = self.read_bytes(8)
-                self.constant_pool.append({"tag": tag, "value": val})
-                self.constant_pool.append(None)
-                i += 1
-            elif tag in [CONSTANT_Class, CONSTANT_String, CONSTANT_MethodType]:
-                index = self.read_u2()
-                self.constant_pool.append({"tag": tag, "index": index})
-            elif tag in [CONSTANT_Fieldref, CONSTANT_Methodref, CONSTANT_InterfaceMethodref, CONSTANT_NameAndType]:
-                index1 = self.read_u2()
-                index2 = self.read_u2()
-                self.constant_pool.append({"tag": tag, "index1": index1, "index2": index2})
-            elif tag == CONSTANT_MethodHandle:
-                ref_kind = self.read_u1()
-                ref_index = self.read_u2()
-                self.constant_pool.append({"tag": tag, "ref_kind": ref_kind, "ref_index": ref_index})
-            elif tag == CONSTANT_InvokeDynamic:
-                bootstrap_method_attr_index = self.read_u2()
-                name_and_type_index = self.read_u2()
-                self.constant_pool.append({
-                    "tag": tag,
-                    "bootstrap_method_attr_index": bootstrap_method_attr_index,
-                    "name_and_type_index": name_and_type_index
-                })
-            else:
-                raise ValueError(f"Unknown constant pool tag: {tag}")
-            
-            i += 1
-
-        self.rest_of_file = self.data[self.pos:]
-
-    def modify_utf8_strings(self, modifier_func):
-        """Modify UTF-8 strings in constant pool"""
-        for i, entry in enumerate(self.constant_pool):
-            if entry and entry.get("tag") == CONSTANT_Utf8:
-                try:
-                    original_str = entry["bytes"].decode("utf-8")
-                    modified_str = modifier_func(original_str)
-                    entry["bytes"] = modified_str.encode("utf-8")
-                except:
-                    pass
-
-    def build(self):
-        """Rebuild the class file"""
-        output = bytearray()
+        await asyncio.to_thread(cleanup_old_files)
+        await evict_finished_tasks()
+        await asyncio.to_thread(translation_memory.evict)
+
+async def save_upload(file: UploadFile):
+    """Stream an uploaded jar into the content-addressed upload store
+    
+    The archive's central directory is checked on the spooled upload before
+    anything is written, and the SHA-256 is computed while copying. Returns
+    (file location, sha256); an identical jar that is already stored is
+    reused instead of writing a second copy.
+    """
+    head = await file.read(4)
+    if head != b"PK\x03\x04":
+        raise HTTPException(status_code=400, detail="Uploaded file is not a JAR archive")
+    try:
+        await asyncio.to_thread(check_jar_archive, file.file)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Corrupt JAR archive: {e}")
+    await file.seek(0)
+    
+    sha256 = hashlib.sha256()
+    temp_location = os.path.join(UPLOAD_DIR, f".upload_{uuid.uuid4().hex}")
+    try:
+        async with aiofiles.open(temp_location, 'wb') as out_file:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                await out_file.write(chunk)
         
-        # Magic number
-        output.extend(struct.pack(">I", 0xCAFEBABE))
+        digest = sha256.hexdigest()
+        BYTES_PROCESSED.inc(os.path.getsize(temp_location), direction="upload")
+        file_location = os.path.join(UPLOAD_DIR, f"{digest}.jar")
+        if os.path.exists(file_location):
+            # Same jar uploaded before, keep that copy and refresh its age for cleanup
+            os.remove(temp_location)
+            os.utime(file_location)
+            print(f"Reusing stored upload {digest[:12]} for {file.filename}")
+        else:
+            os.replace(temp_location, file_location)
+    finally:
+        if os.path.exists(temp_location):
+            os.remove(temp_location)
+    
+    return file_location, digest
+
+
+# Process pool for CPU-bound class file work
+process_pool = None
+
+def get_process_pool():
+    """Get the shared process pool, creating it on first use"""
+    global process_pool
+    if process_pool is None:
+        process_pool = ProcessPoolExecutor(
+            max_workers=PROCESS_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return process_pool
+
+async def run_cpu_bound(func, *args):
+    """Run a CPU-bound function off the event loop"""
+    if PROCESS_POOL_WORKERS <= 0:
+        return await asyncio.to_thread(func, *args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
+
+def shard(items, size):
+    """Split a list into consecutive chunks of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def build_string_index(class_strings, string_index=None):
+    """Map each unique string to the (class name, constant pool index) locations it occurs at
+
+    The occurrence count of a string is the length of its location list.
+    Locations are added to string_index when one is given.
+    """
+    if string_index is None:
+        string_index = {}
+    for name, strings_in_class in class_strings:
+        for cp_index, text in strings_in_class:
+            locations = string_index.get(text)
+            if locations is None:
+                string_index[text] = locations = []
+            locations.append((name, cp_index))
+    return string_index
+
+def build_replacements(string_index, translation_map):
+    """Turn {original: translated} into {class name: {constant pool index: translated}}"""
+    replacements = {}
+    for original, translated in translation_map.items():
+        if translated == original:
+            continue
+        for name, cp_index in string_index.get(original, ()):
+            replacements.setdefault(name, {})[cp_index] = translated
+    return replacements
+
+
+async def index_jar_strings(jar_path: str, include_annotations: bool = False):
+    """Parse every class in a jar on the process pool and index its unique string literals"""
+    class_names = await asyncio.to_thread(list_class_entries, jar_path)
+    shard_results = await asyncio.gather(*[
+        run_cpu_bound(extract_class_strings, jar_path, names, include_annotations)
+        for names in shard(class_names, CLASS_SHARD_SIZE)
+    ])
+    
+    string_index = build_string_index(
+        class_strings for shard_result in shard_results for class_strings in shard_result
+    )
+    print(f"Found {len(string_index)} unique string literals in {len(class_names)} classes")
+    return string_index
+
+
+# Review-phase string indexes kept for the apply step, oldest spilled to the task store
+review_indexes = OrderedDict()  # task_id -> {text: [(class name, constant pool index), ...]}
+review_index_sizes = {}  # task_id -> number of locations
+
+def encode_string_index(string_index):
+    """JSON-friendly form of a string index with class names stored once"""
+    class_ids = {}
+    strings = {}
+    for text, locations in string_index.items():
+        flat = []
+        for name, cp_index in locations:
+            flat.append(class_ids.setdefault(name, len(class_ids)))
+            flat.append(cp_index)
+        strings[text] = flat
+    return {"classes": list(class_ids), "strings": strings}
+
+def decode_string_index(data):
+    classes = data["classes"]
+    return {
+        text: [(classes[flat[i]], flat[i + 1]) for i in range(0, len(flat), 2)]
+        for text, flat in data["strings"].items()
+    }
+
+def compress_review_index(string_index) -> bytes:
+    return gzip.compress(json.dumps(encode_string_index(string_index), ensure_ascii=False).encode("utf-8"))
+
+def decompress_review_index(data: bytes):
+    return decode_string_index(json.loads(gzip.decompress(data)))
+
+async def save_review_index(task_id: str, string_index):
+    review_indexes[task_id] = string_index
+    review_index_sizes[task_id] = sum(len(locations) for locations in string_index.values())
+    
+    # Spill the oldest indexes to the task store once the in-memory cap is exceeded, they live as long as the task
+    while len(review_indexes) > 1 and sum(review_index_sizes.values()) > REVIEW_INDEX_MAX_LOCATIONS:
+        old_task_id, old_index = review_indexes.popitem(last=False)
+        del review_index_sizes[old_task_id]
+        await task_store.set_index(old_task_id, await asyncio.to_thread(compress_review_index, old_index))
+
+async def load_review_index(task_id: str):
+    """Return the review index of a task, or None if it is gone"""
+    if task_id in review_indexes:
+        return review_indexes[task_id]
+    data = await task_store.get_index(task_id)
+    if data is not None:
+        try:
+            return await asyncio.to_thread(decompress_review_index, data)
+        except (OSError, EOFError, ValueError) as e:
+            print(f"Failed to read review index for {task_id}: {e}")
+    return None
+
+async def discard_review_index(task_id: str):
+    review_indexes.pop(task_id, None)
+    review_index_sizes.pop(task_id, None)
+    await task_store.delete_index(task_id)
+
+
+def record_stage(task_id: str, stage: str, started: float) -> float:
+    """Store how long a pipeline stage took on the task record, returns the start of the next stage"""
+    now = time.perf_counter()
+    STAGE_SECONDS.observe(now - started, stage=stage)
+    if task_id and task_id in task_store:
+        task_store[task_id].setdefault("stage_seconds", {})[stage] = round(now - started, 4)
+    return now
+
+
+def output_path_for(jar_path: str, task_id: str = None) -> str:
+    """Output location of a translated jar, uploads are shared between tasks so it is named per task"""
+    output_name = f"{task_id}_{os.path.basename(jar_path)}" if task_id else os.path.basename(jar_path)
+    return os.path.join(OUTPUT_DIR, f"translated_{output_name}")
+
+
+async def translate_strings(all_strings, translator, target_lang: str, task_id: str = None, stage_start: float = None, pack_progress=None, lang_texts=frozenset()):
+    """Filter strings, reuse the translation memory and translate the rest on the provider
+
+    Strings in lang_texts come from lang files and only need to contain words.
+    Returns (candidates, translation_map, start of the next stage).
+    """
+    # Filter first so batches only carry strings that are worth translating
+    candidates = [
+        text for text in all_strings
+        if (text in lang_texts and should_translate_lang(text)) or translator._should_translate(text)
+    ]
+    print(f"{len(candidates)} of {len(all_strings)} unique strings need translation")
+    STRINGS_PROCESSED.inc(len(all_strings), outcome="extracted")
+    STRINGS_PROCESSED.inc(len(candidates), outcome="candidate")
+    stage_start = record_stage(task_id, "filter", stage_start)
+    
+    # Reuse earlier translations from the translation memory
+    cached_translations = await asyncio.to_thread(
+        translation_memory.lookup, candidates, target_lang, translator.cache_key
+    )
+    to_translate = [text for text in candidates if text not in cached_translations]
+    cache_hits = len(candidates) - len(to_translate)
+    print(f"Translation memory: {cache_hits} hits, {len(to_translate)} misses")
+    STRINGS_PROCESSED.inc(cache_hits, outcome="memory_hit")
+    stage_start = record_stage(task_id, "memory", stage_start)
+    if task_id and task_id in task_store:
+        task_store[task_id]["cache_hits"] = cache_hits
+        task_store[task_id]["cache_misses"] = len(to_translate)
+        task_store[task_id]["cache_hit_ratio"] = round(cache_hits / len(candidates), 3) if candidates else 0
+    if pack_progress:
+        pack_progress.start(candidates, to_translate)
+    
+    translated_all = []
+    sources = {}  # text -> cache key of the provider whose translation was kept
+    failures = []
+    if to_translate:
+        # Pack into evenly sized batches within the provider's token limits
+        batches = translator.pack_batches(to_translate)
+        total_batches = len(batches)
         
-        # Version
-        output.extend(self.data[4:8])
+        # Update total batches info and start time
+        start_time = time.time()
+        if task_id and task_id in task_store:
+            task_store[task_id]["total_batches"] = total_batches
+            task_store[task_id]["strings_total"] = len(to_translate)
+            task_store[task_id]["strings_done"] = 0
+            task_store[task_id]["start_time"] = start_time
+            task_events.publish(task_id, "progress", event_data(task_store[task_id], PROGRESS_EVENT_FIELDS))
         
-        # Constant pool count
-        output.extend(struct.pack(">H", len(self.constant_pool)))
+        # Sliding-window translation, concurrency adapts to provider health
+        limiter = AIMDConcurrencyLimiter(MAX_CONCURRENT_BATCHES, maximum=MAX_CONCURRENT_BATCHES_LIMIT)
+        # Slow batches are hedged and failing providers skipped, within the duplicate spend budgets
+        pool = ProviderPool(
+            translator, failover_translators(translator), len(to_translate), provider_latency,
+            HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY, HEDGE_TO_SECONDARY, HEDGE_BUDGET, FAILOVER_BUDGET,
+            provider_health
+        )
+        # Missing and rejected strings are sent again, errors still slow the whole window down
+        retrier = BatchRetrier(
+            RETRY_MAX_ATTEMPTS, RETRY_SPLIT_AFTER, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+            on_error=limiter.record_failure
+        )
+        completed_batches = 0
+        completed_strings = 0
         
-        # Constant pool
-        for entry in self.constant_pool[1:]:
-            if entry is None:
-                continue
-                
-            tag = entry["tag"]
-            output.append(tag)
+        print(f"Starting parallel translation: {total_batches} batches, {limiter.window} concurrent")
+        
+        def update_progress(force: bool = False):
+            """Progress and ETA by strings, the event goes out when the percentage moves or a batch ends"""
+            if not (task_id and task_id in task_store):
+                return
+            task = task_store[task_id]
+            previous = task.get("progress")
+            elapsed_time = time.time() - start_time
+            task["current_batch"] = completed_batches
+            task["strings_done"] = completed_strings
+            task["progress"] = int((completed_strings / len(to_translate)) * 100)
+            task["eta_seconds"] = int(elapsed_time / completed_strings * (len(to_translate) - completed_strings)) if completed_strings else 0
+            if force or task["progress"] != previous:
+                task_events.publish(task_id, "progress", event_data(task, PROGRESS_EVENT_FIELDS))
+        
+        async def translate_with_progress(batch):
+            nonlocal completed_batches, completed_strings
+            received = 0
+            
+            def string_done(index, translated):
+                nonlocal received, completed_strings
+                # None takes back an accepted string of a misaligned answer
+                step = 1 if translated is not None else -1
+                received += step
+                completed_strings += step
+                update_progress()
             
-            if tag == CONSTANT_Utf8:
-                bytes_val = entry["bytes"]
-                output.extend(struct.pack(">H", len(bytes_val)))
-                output.extend(bytes_val)
-            elif tag in [CONSTANT_Integer, CONSTANT_Float]:
-                output.extend(struct.pack(">I", entry["value"]))
-            elif tag in [CONSTANT_Long, CONSTANT_Double]:
-                output.extend(entry["value"])
-            elif tag in [CONSTANT_Class, CONSTANT_String, CONSTANT_MethodType]:
-                output.extend(struct.pack(">H", entry["index"]))
-            elif tag in [CONSTANT_Fieldref, CONSTANT_Methodref, CONSTANT_InterfaceMethodref, CONSTANT_NameAndType]:
-                output.extend(struct.pack(">H", entry["index1"]))
-                output.extend(struct.pack(">H", entry["index2"]))
-            elif tag == CONSTANT_MethodHandle:
-                output.append(entry["ref_kind"])
-                output.extend(struct.pack(">H", entry["ref_index"]))
-            elif tag == CONSTANT_InvokeDynamic:
-                output.extend(struct.pack(">H", entry["bootstrap_method_attr_index"]))
-                output.extend(struct.pack(">H", entry["name_and_type_index"]))
+            INFLIGHT_BATCHES.inc()
+            try:
+                return await retrier.translate(pool, batch, target_lang, on_item=string_done)
+            finally:
+                INFLIGHT_BATCHES.dec()
+                completed_batches += 1
+                # Strings the answer did not cover are finished too, they stay untranslated
+                completed_strings += len(batch) - received
+                update_progress(force=True)
+                if pack_progress:
+                    pack_progress.batch_done(batch)
+                
+                print(f"Completed batch {completed_batches}/{total_batches} (concurrency {limiter.window})")
         
-        # Rest of file
-        output.extend(self.rest_of_file)
+        results = await run_sliding_window(
+            [functools.partial(translate_with_progress, batch) for batch in batches],
+            limiter
+        )
         
-        return bytes(output)
+        # Results are in batch order, strings that failed keep their original text
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                print(f"Batch translation error: {result}")
+                failures.extend((text, str(result)) for text in batch)
+                translated_all.extend(batch)
+            else:
+                translated, failed = result
+                failures.extend((batch[index], reason) for index, reason in sorted(failed.items()))
+                translated_all.extend(translated)
+        STRINGS_PROCESSED.inc(len(failures), outcome="failed")
+        if task_id and task_id in task_store:
+            task_store[task_id]["provider_requests"] = dict(pool.requests)
+            task_store[task_id]["hedged_requests"] = pool.hedges_sent
+            task_store[task_id]["hedges_won"] = pool.hedges_won
+        sources = pool.sources
+    
+    # Also on a run served from the translation memory, so the task always reports its failed strings
+    record_failures(task_id, failures)
+    
+    STRINGS_PROCESSED.inc(sum(1 for orig, trans in zip(to_translate, translated_all) if orig != trans), outcome="translated")
+    
+    # Build translation map
+    translation_map = dict(cached_translations)
+    translation_map.update(zip(to_translate, translated_all))
+    
+    # Failed batches come back untranslated, so only changed strings are
+    # known to be real translations worth remembering, under the provider that made them
+    remembered = {}
+    for orig, trans in zip(to_translate, translated_all):
+        if orig != trans:
+            remembered.setdefault(sources.get(orig, translator.cache_key), []).append((orig, trans))
+    for source_key, pairs in remembered.items():
+        await asyncio.to_thread(translation_memory.store, pairs, target_lang, source_key)
+    stage_start = record_stage(task_id, "translate", stage_start)
+    return candidates, translation_map, stage_start
+
+
+def failover_translators(translator) -> list:
+    """Translators for the configured secondary providers, other than the job's own provider"""
+    secondaries = [get_translator(ai_model, api_key, PROVIDER_STREAMING) for ai_model, api_key in FAILOVER_PROVIDERS]
+    return [secondary for secondary in secondaries if secondary.NAME != translator.NAME]
+
+
+def record_failures(task_id: str, failures):
+    """Put the strings that could not be translated, and why, on the task record"""
+    if failures:
+        print(f"{len(failures)} strings could not be translated")
+    if not (task_id and task_id in task_store):
+        return
+    task = task_store[task_id]
+    task["failed_strings"] = len(failures)
+    task["failure_reasons"] = dict(Counter(reason for _, reason in failures).most_common())
+    task["failures"] = [{"text": text, "reason": reason} for text, reason in failures[:FAILURE_REPORT_LIMIT]]
 
 
-async def process_jar(jar_path: str, target_lang: str, ai_model: str, api_key: str, task_id: str = None, return_translations: bool = False, selected_translations: dict = None):
+async def review_result(task_id: str, candidates, string_index, translation_map) -> dict:
+    """Translation pairs for user confirmation, the string locations are kept for the apply step"""
+    if task_id:
+        await save_review_index(task_id, {text: string_index[text] for text in candidates})
+    
+    # Include all strings that pass filter, mark whether they changed
+    translation_pairs = [
+        {
+            "original": orig, 
+            "translated": translation_map[orig], 
+            "index": idx,
+            "occurrences": len(string_index[orig]),
+            "changed": orig != translation_map[orig]
+        }
+        for idx, orig in enumerate(candidates)
+    ]
+    
+    # Count how many actually changed
+    changed_count = sum(1 for pair in translation_pairs if pair["changed"])
+    
+    return {
+        "translation_pairs": translation_pairs,
+        "total_strings": len(candidates),
+        "total_occurrences": sum(pair["occurrences"] for pair in translation_pairs),
+        "changed_strings": changed_count
+    }
+
+
+async def patch_classes(jar_path: str, replacements) -> Dict[str, bytes]:
+    """Rebuild the classes of one jar that have replacements, on the process pool"""
+    replaced_names = list(replacements)
+    patched_shards = await asyncio.gather(*[
+        run_cpu_bound(patch_class_entries, jar_path, {name: replacements[name] for name in names})
+        for names in shard(replaced_names, CLASS_SHARD_SIZE)
+    ])
+    patched_entries = {}
+    for patched in patched_shards:
+        patched_entries.update(patched)
+    return patched_entries
+
+
+async def process_jar(jar_path: str, target_lang: str, ai_model: str, api_key: str, task_id: str = None, return_translations: bool = False, selected_translations: dict = None, include_annotations: bool = False):
     """Process a JAR file and translate class file strings
     
     Args:
         return_translations: If True, return translation pairs instead of writing files
         selected_translations: Dict of {original: translated} for user-confirmed translations
+        include_annotations: Also treat annotation string values as string literals
+    """
+    translator = None
+    string_index = None
+    stage_start = time.perf_counter()
+    
+    # If selected_translations provided, skip translation and apply directly
+    if selected_translations:
+        translation_map = selected_translations
+        # The review pass already indexed this jar, so skip parsing it again
+        if task_id:
+            string_index = await load_review_index(task_id)
+    else:
+        # Get translator instance
+        translator = get_translator(ai_model, api_key, PROVIDER_STREAMING)
+    
+    if string_index is None:
+        string_index = await index_jar_strings(jar_path, include_annotations)
+        stage_start = record_stage(task_id, "parse", stage_start)
+    else:
+        stage_start = record_stage(task_id, "load_index", stage_start)
+    
+    # If we have translations to apply, skip the translation process
+    if not selected_translations:
+        candidates, translation_map, stage_start = await translate_strings(
+            list(string_index), translator, target_lang, task_id, stage_start
+        )
+        
+        # If return_translations mode, return the translation pairs for user confirmation
+        if return_translations:
+            return await review_result(task_id, candidates, string_index, translation_map)
+    
+    # Work out which constant pool entries change in each class
+    replacements = build_replacements(string_index, translation_map)
+    
+    # Rebuild the affected classes on the process pool
+    patched_entries = await patch_classes(jar_path, replacements)
+    stage_start = record_stage(task_id, "apply", stage_start)
+    
+    # Repackage JAR, copying untouched entries without recompressing them
+    output_jar = output_path_for(jar_path, task_id)
+    await asyncio.to_thread(repack_jar, jar_path, output_jar, patched_entries)
+    record_stage(task_id, "repack", stage_start)
+    BYTES_PROCESSED.inc(os.path.getsize(output_jar), direction="output")
+    
+    return output_jar
+
+
+async def index_lang_jar(jar_path: str, source_lang: str, target_lang: str, entries=None, include_classes: bool = False, include_annotations: bool = False):
+    """Index the source language files of a jar, and its class strings when include_classes is set
+
+    Lang locations are (entry name, translation key). Returns the string index
+    and the set of strings that occur in lang files.
     """
-    temp_extract_dir = f"{jar_path}_extracted"
-    os.makedirs(temp_extract_dir, exist_ok=True)
+    lang_strings = await asyncio.to_thread(extract_lang_strings, jar_path, source_lang, target_lang, entries)
+    # Lang strings come first and in key order, so related entries end up in the same batches
+    string_index = build_string_index(lang_strings)
+    lang_texts = set(string_index)
+    if include_classes:
+        for text, locations in (await index_jar_strings(jar_path, include_annotations)).items():
+            string_index.setdefault(text, []).extend(locations)
+    print(f"Found {len(lang_texts)} unique lang strings in {len(lang_strings)} lang files")
+    return string_index, lang_texts
+
+
+async def process_lang_jar(jar_path: str, target_lang: str, ai_model: str, api_key: str, task_id: str = None, return_translations: bool = False, selected_translations: dict = None, include_annotations: bool = False, source_lang: str = "en_us", output_format: str = "jar", include_classes: bool = False, entries=None):
+    """Translate the language files of a jar, like process_jar
     
+    Each source language file gets a target language file next to it. With
+    include_classes the class strings are translated in the same pass, text
+    shared between lang files and classes is translated once. The output is
+    the jar with the new files added, or a resource pack holding only them.
+    """
     translator = None
+    string_index = None
+    stage_start = time.perf_counter()
+    
+    if selected_translations:
+        translation_map = selected_translations
+        if task_id:
+            string_index = await load_review_index(task_id)
+    else:
+        translator = get_translator(ai_model, api_key, PROVIDER_STREAMING)
     
+    if string_index is None:
+        string_index, lang_texts = await index_lang_jar(
+            jar_path, source_lang, target_lang, entries, include_classes, include_annotations
+        )
+        stage_start = record_stage(task_id, "parse", stage_start)
+    else:
+        stage_start = record_stage(task_id, "load_index", stage_start)
+    
+    if not selected_translations:
+        candidates, translation_map, stage_start = await translate_strings(
+            list(string_index), translator, target_lang, task_id, stage_start, lang_texts=lang_texts
+        )
+        if return_translations:
+            return await review_result(task_id, candidates, string_index, translation_map)
+        check_translated(task_id, candidates, translation_map)
+    
+    replacements = build_replacements(string_index, translation_map)
+    lang_replacements = {name: keys for name, keys in replacements.items() if is_lang_entry(name)}
+    lang_files = await asyncio.to_thread(build_lang_files, jar_path, lang_replacements, target_lang)
+    
+    if output_format == "resourcepack":
+        stage_start = record_stage(task_id, "apply", stage_start)
+        output_path = output_path_for(resource_pack_name(jar_path, target_lang), task_id)
+        await asyncio.to_thread(write_resource_pack, output_path, lang_files, f"Translations ({target_lang})")
+    else:
+        patched_entries = await patch_classes(jar_path, {
+            name: cp_entries for name, cp_entries in replacements.items() if name not in lang_replacements
+        })
+        patched_entries.update(lang_files)
+        stage_start = record_stage(task_id, "apply", stage_start)
+        output_path = output_path_for(jar_path, task_id)
+        await asyncio.to_thread(repack_jar, jar_path, output_path, patched_entries)
+    record_stage(task_id, "repack", stage_start)
+    BYTES_PROCESSED.inc(os.path.getsize(output_path), direction="output")
+    
+    return output_path
+
+
+def check_translated(task_id: str, candidates, translation_map):
+    """Raise when every string failed, without a review the task would otherwise complete with nothing translated"""
+    task = task_store.get(task_id) if task_id else None
+    if not task or not task.get("failed_strings"):
+        return
+    if any(translation_map.get(text, text) != text for text in candidates):
+        return
+    reason = next(iter(task.get("failure_reasons") or {}), "unknown error")
+    raise RuntimeError(f"No strings could be translated ({task['failed_strings']} failed: {reason})")
+
+
+class PackProgress:
+    """Per-jar progress of a modpack task
+
+    A jar is done once every string it needs from the provider came back,
+    strings shared between jars count for each of them.
+    """
+    
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.jars = task_store[task_id]["jars"]
+        self.string_index = {}  # Set once the pack is indexed
+        self.text_jars = {}  # text -> jar numbers it occurs in
+        self.pending = {}
+        self.totals = {}
+    
+    def start(self, candidates, to_translate):
+        for jar in self.jars:
+            jar["strings"] = 0
+        for text in candidates:
+            jar_numbers = self.text_jars[text] = {split_class(name)[0] for name, _ in self.string_index[text]}
+            for jar_no in jar_numbers:
+                self.jars[jar_no]["strings"] = self.jars[jar_no].get("strings", 0) + 1
+        for text in to_translate:
+            for jar_no in self.text_jars[text]:
+                self.pending[jar_no] = self.pending.get(jar_no, 0) + 1
+        self.totals = dict(self.pending)
+        for jar_no, jar in enumerate(self.jars):
+            jar["status"] = "translating" if self.pending.get(jar_no) else "translated"
+            jar["progress"] = 0 if self.pending.get(jar_no) else 100
+        self.publish(range(len(self.jars)))
+    
+    def batch_done(self, batch):
+        changed = set()
+        for text in batch:
+            for jar_no in self.text_jars[text]:
+                self.pending[jar_no] -= 1
+                changed.add(jar_no)
+        for jar_no in changed:
+            jar = self.jars[jar_no]
+            jar["progress"] = int((1 - self.pending[jar_no] / self.totals[jar_no]) * 100)
+            if not self.pending[jar_no]:
+                jar["status"] = "translated"
+        self.publish(changed)
+    
+    def set_status(self, jar_no: int, status: str):
+        self.jars[jar_no]["status"] = status
+        self.publish([jar_no])
+    
+    def publish(self, jar_numbers):
+        """Only the jars that changed go out, as {jar number: [status, progress]}"""
+        task_events.publish(self.task_id, "jars", {"jars": jar_states(self.jars, jar_numbers)})
+
+
+def jar_states(jars, jar_numbers) -> dict:
+    """{jar number: [status, progress]}, the compact per-jar state of "jars" events and snapshots"""
+    return {str(jar_no): [jars[jar_no].get("status"), jars[jar_no].get("progress", 0)] for jar_no in jar_numbers}
+
+
+async def index_pack_strings(jars, include_annotations: bool = False, pack_progress: PackProgress = None):
+    """Parse every jar of a pack on the process pool at once and index their string literals together
+
+    Class names are qualified with the jar's position in the pack.
+    """
+    class_lists = await asyncio.gather(*[
+        asyncio.to_thread(list_class_entries, jar["file_location"]) for jar in jars
+    ])
+    
+    async def index_jar(jar_no, jar_path, class_names):
+        shard_results = await asyncio.gather(*[
+            run_cpu_bound(extract_class_strings, jar_path, names, include_annotations)
+            for names in shard(class_names, CLASS_SHARD_SIZE)
+        ])
+        if pack_progress:
+            pack_progress.set_status(jar_no, "parsed")
+        return [
+            (qualify_class(jar_no, name), strings_in_class)
+            for shard_result in shard_results for name, strings_in_class in shard_result
+        ]
+    
+    per_jar = await asyncio.gather(*[
+        index_jar(jar_no, jar["file_location"], class_names)
+        for jar_no, (jar, class_names) in enumerate(zip(jars, class_lists))
+    ])
+    string_index = build_string_index(class_strings for jar_classes in per_jar for class_strings in jar_classes)
+    print(f"Found {len(string_index)} unique string literals in {sum(map(len, class_lists))} classes of {len(jars)} jars")
+    return string_index
+
+
+async def process_modpack(jars, target_lang: str, ai_model: str, api_key: str, task_id: str = None, return_translations: bool = False, selected_translations: dict = None, include_annotations: bool = False):
+    """Translate every jar of a modpack as one job, like process_jar
+    
+    Strings are deduplicated across all jars before anything is sent to the
+    provider. The output is one zip holding every jar under its member name,
+    translated or unchanged.
+    """
+    translator = None
+    string_index = None
+    stage_start = time.perf_counter()
+    
+    if selected_translations:
+        translation_map = selected_translations
+        if task_id:
+            string_index = await load_review_index(task_id)
+    else:
+        translator = get_translator(ai_model, api_key, PROVIDER_STREAMING)
+    
+    pack_progress = PackProgress(task_id) if task_id and task_id in task_store else None
+    if string_index is None:
+        string_index = await index_pack_strings(jars, include_annotations, pack_progress)
+        stage_start = record_stage(task_id, "parse", stage_start)
+    else:
+        stage_start = record_stage(task_id, "load_index", stage_start)
+    
+    if not selected_translations:
+        if pack_progress:
+            pack_progress.string_index = string_index
+        candidates, translation_map, stage_start = await translate_strings(
+            list(string_index), translator, target_lang, task_id, stage_start, pack_progress
+        )
+        if return_translations:
+            return await review_result(task_id, candidates, string_index, translation_map)
+    
+    # Patch and repack only the jars that contain a replaced string, in parallel
+    per_jar_replacements = split_replacements(build_replacements(string_index, translation_map))
+    
+    async def patch_jar(jar_no):
+        jar_path = jars[jar_no]["file_location"]
+        patched_entries = await patch_classes(jar_path, per_jar_replacements[jar_no])
+        output_jar = os.path.join(OUTPUT_DIR, f".{task_id}_{jar_no}.jar")
+        await asyncio.to_thread(repack_jar, jar_path, output_jar, patched_entries)
+        if pack_progress:
+            pack_progress.set_status(jar_no, "patched")
+        return jar_no, output_jar
+    
+    patched_jars = dict(await asyncio.gather(*[patch_jar(jar_no) for jar_no in per_jar_replacements]))
+    stage_start = record_stage(task_id, "apply", stage_start)
+    
+    output_path = output_path_for(MODPACK_OUTPUT_NAME, task_id)
     try:
-        # If selected_translations provided, skip translation and apply directly
-        if selected_translations:
-            translation_map = selected_translations
-        else:
-            # Get translator instance
-            translator = get_translator(ai_model, api_key)
-        
-        # Extract JAR
-        with zipfile.ZipFile(jar_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_extract_dir)
-        
-        # Collect all strings from all class files first (always needed)
-        all_strings = []
-        class_files_info = []
-        
-        for root, dirs, files in os.walk(temp_extract_dir):
-            for file in files:
-                if file.endswith('.class'):
-                    class_path = os.path.join(root, file)
-                    
-                    try:
-                        with open(class_path, 'rb') as f:
-                            class_data = f.read()
-                        
-                        modifier = ClassFileModifier(class_data)
-                        modifier.parse()
-                        
-                        # Extract strings
-                        strings_in_class = []
-                        for entry in modifier.constant_pool:
-                            if entry and entry.get("tag") == CONSTANT_Utf8:
-                                try:
-                                    text = entry["bytes"].decode("utf-8")
-                                    strings_in_class.append(text)
-                                except:
-                                    strings_in_class.append(None)
-                            else:
-                                strings_in_class.append(None)
-                        
-                        class_files_info.append({
-                            "path": class_path,
-                            "modifier": modifier,
-                            "strings": strings_in_class
-                        })
-                        
-                        all_strings.extend([s for s in strings_in_class if s is not None])
-                        
-                    except Exception as e:
-                        print(f"Failed to parse {class_path}: {e}")
-                        continue
-        
-        # If we have translations to apply, skip the translation process
-        if not selected_translations:
-            # Translate all strings in batches
-            if all_strings:
-                # Split into batches of 50 strings
-                batch_size = 50
-                total_batches = (len(all_strings) + batch_size - 1) // batch_size
-                
-                # Update total batches info and start time
-                start_time = time.time()
-                if task_id and task_id in bytecode_tasks:
-                    bytecode_tasks[task_id]["total_batches"] = total_batches
-                    bytecode_tasks[task_id]["start_time"] = start_time
-                
-                # Prepare all batches
-                batches = []
-                for i in range(0, len(all_strings), batch_size):
-                    batch = all_strings[i:i + batch_size]
-                    batches.append((i // batch_size + 1, batch))
-                
-                # Concurrent translation with controlled parallelism
-                max_concurrent = MAX_CONCURRENT_BATCHES  # Process multiple batches at once
-                translated_all = []
-                completed_batches = 0
-                
-                print(f"Starting parallel translation: {total_batches} batches, {max_concurrent} concurrent")
-                
-                async def translate_with_progress(batch_num, batch):
-                    nonlocal completed_batches
-                    result = await translator.translate_batch(batch, target_lang)
-                    completed_batches += 1
-                    
-                    # Calculate ETA
-                    if task_id and task_id in bytecode_tasks:
-                        elapsed_time = time.time() - start_time
-                        avg_time_per_batch = elapsed_time / completed_batches
-                        remaining_batches = total_batches - completed_batches
-                        eta_seconds = int(avg_time_per_batch * remaining_batches)
-                        
-                        bytecode_tasks[task_id]["current_batch"] = completed_batches
-                        bytecode_tasks[task_id]["progress"] = int((completed_batches / total_batches) * 100)
-                        bytecode_tasks[task_id]["eta_seconds"] = eta_seconds
-                    
-                    print(f"Completed batch {completed_batches}/{total_batches}")
-                    return (batch_num, result)
-                
-                # Process batches in chunks with controlled concurrency
-                for chunk_start in range(0, len(batches), max_concurrent):
-                    chunk = batches[chunk_start:chunk_start + max_concurrent]
-                    tasks = [translate_with_progress(batch_num, batch) for batch_num, batch in chunk]
-                    chunk_results = await asyncio.gather(*tasks, return_exceptions=True)
-                    
-                    # Handle results and errors
-                    for result in chunk_results:
-                        if isinstance(result, Exception):
-                            print(f"Batch translation error: {result}")
-                            # Use original text on error
-                            translated_all.extend(batches[len(translated_all) // batch_size][1])
-                        else:
-                            _, translated = result
-                            translated_all.extend(translated)
-                
-                # Build translation map
-                translation_map = {}
-                for orig, trans in zip(all_strings, translated_all):
-                    translation_map[orig] = trans
-                
-                # If return_translations mode, return the translation pairs for user confirmation
-                if return_translations:
-                    # Cleanup
-                    shutil.rmtree(temp_extract_dir)
-                    if translator:
-                        await translator.close()
-                    
-                    # Return translation pairs
-                    # Include all strings that pass filter, mark whether they changed
-                    translation_pairs = [
-                        {
-                            "original": orig, 
-                            "translated": trans, 
-                            "index": idx,
-                            "changed": orig != trans
-                        }
-                        for idx, (orig, trans) in enumerate(zip(all_strings, translated_all))
-                    ]
-                    
-                    # Count how many actually changed
-                    changed_count = sum(1 for pair in translation_pairs if pair["changed"])
-                    
-                    return {
-                        "translation_pairs": translation_pairs,
-                        "total_strings": len(all_strings),
-                        "changed_strings": changed_count
-                    }
-        
-        # Apply translations to class files
-        for class_info in class_files_info:
-                modifier = class_info["modifier"]
-                
-                # Apply translations
-                for i, entry in enumerate(modifier.constant_pool):
-                    if entry and entry.get("tag") == CONSTANT_Utf8:
-                        try:
-                            original_text = entry["bytes"].decode("utf-8")
-                            if original_text in translation_map:
-                                translated_text = translation_map[original_text]
-                                entry["bytes"] = translated_text.encode("utf-8")
-                        except:
-                            pass
-                
-                # Write modified class
-                modified_data = modifier.build()
-                with open(class_info["path"], 'wb') as f:
-                    f.write(modified_data)
-        
-        # Repackage JAR
-        output_jar = os.path.join(OUTPUT_DIR, f"translated_{os.path.basename(jar_path)}")
-        
-        with zipfile.ZipFile(output_jar, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(temp_extract_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, temp_extract_dir)
-                    zipf.write(file_path, arcname)
-        
-        # Cleanup
-        shutil.rmtree(temp_extract_dir)
-        
-        # Close translator
-        if translator:
-            await translator.close()
-        
-        return output_jar
+        await asyncio.to_thread(write_pack_archive, output_path, [
+            (jar["name"], patched_jars.get(jar_no, jar["file_location"])) for jar_no, jar in enumerate(jars)
+        ])
+    finally:
+        for patched_path in patched_jars.values():
+            os.remove(patched_path)
+    record_stage(task_id, "repack", stage_start)
+    BYTES_PROCESSED.inc(os.path.getsize(output_path), direction="output")
     
-    except Exception as e:
-        if os.path.exists(temp_extract_dir):
-            shutil.rmtree(temp_extract_dir)
-        if translator:
-            await translator.close()
-        raise e
+    return output_path
+
+
+def run_pipeline(task_info, task_id: str, return_translations: bool = False, selected_translations: dict = None):
+    """process_jar, process_modpack or process_lang_jar for a task record"""
+    kind = task_info.get("kind")
+    process = process_modpack if kind == "modpack" else process_jar
+    source = task_info["jars"] if kind == "modpack" else task_info["file_location"]
+    if kind == "lang":
+        process = functools.partial(
+            process_lang_jar,
+            source_lang=task_info["source_lang"],
+            output_format=task_info["lang_output"],
+            include_classes=task_info.get("include_classes", False),
+            entries=task_info.get("lang_entries")
+        )
+    return process(
+        source,
+        task_info["target_lang"],
+        task_info["ai_model"],
+        task_info["api_key"],
+        task_id,
+        return_translations=return_translations,
+        selected_translations=selected_translations,
+        include_annotations=task_info.get("include_annotations", False)
+    )
+
+
+async def set_review_result(task_id: str, task_info, result):
+    """Move a task to review, the translation pairs go to the payload table instead of the status record"""
+    await task_store.set_payload(task_id, result.get("translation_pairs", []))
+    task_info["status"] = "review"
+    task_info["total_strings"] = result.get("total_strings", 0)
+    task_info["total_occurrences"] = result.get("total_occurrences", 0)
+    task_info["changed_strings"] = result.get("changed_strings", 0)
+
+def review_cache_key(task_info) -> str:
+    annotations = "annotations" if task_info.get("include_annotations") else "literals"
+    parts = [task_info["jar_sha256"], task_info["target_lang"], task_info["ai_model"], annotations]
+    if task_info.get("kind") == "lang":
+        parts += [
+            "lang", task_info["source_lang"], "classes" if task_info.get("include_classes") else "lang_only",
+            "\n".join(task_info.get("lang_entries") or ())
+        ]
+    return cache_key(*parts)
+
+def selection_cache_key(task_info, translation_map) -> str:
+    selection = json.dumps(translation_map, ensure_ascii=False, sort_keys=True)
+    parts = [review_cache_key(task_info), hashlib.sha256(selection.encode("utf-8")).hexdigest()]
+    if task_info.get("kind") == "lang":
+        parts.append(task_info["lang_output"])
+    return cache_key(*parts)
+
+def output_source(task_info) -> str:
+    """Name output_path_for derives a task's output location from"""
+    if task_info.get("kind") == "modpack":
+        return MODPACK_OUTPUT_NAME
+    if task_info.get("lang_output") == "resourcepack":
+        return resource_pack_name(task_info["file_location"], task_info["target_lang"])
+    return task_info["file_location"]
+
+def download_name(task_info) -> str:
+    if task_info.get("lang_output") == "resourcepack":
+        return resource_pack_name(task_info["filename"], task_info["target_lang"])
+    return f"translated_{task_info['filename']}"
+
+async def cache_review_result(task_id: str, task_info, result):
+    """Store a finished review in the result cache, together with its string index
+
+    Reviews with failed strings are not cached, their untranslated strings
+    come from provider errors (a bad key, an outage) rather than the jar.
+    """
+    if not task_info.get("jar_sha256") or task_info.get("failed_strings"):
+        return
+    string_index = await load_review_index(task_id)
+    if string_index is None:
+        return
+    payload = dict(result)
+    payload["string_index"] = encode_string_index(string_index)
+    try:
+        await asyncio.to_thread(result_cache.put_review, review_cache_key(task_info), payload)
+    except OSError as e:
+        print(f"Failed to cache review result for {task_id}: {e}")
+
+async def restore_cached_review(task_id: str, task_info) -> bool:
+    """Jump a task straight to review if the same jar was translated the same way before"""
+    payload = await asyncio.to_thread(result_cache.get_review, review_cache_key(task_info))
+    if payload is None:
+        return False
+    await save_review_index(task_id, decode_string_index(payload.pop("string_index")))
+    await set_review_result(task_id, task_info, payload)
+    task_info["progress"] = 100
+    task_info["from_cache"] = True
+    for jar in task_info.get("jars", ()):
+        jar.update(status="translated", progress=100)
+    task_store.save(task_id)
+    print(f"Result cache hit for {task_id} ({task_info['filename']})")
+    return True
 
 
 async def worker():
     """Background worker to process tasks"""
     while True:
-        task = await processing_queue.get()
+        task, lease = await processing_queue.get()
         task_id, task_type, future = task
+        job_start = time.time()
         
         try:
             if task_type == "bytecode":
-                task_info = bytecode_tasks[task_id]
+                task_info = task_store[task_id]
                 task_info["status"] = "processing"
+                task_store.save(task_id)
                 
                 # Get return_translations flag
                 return_translations = task_info.get("return_translations", False)
                 
-                result = await process_jar(
-                    task_info["file_location"],
-                    task_info["target_lang"],
-                    task_info["ai_model"],
-                    task_info["api_key"],
-                    task_id,  # Pass task_id for progress tracking
-                    return_translations=return_translations
-                )
+                # Single jars and modpacks share the queue, task_id is passed for progress tracking
+                result = await run_pipeline(task_info, task_id, return_translations=return_translations)
                 
                 if result:
                     if return_translations and isinstance(result, dict):
                         # Translation pairs returned for review
-                        task_info["status"] = "review"
-                        task_info["translation_pairs"] = result.get("translation_pairs", [])
-                        task_info["total_strings"] = result.get("total_strings", 0)
-                        task_info["changed_strings"] = result.get("changed_strings", 0)
+                        await set_review_result(task_id, task_info, result)
+                        await cache_review_result(task_id, task_info, result)
                     else:
                         # Direct output (old behavior)
                         task_info["status"] = "completed"
@@ -486,32 +1047,76 @@ async def worker():
                 else:
                     task_info["status"] = "failed"
                     task_info["error"] = "Processing failed"
+                task_store.save(task_id)
                 
                 if not future.done():
                     future.set_result(result)
                     
         except Exception as e:
-            if task_type == "bytecode" and task_id in bytecode_tasks:
-                bytecode_tasks[task_id]["status"] = "failed"
-                bytecode_tasks[task_id]["error"] = str(e)
+            if task_type == "bytecode" and task_id in task_store:
+                task_store[task_id]["status"] = "failed"
+                task_store[task_id]["error"] = str(e)
+                task_store.save(task_id)
             
             if not future.done():
                 future.set_exception(e)
         finally:
-            processing_queue.task_done()
+            recent_job_seconds.append(time.time() - job_start)
+            processing_queue.task_done(lease)
+            if task_type == "bytecode" and task_id in task_store and task_store[task_id]["status"] not in ACTIVE_STATUSES:
+                TASKS_FINISHED.inc(status=task_store[task_id]["status"])
+
+
+def enqueue_task(task_id: str, task_info) -> bool:
+    """Put a bytecode task on the processing queue, marks it failed and returns False when the queue is full"""
+    future = asyncio.get_running_loop().create_future()
+    try:
+        processing_queue.put_nowait((task_id, "bytecode", future), task_info["ai_model"], queue_owner(task_info["api_key"]))
+        return True
+    except asyncio.QueueFull:
+        task_info["status"] = "failed"
+        task_info["error"] = "Queue is full"
+        task_store.save(task_id)
+        return False
+
+def fail_interrupted_tasks():
+    """Fail the tasks that were queued or processing when the server stopped
+
+    Unfinished tasks always fail on restart, the API key they need is only
+    kept in memory and has to come with a new upload.
+    """
+    interrupted = 0
+    for task_id, task_info in task_store.unfinished():
+        task_info["status"] = "failed"
+        task_info["error"] = "Interrupted by a server restart, please upload again"
+        task_store.save(task_id)
+        interrupted += 1
+    if interrupted:
+        print(f"Failed {interrupted} tasks interrupted by the restart")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("Starting background worker and cleanup task...")
-    asyncio.create_task(worker())
-    asyncio.create_task(periodic_cleanup())
+    fail_interrupted_tasks()
+    print(f"Starting {WORKER_COUNT} background workers and cleanup task...")
+    background_tasks = [asyncio.create_task(worker()) for _ in range(WORKER_COUNT)]
+    background_tasks.append(asyncio.create_task(periodic_cleanup()))
+    background_tasks.append(asyncio.create_task(periodic_stats_flush()))
     # Clean up old files on startup
-    cleanup_old_files()
+    await asyncio.to_thread(cleanup_old_files)
+    await evict_finished_tasks()
     yield
-    # Shutdown
+    # Shutdown, interrupted jobs stay "processing" in the task store and are failed on the next start
     print("Shutting down...")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await task_store.flush()
+    await asyncio.to_thread(usage_stats.flush)
+    await http_clients.close()
+    if process_pool is not None:
+        process_pool.shutdown(cancel_futures=True)
 
 
 # FastAPI App
@@ -526,6 +1131,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Review pages compress well, jars are already compressed
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=GZIP_MINIMUM_SIZE,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/java-archive",),
+)
+
 
 @app.get("/")
 async def root():
@@ -535,8 +1147,14 @@ async def root():
 
 @app.get("/stats")
 async def get_stats():
-    """Get usage statistics"""
-    return load_stats()
+    """Get usage statistics: totals, per-day buckets (UTC) and per-provider usage"""
+    return usage_stats.snapshot()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics for the translation pipeline and providers"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.post("/translate/bytecode")
@@ -544,50 +1162,252 @@ async def translate_bytecode(
     file: UploadFile = File(...),
     target_lang: str = Form("zh_cn"),
     ai_model: str = Form("Deepseek"),
-    api_key: str = Form("")
+    api_key: str = Form(""),
+    include_annotations: bool = Form(False)
 ):
     """Translate JAR bytecode (queue-based)"""
     global task_counter
-    increment_stat("usage")
-    
-    if not api_key:
-        raise HTTPException(status_code=400, detail="API key is required")
+    check_provider(ai_model, api_key)
+    increment_stat("usage", ai_model)
     
     task_id = f"bytecode_{task_counter}"
     task_counter += 1
     
     # Save uploaded file
-    file_location = os.path.join(UPLOAD_DIR, f"{task_id}_{file.filename}")
-    async with aiofiles.open(file_location, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
+    file_location, jar_sha256 = await save_upload(file)
     
     # Create task record
-    bytecode_tasks[task_id] = {
+    task_info = task_store.create(task_id, {
         "status": "queued",
         "filename": file.filename,
         "file_location": file_location,
+        "jar_sha256": jar_sha256,
         "target_lang": target_lang,
         "ai_model": ai_model,
         "api_key": api_key,
+        "include_annotations": include_annotations,
         "progress": 0,
         "total_batches": 0,
         "current_batch": 0,
         "eta_seconds": 0,
         "start_time": 0,
-        "translation_pairs": [],  # Store translation results for review
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "cache_hit_ratio": 0,
         "return_translations": True  # Flag to return translations instead of直接applying
-    }
+    })
+    
+    # Identical jar, language and model translated before: skip the queue entirely
+    if await restore_cached_review(task_id, task_info):
+        return {"task_id": task_id, "status": "review", "filename": file.filename}
     
     # Add to queue
-    loop = asyncio.get_event_loop()
-    future = loop.create_future()
+    if not enqueue_task(task_id, task_info):
+        raise HTTPException(status_code=503, detail="Queue is full. Please try again later.")
     
+    return {"task_id": task_id, "status": "queued", "filename": file.filename}
+
+
+def parse_json_form(value: str, expected_type, field: str):
     try:
-        processing_queue.put_nowait((task_id, "bytecode", future))
-    except asyncio.QueueFull:
-        bytecode_tasks[task_id]["status"] = "failed"
-        bytecode_tasks[task_id]["error"] = "Queue is full"
+        parsed = json.loads(value)
+    except json.JSONDecodeError:
+        parsed = None
+    if not isinstance(parsed, expected_type):
+        raise HTTPException(status_code=400, detail=f"Invalid {field} format")
+    return parsed
+
+def resolve_selection(task_id: str, selected_indices: list, select_all: bool, excluded_indices: list, overrides: dict):
+    """Turn an index-based selection into {original: translated}, unchanged pairs are dropped"""
+    try:
+        selected = {int(index) for index in selected_indices}
+        excluded = {int(index) for index in excluded_indices}
+        overrides = {int(index): text for index, text in overrides.items()}
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Pair indices must be integers")
+    if not all(isinstance(text, str) for text in overrides.values()):
+        raise HTTPException(status_code=400, detail="Overrides must map pair indices to strings")
+    
+    if select_all:
+        pairs = task_store.changed_pairs(task_id)
+        pairs.update(task_store.pairs_by_index(task_id, selected | set(overrides)))
+        chosen = set(pairs) - excluded
+    else:
+        # Editing a pair selects it
+        chosen = selected | set(overrides)
+        pairs = task_store.pairs_by_index(task_id, chosen)
+        missing = chosen - set(pairs)
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown pair indices: {sorted(missing)[:10]}")
+    
+    translation_map = {}
+    for index in chosen:
+        original, translated = pairs[index]
+        translated = overrides.get(index, translated)
+        if translated != original:
+            translation_map[original] = translated
+    return translation_map
+
+
+@app.post("/translate/modpack")
+async def translate_modpack(
+    files: List[UploadFile] = File(...),
+    target_lang: str = Form("zh_cn"),
+    ai_model: str = Form("Deepseek"),
+    api_key: str = Form(""),
+    include_annotations: bool = Form(False),
+    name: str = Form("")
+):
+    """Translate many jars as one queued task (modpack)
+
+    Accepts several .jar files, a zip holding jars (e.g. a mods/ folder), or
+    both. Strings shared between jars are translated once. Status, events,
+    review, apply and download use the /translate/bytecode endpoints with the
+    returned task id; the download is one zip with every jar.
+    """
+    global modpack_counter
+    check_provider(ai_model, api_key)
+    
+    jars = []
+    for file in files:
+        file_location, jar_sha256 = await save_upload(file)
+        if (file.filename or "").lower().endswith(".jar"):
+            jars.append({"name": os.path.basename(file.filename), "file_location": file_location, "jar_sha256": jar_sha256})
+            continue
+        # Anything else is a pack archive, take the jars inside it
+        try:
+            jars.extend(await asyncio.to_thread(
+                extract_pack_jars, file_location, UPLOAD_DIR, MODPACK_MAX_JARS, MODPACK_MAX_BYTES
+            ))
+        except (ValueError, zipfile.BadZipFile) as e:
+            raise HTTPException(status_code=400, detail=f"{file.filename}: {e}")
+    
+    # Same jar uploaded twice under one name is kept once, other name clashes get numbered
+    unique_jars = []
+    seen = {}
+    for jar in jars:
+        previous = seen.get(jar["name"])
+        if previous == jar["jar_sha256"]:
+            continue
+        if previous is not None:
+            stem, ext = os.path.splitext(jar["name"])
+            jar["name"] = f"{stem}_{len(unique_jars)}{ext}"
+        seen[jar["name"]] = jar["jar_sha256"]
+        unique_jars.append(jar)
+    jars = unique_jars
+    
+    if not jars:
+        raise HTTPException(status_code=400, detail="No jars found in the upload")
+    if len(jars) > MODPACK_MAX_JARS:
+        raise HTTPException(status_code=400, detail=f"At most {MODPACK_MAX_JARS} jars per modpack")
+    for jar in jars:
+        jar.update(status="queued", progress=0, strings=0)
+    
+    if not name:
+        name = files[0].filename if len(files) == 1 and not files[0].filename.lower().endswith(".jar") else MODPACK_OUTPUT_NAME
+    if not name.lower().endswith(".zip"):
+        name += ".zip"
+    
+    increment_stat("usage", ai_model)
+    task_id = f"modpack_{modpack_counter}"
+    modpack_counter += 1
+    task_info = task_store.create(task_id, {
+        "kind": "modpack",
+        "status": "queued",
+        "filename": os.path.basename(name),
+        "jars": jars,
+        "jar_count": len(jars),
+        "jar_sha256": pack_digest(jars),  # Identifies the whole pack for the result cache
+        "target_lang": target_lang,
+        "ai_model": ai_model,
+        "api_key": api_key,
+        "include_annotations": include_annotations,
+        "progress": 0,
+        "total_batches": 0,
+        "current_batch": 0,
+        "eta_seconds": 0,
+        "start_time": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "cache_hit_ratio": 0,
+        "return_translations": True
+    })
+    
+    if await restore_cached_review(task_id, task_info):
+        return {"task_id": task_id, "status": "review", "filename": task_info["filename"], "jars": len(jars)}
+    
+    if not enqueue_task(task_id, task_info):
+        raise HTTPException(status_code=503, detail="Queue is full. Please try again later.")
+    
+    return {"task_id": task_id, "status": "queued", "filename": task_info["filename"], "jars": len(jars)}
+
+
+@app.post("/translate/lang")
+async def translate_lang(
+    file: UploadFile = File(...),
+    target_lang: str = Form("zh_cn"),
+    ai_model: str = Form("Deepseek"),
+    api_key: str = Form(""),
+    source_lang: str = Form("en_us"),
+    output: str = Form("jar"),  # "jar" or "resourcepack"
+    entries: str = Form("[]"),  # JSON array of lang file entry names, empty for every source language file
+    include_classes: bool = Form(False),
+    include_annotations: bool = Form(False),
+    review: bool = Form(False)
+):
+    """Translate the assets/*/lang files of a jar (queue-based)
+
+    Runs through the same queue, batching, translation memory and result
+    cache as bytecode tasks, status, events, review, apply and download use
+    the /translate/bytecode endpoints with the returned task id. Without
+    review the task goes straight to completed.
+    """
+    global lang_counter
+    check_provider(ai_model, api_key)
+    if output not in LANG_OUTPUTS:
+        raise HTTPException(status_code=400, detail=f"output must be one of {', '.join(LANG_OUTPUTS)}")
+    if output == "resourcepack" and include_classes:
+        raise HTTPException(status_code=400, detail="A resource pack cannot carry translated classes")
+    lang_entries = parse_json_form(entries, list, "entries")
+    if not all(isinstance(entry, str) for entry in lang_entries):
+        raise HTTPException(status_code=400, detail="Invalid entries format")
+    
+    file_location, jar_sha256 = await save_upload(file)
+    if not include_classes and not await asyncio.to_thread(find_lang_entries, file_location, source_lang, lang_entries):
+        raise HTTPException(status_code=400, detail=f"No {source_lang} lang files found in assets/*/lang/")
+    
+    increment_stat("usage", ai_model)
+    task_id = f"lang_{lang_counter}"
+    lang_counter += 1
+    task_info = task_store.create(task_id, {
+        "kind": "lang",
+        "status": "queued",
+        "filename": file.filename,
+        "file_location": file_location,
+        "jar_sha256": jar_sha256,
+        "target_lang": target_lang,
+        "ai_model": ai_model,
+        "api_key": api_key,
+        "source_lang": source_lang,
+        "lang_output": output,
+        "lang_entries": sorted(lang_entries),
+        "include_classes": include_classes,
+        "include_annotations": include_annotations,
+        "progress": 0,
+        "total_batches": 0,
+        "current_batch": 0,
+        "eta_seconds": 0,
+        "start_time": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "cache_hit_ratio": 0,
+        "return_translations": review
+    })
+    
+    if review and await restore_cached_review(task_id, task_info):
+        return {"task_id": task_id, "status": "review", "filename": file.filename}
+    
+    if not enqueue_task(task_id, task_info):
         raise HTTPException(status_code=503, detail="Queue is full. Please try again later.")
     
     return {"task_id": task_id, "status": "queued", "filename": file.filename}
@@ -596,47 +1416,70 @@ async def translate_bytecode(
 @app.post("/translate/bytecode/apply")
 async def apply_bytecode_translation(
     task_id: str = Form(...),
-    selected_translations: str = Form("{}")  # JSON object of {original: translated}
+    selected_indices: str = Form("[]"),  # JSON array of pair indices
+    select_all: bool = Form(False),  # Apply every changed pair except excluded_indices
+    excluded_indices: str = Form("[]"),  # JSON array of pair indices
+    overrides: str = Form("{}"),  # JSON object of {pair index: edited translation}
+    selected_translations: str = Form("{}")  # Legacy JSON object of {original: translated}
 ):
-    """Apply user-confirmed translations and generate JAR file"""
-    if task_id not in bytecode_tasks:
+    """Apply user-confirmed translations and generate JAR file
+
+    Pairs are chosen by their review index, either listed in selected_indices
+    or everything changed via select_all minus excluded_indices. Edited
+    translations are sent as overrides.
+    """
+    if task_id not in task_store:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task_info = bytecode_tasks[task_id]
+    task_info = task_store[task_id]
     
     if task_info["status"] != "review":
         raise HTTPException(status_code=400, detail="Task is not in review state")
     
-    # Parse selected translations
-    try:
-        import json as json_lib
-        translation_map = json_lib.loads(selected_translations)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid selected_translations format")
+    # Parse the selection
+    translation_map = parse_json_form(selected_translations, dict, "selected_translations")
+    if not translation_map:
+        translation_map = await asyncio.to_thread(
+            resolve_selection,
+            task_id,
+            parse_json_form(selected_indices, list, "selected_indices"),
+            select_all,
+            parse_json_form(excluded_indices, list, "excluded_indices"),
+            parse_json_form(overrides, dict, "overrides")
+        )
     
     if not translation_map:
         raise HTTPException(status_code=400, detail="No translations selected")
     
     try:
-        # Apply translations
-        result = await process_jar(
-            task_info["file_location"],
-            task_info["target_lang"],
-            task_info["ai_model"],
-            task_info["api_key"],
-            task_id,
-            return_translations=False,
-            selected_translations=translation_map
-        )
+        output_key = selection_cache_key(task_info, translation_map) if task_info.get("jar_sha256") else None
+        cached_output = output_key and await asyncio.to_thread(result_cache.get_output, output_key)
+        
+        if cached_output:
+            # Same jar and same selection applied before
+            result = output_path_for(output_source(task_info), task_id)
+            await asyncio.to_thread(shutil.copyfile, cached_output, result)
+            BYTES_PROCESSED.inc(os.path.getsize(result), direction="output")
+            print(f"Result cache hit for {task_id} output")
+        else:
+            # Apply translations
+            result = await run_pipeline(task_info, task_id, selected_translations=translation_map)
+            if output_key:
+                await asyncio.to_thread(result_cache.put_output, output_key, result)
         
         task_info["status"] = "completed"
         task_info["output_path"] = result
+        task_store.save(task_id)
+        await discard_review_index(task_id)
+        TASKS_FINISHED.inc(status="completed")
         
-        return {"status": "success", "message": "Translations applied successfully"}
+        return {"status": "success", "message": "Translations applied successfully", "applied": len(translation_map)}
     
     except Exception as e:
         task_info["status"] = "failed"
         task_info["error"] = str(e)
+        task_store.save(task_id)
+        TASKS_FINISHED.inc(status="failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -644,7 +1487,8 @@ async def apply_bytecode_translation(
 async def preview_bytecode_strings(
     file: UploadFile = File(...),
     target_lang: str = Form("zh_cn"),
-    ai_model: str = Form("Deepseek")
+    ai_model: str = Form("Deepseek"),
+    include_annotations: bool = Form(False)
 ):
     """Preview strings that will be translated from JAR bytecode"""
     global task_counter
@@ -652,56 +1496,127 @@ async def preview_bytecode_strings(
     task_id = f"preview_{task_counter}"
     task_counter += 1
     
-    # Save uploaded file temporarily
-    file_location = os.path.join(UPLOAD_DIR, f"{task_id}_{file.filename}")
-    async with aiofiles.open(file_location, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
+    # Save uploaded file, the store keeps it around for a later translation of the same jar
+    file_location, _ = await save_upload(file)
     
     try:
-        # Extract strings in preview mode
-        result = await process_jar(
-            file_location,
-            target_lang,
-            ai_model,
-            "",  # No API key needed for preview
-            task_id,
-            preview_mode=True
-        )
-        
-        # Clean up the uploaded file
-        if os.path.exists(file_location):
-            os.remove(file_location)
+        # Extract the strings that would be sent for translation
+        string_index = await index_jar_strings(file_location, include_annotations)
+        translator = get_translator(ai_model, "")  # No API key needed for preview
+        strings = [text for text in string_index if translator._should_translate(text)]
         
         return {
             "task_id": task_id,
             "filename": file.filename,
-            "strings": result["strings"],
-            "total": result["total"]
+            "strings": strings,
+            "total": len(strings)
         }
     
     except Exception as e:
-        # Clean up on error
-        if os.path.exists(file_location):
-            os.remove(file_location)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/translate/bytecode/status/{task_id}")
 async def get_bytecode_status(task_id: str):
     """Get status of a bytecode translation task"""
-    if task_id not in bytecode_tasks:
+    if task_id not in task_store:
         raise HTTPException(status_code=404, detail="Task not found")
-    return bytecode_tasks[task_id]
+    
+    task = {key: value for key, value in task_store[task_id].items() if key != "api_key"}
+    if task["status"] == "queued":
+        estimate = get_queue_estimate(task_id)
+        if estimate:
+            task["queue_position"], task["estimated_wait_seconds"] = estimate
+    return task
+
+
+def task_snapshot(task_id: str) -> dict:
+    """Compact current state of a task, as sent when an event stream starts"""
+    task_info = task_store[task_id]
+    snapshot = event_data(task_info, STATE_EVENT_FIELDS + PROGRESS_EVENT_FIELDS)
+    if task_info["status"] == "queued":
+        snapshot.update(queue_info(task_id) or {})
+    if task_info.get("jars"):
+        snapshot["jars"] = jar_states(task_info["jars"], range(len(task_info["jars"])))
+    return snapshot
+
+
+@app.get("/translate/bytecode/events/{task_id}")
+async def bytecode_events(task_id: str, request: Request):
+    """Server-sent events for a task: state transitions, batch progress and queue position
+
+    Events are "snapshot" (full compact state), "state", "progress",
+    "jars" (per-jar progress of a modpack) and "idle" (queue position
+    while waiting). Reconnecting clients send
+    Last-Event-ID (or ?last_event_id=) to receive only what they missed.
+    The stream ends once the task reaches review, completed or failed.
+    """
+    if task_id not in task_store:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    
+    def snapshot():
+        return task_snapshot(task_id) if task_id in task_store else {"status": "failed", "error": "Task expired"}
+    
+    def idle():
+        if task_id in task_store and task_store[task_id]["status"] == "queued":
+            return queue_info(task_id)
+        return None
+    
+    async def event_stream():
+        EVENT_STREAMS.inc()
+        try:
+            async for frame in task_events.stream(
+                task_id, last_event_id, snapshot,
+                lambda state: state.get("status") in TERMINAL_STATUSES, idle
+            ):
+                yield frame
+        finally:
+            EVENT_STREAMS.dec()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/translate/bytecode/review/{task_id}")
+async def get_bytecode_review(
+    task_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    changed_only: bool = False,
+    search: str = "",
+    sort: str = "index"
+):
+    """Page through the translation pairs of a task in review
+
+    sort is "index", "occurrences" (most frequent first) or "original".
+    """
+    if task_id not in task_store:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task_store[task_id]["status"] != "review":
+        raise HTTPException(status_code=400, detail="Task is not in review state")
+    if sort not in REVIEW_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(REVIEW_SORTS)}")
+    
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), REVIEW_PAGE_MAX_LIMIT)
+    total, pairs = await asyncio.to_thread(
+        task_store.review_pairs, task_id, offset, limit, changed_only, search, sort
+    )
+    return {"total": total, "offset": offset, "limit": limit, "pairs": pairs}
 
 
 @app.get("/translate/bytecode/download/{task_id}")
 async def download_bytecode(task_id: str):
     """Download translated JAR file"""
-    if task_id not in bytecode_tasks:
+    if task_id not in task_store:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = bytecode_tasks[task_id]
+    task = task_store[task_id]
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="Task not completed yet")
     
@@ -709,13 +1624,17 @@ async def download_bytecode(task_id: str):
     if not output_path or not os.path.exists(output_path):
         raise HTTPException(status_code=404, detail="Output file not found")
     
-    return FileResponse(output_path, filename=f"translated_{task['filename']}")
+    media_type = "application/zip" if output_path.endswith(".zip") else "application/java-archive"
+    return FileResponse(output_path, filename=download_name(task), media_type=media_type)
 
 
 @app.get("/translate/bytecode/list")
-async def list_bytecode_tasks():
-    """List all bytecode translation tasks"""
-    return list(bytecode_tasks.values())
+async def list_bytecode_tasks(offset: int = 0, limit: int = 50, status: Optional[str] = None):
+    """List bytecode translation task summaries, newest first"""
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), TASK_LIST_MAX_LIMIT)
+    total, tasks = task_store.list_summaries(offset, limit, status)
+    return {"total": total, "offset": offset, "limit": limit, "tasks": tasks}
 
 
 if __name__ == "__main__":
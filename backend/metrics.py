@@ -0,0 +1,195 @@
+"""
+Minimal Prometheus metrics: counters, gauges and histograms rendered in the text exposition format
+Only what /metrics needs, so the backend does not pull in prometheus_client
+"""
+import bisect
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Configuration
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+INF_BUCKET = 'le="+Inf"'
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.TYPE}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic total per label set"""
+    TYPE = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """Current value per label set, or a callback read at scrape time"""
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[LabelValues, float] = {}
+        self.function = function
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            return [f"{self.name} {format_value(self.function())}"]
+        return [
+            f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[LabelValues, list] = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [0] * len(self.buckets) + [0.0, 0]
+        # Counts are stored per bucket and accumulated when rendering
+        slot = bisect.bisect_left(self.buckets, value)
+        if slot < len(self.buckets):
+            series[slot] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels(self.labels, key, INF_BUCKET)} {series[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(series[-2])}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = (), function=None) -> Gauge:
+        return self.register(Gauge(name, help_text, labels, function))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=STAGE_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Pipeline
+STAGE_SECONDS = registry.histogram(
+    "xtmc_stage_duration_seconds", "Time spent in each process_jar stage", ("stage",))
+BYTES_PROCESSED = registry.counter(
+    "xtmc_bytes_processed_total", "Jar bytes received as uploads and written as translated output", ("direction",))
+STRINGS_PROCESSED = registry.counter(
+    "xtmc_strings_processed_total", "Unique strings through the pipeline by outcome", ("outcome",))
+TASKS_FINISHED = registry.counter(
+    "xtmc_tasks_finished_total", "Bytecode tasks by the state they ended a processing step in", ("status",))
+
+# Providers
+PROVIDER_BATCH_SECONDS = registry.histogram(
+    "xtmc_provider_batch_duration_seconds", "Latency of one translation request per provider", ("provider",),
+    buckets=LATENCY_BUCKETS)
+PROVIDER_RESPONSES = registry.counter(
+    "xtmc_provider_responses_total", "Provider HTTP responses by status code, network failures count as \"error\"",
+    ("provider", "status"))
+INFLIGHT_BATCHES = registry.gauge(
+    "xtmc_inflight_batches", "Translation batches currently waiting on a provider")
+INFLIGHT_BATCHES.set(0)
+BATCH_RETRIES = registry.counter(
+    "xtmc_batch_retries_total", "Requests sent again for strings a batch did not translate, by cause", ("provider", "cause"))
+HEDGED_REQUESTS = registry.counter(
+    "xtmc_hedged_requests_total", "Duplicate requests sent for batches slower than recent answers", ("provider",))
+FAILOVERS = registry.counter(
+    "xtmc_failovers_total", "Batches handed to another provider after a failed request", ("source", "target"))
+
+# API
+EVENT_STREAMS = registry.gauge(
+    "xtmc_event_streams", "Open server-sent event connections for task progress")
+EVENT_STREAMS.set(0)
@@ -0,0 +1,97 @@
+"""
+Modpack archives: many jars translated as one task
+Classes of a pack are indexed under "<jar number>:<class name>" so one string index,
+review and translation map cover every jar and shared strings are translated once
+"""
+import hashlib
+import os
+import uuid
+import zipfile
+from typing import Dict, List, Tuple
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def qualify_class(jar_no: int, class_name: str) -> str:
+    return f"{jar_no}:{class_name}"
+
+
+def split_class(qualified: str) -> Tuple[int, str]:
+    jar_no, class_name = qualified.split(":", 1)
+    return int(jar_no), class_name
+
+
+def split_replacements(replacements: Dict[str, Dict[int, str]]) -> Dict[int, Dict[str, Dict[int, str]]]:
+    """Group {qualified class: {cp index: text}} into {jar number: {class name: {cp index: text}}}"""
+    per_jar = {}
+    for qualified, entries in replacements.items():
+        jar_no, class_name = split_class(qualified)
+        per_jar.setdefault(jar_no, {})[class_name] = entries
+    return per_jar
+
+
+def pack_digest(jars: List[dict]) -> str:
+    """Content hash of a pack: member names and jar hashes, in pack order"""
+    digest = hashlib.sha256()
+    for jar in jars:
+        digest.update(f"{jar['name']}\0{jar['jar_sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def is_jar_name(name: str) -> bool:
+    return name.lower().endswith(".jar") and not name.endswith("/")
+
+
+def store_stream(source, store_dir: str) -> Tuple[str, str]:
+    """Copy a binary stream into the content-addressed store, returns (location, sha256)"""
+    sha256 = hashlib.sha256()
+    temp_location = os.path.join(store_dir, f".upload_{uuid.uuid4().hex}")
+    try:
+        with open(temp_location, "wb") as out_file:
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                out_file.write(chunk)
+        digest = sha256.hexdigest()
+        location = os.path.join(store_dir, f"{digest}.jar")
+        if os.path.exists(location):
+            os.utime(location)
+        else:
+            os.replace(temp_location, location)
+    finally:
+        if os.path.exists(temp_location):
+            os.remove(temp_location)
+    return location, digest
+
+
+def extract_pack_jars(archive_path: str, store_dir: str, max_jars: int, max_bytes: int) -> List[dict]:
+    """Store every jar inside a modpack zip, returns [{"name", "file_location", "jar_sha256"}, ...]
+
+    Jars can sit anywhere in the archive (e.g. mods/), their paths are kept
+    as member names. Raises ValueError when the pack exceeds max_jars jars
+    or max_bytes uncompressed, and zipfile.BadZipFile for corrupt members.
+    """
+    with zipfile.ZipFile(archive_path, "r") as zin:
+        infos = [info for info in zin.infolist() if is_jar_name(info.filename)]
+        if len(infos) > max_jars:
+            raise ValueError(f"Modpack contains {len(infos)} jars, at most {max_jars} are allowed")
+        if sum(info.file_size for info in infos) > max_bytes:
+            raise ValueError("Modpack is too large")
+
+        jars = []
+        for info in infos:
+            with zin.open(info) as source:
+                location, digest = store_stream(source, store_dir)
+            if not zipfile.is_zipfile(location):
+                raise zipfile.BadZipFile(f"{info.filename} is not a JAR archive")
+            jars.append({"name": info.filename, "file_location": location, "jar_sha256": digest})
+    return jars
+
+
+def write_pack_archive(output_path: str, members: List[Tuple[str, str]]):
+    """Write [(member name, jar path), ...] into one zip, jars are already compressed so they are stored"""
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_STORED, allowZip64=True) as zout:
+        for name, path in members:
+            zout.write(path, name)
@@ -0,0 +1,261 @@
+"""
+Hedged requests and failover between translation providers
+A batch that runs past a percentile of recent latency gets a duplicate request, and a provider whose
+error rate climbs is skipped for a while in favour of the secondary providers; both are capped by a
+share of the job's strings so duplicate spend stays bounded
+"""
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ai_translator import WRONG_LENGTH, get_translator
+from metrics import FAILOVERS, HEDGED_REQUESTS
+from scheduler import is_overload_error
+
+
+def parse_provider_keys(value: str) -> List[Tuple[str, str]]:
+    """[(ai_model, api_key), ...] from "Claude:sk-...,Gemini:AI...", raises ValueError for unknown models"""
+    providers = []
+    for item in value.split(","):
+        ai_model, _, api_key = item.strip().partition(":")
+        if not ai_model:
+            continue
+        if not api_key:
+            raise ValueError(f"Missing API key for failover provider {ai_model}")
+        get_translator(ai_model, api_key)
+        providers.append((ai_model, api_key.strip()))
+    return providers
+
+
+class LatencyWindow:
+    """Durations of the last complete answers per provider, shared by all jobs"""
+
+    def __init__(self, size: int = 100):
+        self.size = size
+        self.samples: Dict[str, deque] = {}
+
+    def record(self, provider: str, seconds: float):
+        self.samples.setdefault(provider, deque(maxlen=self.size)).append(seconds)
+
+    def percentile(self, provider: str, fraction: float, min_samples: int) -> Optional[float]:
+        """None until min_samples answers were seen"""
+        samples = self.samples.get(provider)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProviderHealth:
+    """Error rate over the last requests of one provider, a provider past the threshold rests for cooldown seconds"""
+
+    def __init__(self, window: int = 20, threshold: float = 0.5, min_requests: int = 5, cooldown: float = 30.0):
+        self.outcomes = deque(maxlen=window)
+        self.threshold = threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.resting_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.resting_until
+
+    def record(self, ok: bool) -> bool:
+        """Returns True when this outcome made the provider rest"""
+        self.outcomes.append(ok)
+        if len(self.outcomes) < self.min_requests:
+            return False
+        if self.outcomes.count(False) / len(self.outcomes) < self.threshold:
+            return False
+        # After the rest the provider starts with a clean slate and has to fail again to be skipped
+        self.resting_until = time.monotonic() + self.cooldown
+        self.outcomes.clear()
+        return True
+
+
+class HealthRegistry:
+    """ProviderHealth per provider, shared by all jobs so a dead provider is skipped by the next job too"""
+
+    def __init__(self, window: int = 20, threshold: float = 0.5, min_requests: int = 5, cooldown: float = 30.0):
+        self.settings = (window, threshold, min_requests, cooldown)
+        self.providers: Dict[str, ProviderHealth] = {}
+
+    def __getitem__(self, provider: str) -> ProviderHealth:
+        health = self.providers.get(provider)
+        if health is None:
+            health = self.providers[provider] = ProviderHealth(*self.settings)
+        return health
+
+
+class ProviderPool:
+    """Drop-in for a translator's translate_items that hedges slow batches and fails over between providers
+
+    Requests go to the primary translator while it is healthy, otherwise to
+    the first healthy secondary. When a request fails and nothing else is in
+    flight for the batch, the strings it did not deliver go straight to the
+    next provider. When a batch runs longer than hedge_percentile of the
+    provider's recent answers, its undelivered strings are sent a second
+    time, to a secondary when hedge_to_secondary is set and one is healthy.
+    Each string takes the first answer that on_item accepts, the other
+    requests are cancelled once every string has one.
+
+    Hedged strings are capped at hedge_budget and strings sent to
+    secondaries at failover_budget, both as a share of total_strings.
+    Latency and health are kept per provider across jobs, only rate limits,
+    server and network errors count against a provider's health.
+    """
+
+    def __init__(self, primary, secondaries=(), total_strings: int = 0, latency: LatencyWindow = None,
+                 hedge_percentile: Optional[float] = None, hedge_min_samples: int = 10, hedge_min_delay: float = 2.0,
+                 hedge_to_secondary: bool = True, hedge_budget: float = 0.1, failover_budget: float = 1.0,
+                 health: HealthRegistry = None):
+        self.primary = primary
+        self.translators = [primary] + [translator for translator in secondaries if translator.NAME != primary.NAME]
+        self.latency = latency or LatencyWindow()
+        self.hedge_percentile = hedge_percentile  # None turns hedging off
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_to_secondary = hedge_to_secondary
+        self.hedge_allowance = hedge_budget * total_strings
+        self.failover_allowance = failover_budget * total_strings
+        self.health = health or HealthRegistry()
+        self.requests = Counter()  # provider -> requests sent
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.sources: Dict[str, str] = {}  # text -> cache key of the provider whose translation was accepted
+
+    @property
+    def NAME(self) -> str:
+        return self.primary.NAME
+
+    def pick(self, size: int, exclude=()) -> Optional[object]:
+        """First healthy provider not in exclude that the failover budget allows, the primary when none is"""
+        for translator in self.translators:
+            if translator in exclude or not self.health[translator.NAME].healthy:
+                continue
+            if translator is self.primary or size <= self.failover_allowance:
+                return translator
+        return None if self.primary in exclude else self.primary
+
+    def hedge_delay(self, translator) -> Optional[float]:
+        if self.hedge_percentile is None:
+            return None
+        delay = self.latency.percentile(translator.NAME, self.hedge_percentile, self.hedge_min_samples)
+        return None if delay is None else max(delay, self.hedge_min_delay)
+
+    def hedge_target(self, translator, size: int):
+        if size > self.hedge_allowance:
+            return None
+        if self.hedge_to_secondary:
+            secondary = self.pick(size, exclude=(translator,))
+            if secondary is not None and secondary is not translator:
+                return secondary
+        return translator
+
+    async def translate_items(self, texts: List[str], target_lang: str,
+                              on_item: Callable[[int, object], object] = None) -> Tuple[list, Optional[str]]:
+        """Like AITranslator.translate_items over every request sent for the batch
+
+        on_item returning False rejects an element, another request may still
+        fill that string. The reason is None when some request answered
+        completely, otherwise the most telling reason of the requests; when
+        every request failed the first error is raised.
+        """
+        delivered = set()
+        attempts = {}  # asyncio task -> (translator, positions, started, hedge)
+        tried = set()
+        errors = []
+        reasons = []
+        answered = False
+        hedge_delivered = False
+
+        def start(translator, hedge: bool = False):
+            positions = [position for position in range(len(texts)) if position not in delivered]
+            if translator is not self.primary:
+                self.failover_allowance -= len(positions)
+            tried.add(translator)
+            self.requests[translator.NAME] += 1
+
+            def take(index, element):
+                nonlocal hedge_delivered
+                position = positions[index]
+                if position in delivered:
+                    return False
+                if on_item and on_item(position, element) is False:
+                    return False
+                delivered.add(position)
+                self.sources[texts[position]] = translator.cache_key
+                hedge_delivered = hedge_delivered or hedge
+                return True
+
+            task = asyncio.create_task(translator.translate_items([texts[position] for position in positions], target_lang, take))
+            attempts[task] = (translator, positions, time.monotonic(), hedge)
+
+        first = self.pick(len(texts))
+        start(first)
+        hedge_at = self.hedge_delay(first)
+        hedge_at = None if hedge_at is None else time.monotonic() + hedge_at
+
+        try:
+            while attempts:
+                timeout = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    size = len(texts) - len(delivered)
+                    target = self.hedge_target(first, size) if size else None
+                    if target is not None:
+                        self.hedge_allowance -= size
+                        self.hedges_sent += 1
+                        HEDGED_REQUESTS.inc(provider=target.NAME)
+                        start(target, hedge=True)
+                    continue
+
+                failed = None
+                for task in done:
+                    translator, positions, started, hedge = attempts.pop(task)
+                    health = self.health[translator.NAME]
+                    try:
+                        _, reason = task.result()
+                    except Exception as e:
+                        errors.append(e)
+                        failed = translator
+                        # A rejected key or request says nothing about the provider other jobs use
+                        if is_overload_error(e) and health.record(False):
+                            print(f"{translator.NAME} is failing, sending batches to other providers for {health.cooldown:.0f}s")
+                        continue
+                    health.record(True)
+                    if reason is None:
+                        answered = True
+                        self.latency.record(translator.NAME, time.monotonic() - started)
+                    else:
+                        reasons.append(reason)
+
+                if len(delivered) == len(texts):
+                    break
+                if failed is not None and not attempts:
+                    # The last request failed, hand what is left to a provider this batch has not tried
+                    successor = self.pick(len(texts) - len(delivered), exclude=tried)
+                    if successor is not None:
+                        FAILOVERS.inc(source=failed.NAME, target=successor.NAME)
+                        start(successor)
+        finally:
+            for task in attempts:
+                task.cancel()
+            if attempts:
+                await asyncio.gather(*attempts, return_exceptions=True)
+
+        if hedge_delivered:
+            self.hedges_won += 1
+        if len(delivered) == len(texts):
+            return [], None
+        for reason in reasons:
+            if reason.startswith(WRONG_LENGTH):
+                return [], reason
+        if reasons:
+            return [], reasons[-1]
+        if answered:
+            # Complete answers whose remaining elements on_item rejected
+            return [], None
+        raise errors[0]
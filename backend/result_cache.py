@@ -0,0 +1,96 @@
+"""
+Content-addressed cache of whole-jar translation results
+Review payloads and translated jars are stored on disk under a byte budget with LRU eviction
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from typing import Optional
+
+
+def cache_key(*parts: str) -> str:
+    """Stable key for a tuple of strings, e.g. (jar sha256, target_lang, ai_model)"""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Disk cache of review payloads (gzipped JSON) and output jars
+
+    Reads refresh an entry's mtime, which is what evict() uses as the
+    least-recently-used order.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def _touch(self, path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_review(self, key: str) -> Optional[dict]:
+        path = self._path(key, ".review.json.gz")
+        if not self._touch(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Dropping unreadable cache entry {key}: {e}")
+            os.remove(path)
+            return None
+
+    def put_review(self, key: str, payload: dict):
+        path = self._path(key, ".review.json.gz")
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def get_output(self, key: str) -> Optional[str]:
+        path = self._path(key, ".jar")
+        return path if self._touch(path) else None
+
+    def put_output(self, key: str, source_path: str):
+        path = self._path(key, ".jar")
+        temp_path = f"{path}.tmp"
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for filename in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                total -= size
+            except FileNotFoundError:
+                pass
+        if removed:
+            print(f"Result cache: evicted {removed} entries")
+        return removed
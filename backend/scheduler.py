@@ -0,0 +1,196 @@
+"""
+Scheduling for translation work: adaptive batch concurrency and fair job queueing
+"""
+import asyncio
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from ai_translator import TranslationAPIError
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Rate limits, server errors and network failures mean the provider needs a break"""
+    if isinstance(error, TranslationAPIError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, httpx.HTTPError)
+
+
+class AIMDConcurrencyLimiter:
+    """Concurrency limit with additive increase and multiplicative decrease
+
+    The limit grows by about one slot per window of healthy batches, holds
+    while latency is well above its moving baseline and is cut by `backoff`
+    on every 429/5xx or network error. A Retry-After hint pauses new batches.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 16,
+                 backoff: float = 0.5, latency_tolerance: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.latency_baseline = None
+        self.pause_until = 0.0
+
+    @property
+    def window(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def pause_remaining(self) -> float:
+        return max(0.0, self.pause_until - time.monotonic())
+
+    def record_success(self, latency: float):
+        baseline = self.latency_baseline
+        self.latency_baseline = latency if baseline is None else 0.9 * baseline + 0.1 * latency
+        if baseline is None or latency <= baseline * self.latency_tolerance:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def record_failure(self, error: BaseException):
+        if not is_overload_error(error):
+            return
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            self.pause_until = max(self.pause_until, time.monotonic() + retry_after)
+
+
+async def run_sliding_window(jobs: List[Callable[[], Awaitable]], limiter: AIMDConcurrencyLimiter) -> list:
+    """Run jobs with at most limiter.window in flight, starting the next one as soon as a slot frees
+
+    Returns one entry per job in job order, either its result or the exception
+    it raised.
+    """
+    results = [None] * len(jobs)
+    pending = {}  # asyncio task -> (job index, start time)
+    next_job = 0
+
+    async def run(index):
+        return await jobs[index]()
+
+    while next_job < len(jobs) or pending:
+        pause = limiter.pause_remaining()
+        while next_job < len(jobs) and len(pending) < limiter.window and not pause:
+            pending[asyncio.create_task(run(next_job))] = (next_job, time.monotonic())
+            next_job += 1
+
+        if not pending:
+            # Nothing in flight, just sit out the provider's Retry-After
+            await asyncio.sleep(pause)
+            continue
+
+        done, _ = await asyncio.wait(
+            pending,
+            timeout=pause or None,
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            index, started = pending.pop(task)
+            error = task.exception()
+            if error is None:
+                results[index] = task.result()
+                limiter.record_success(time.monotonic() - started)
+            else:
+                results[index] = error
+                limiter.record_failure(error)
+
+    return results
+
+
+class FairTaskQueue:
+    """Bounded job queue that round-robins across providers and, within a provider, across owners
+
+    An owner is whoever pays for the jobs (an API key). At most
+    max_active_per_owner jobs of one owner and max_active_per_provider jobs of
+    one provider run at once, so one user's backlog cannot take every worker
+    or a provider's whole quota.
+    """
+
+    def __init__(self, maxsize: int, max_active_per_owner: int = 1, max_active_per_provider: int = 2):
+        self.maxsize = maxsize
+        self.max_active_per_owner = max_active_per_owner
+        self.max_active_per_provider = max_active_per_provider
+        self.providers = OrderedDict()  # provider -> OrderedDict(owner -> deque of items)
+        self.active_owners = Counter()
+        self.active_providers = Counter()
+        self.size = 0
+        self._wakeup = asyncio.Event()
+
+    def qsize(self) -> int:
+        return self.size
+
+    def active_count(self) -> int:
+        return sum(self.active_providers.values())
+
+    def put_nowait(self, item, provider: str, owner: str):
+        """Queue an item, raises asyncio.QueueFull when maxsize items are waiting"""
+        if self.size >= self.maxsize:
+            raise asyncio.QueueFull
+        self.providers.setdefault(provider, OrderedDict()).setdefault(owner, deque()).append(item)
+        self.size += 1
+        self._wakeup.set()
+
+    def _pop_next(self):
+        for provider, owners in self.providers.items():
+            if self.active_providers[provider] >= self.max_active_per_provider:
+                continue
+            for owner, items in owners.items():
+                if self.active_owners[(provider, owner)] >= self.max_active_per_owner:
+                    continue
+
+                item = items.popleft()
+                self.size -= 1
+                # Rotate so the next pick starts with someone else
+                if items:
+                    owners.move_to_end(owner)
+                else:
+                    del owners[owner]
+                if owners:
+                    self.providers.move_to_end(provider)
+                else:
+                    del self.providers[provider]
+
+                self.active_owners[(provider, owner)] += 1
+                self.active_providers[provider] += 1
+                return item, (provider, owner)
+        return None
+
+    async def get(self):
+        """Wait for the next item that may run, returns (item, lease) for task_done"""
+        while True:
+            picked = self._pop_next()
+            if picked is not None:
+                return picked
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def task_done(self, lease):
+        """Release the provider and owner slots held by a finished item"""
+        provider, owner = lease
+        self.active_owners[(provider, owner)] -= 1
+        if self.active_owners[(provider, owner)] <= 0:
+            del self.active_owners[(provider, owner)]
+        self.active_providers[provider] -= 1
+        if self.active_providers[provider] <= 0:
+            del self.active_providers[provider]
+        self._wakeup.set()
+
+    def dispatch_order(self) -> list:
+        """Waiting items in the order round-robin would start them, ignoring the active limits"""
+        providers = deque(
+            (provider, deque(deque(items) for items in owners.values()))
+            for provider, owners in self.providers.items()
+        )
+        order = []
+        while providers:
+            provider, owners = providers.popleft()
+            items = owners.popleft()
+            order.append(items.popleft())
+            if items:
+                owners.append(items)
+            if owners:
+                providers.append((provider, owners))
+        return order
@@ -0,0 +1,118 @@
+"""
+Classifier deciding which constant pool strings are user-facing text worth translating
+The rules are checked cheapest and most selective first, so most identifiers are rejected after a couple of tests
+"""
+import re
+from functools import lru_cache
+
+# Configuration
+CLASSIFIER_CACHE_SIZE = 65536
+
+# Package/class names, array descriptors, annotations, NBT, hex colors and comments
+SKIP_PREFIXES = (
+    "net.", "com.", "org.",
+    "java.", "javax.", "mojang.",
+    "forge.", "minecraft.", "mixin.",
+    "[", "@", "{", "#",
+)
+
+# File extensions and NBT-like endings
+SKIP_SUFFIXES = (
+    ".class", ".java", ".png", ".json", ".jar",
+    ".properties", ".xml", ".txt", ".cfg", ".lang",
+    ".mcmeta", ".yml", ".yaml", ".toml", ".mod",
+    ".ogg", ".wav", ".nbt", ".dat",
+    "}",
+)
+
+# Class file attribute names, Java keywords and common variables
+SKIP_WORDS = frozenset([
+    "Code", "LineNumberTable", "LocalVariableTable", "SourceFile", "Signature",
+    "InnerClasses", "EnclosingMethod", "Exceptions", "ConstantValue", "Deprecated",
+    "RuntimeVisibleAnnotations", "StackMapTable", "BootstrapMethods", "MethodParameters",
+    "this", "super", "null", "true", "false", "void", "int", "boolean", "String",
+])
+
+# Paths and inner classes
+SKIP_CHARS = re.compile(r"[/\\$]")
+# Needed by a string without spaces to look like a sentence
+SENTENCE_PUNCTUATION = re.compile(r"[.!?]")
+
+# ASCII shortcuts, str.isalpha/islower/isupper/isdigit are Unicode-aware so other text takes the slow path
+ASCII_TWO_LETTERS = re.compile(r"[A-Za-z][^A-Za-z]*[A-Za-z]")
+ASCII_CAMEL_CASE = re.compile(r"[a-z][A-Z]")
+ASCII_DIGIT = re.compile(r"[0-9]")
+
+
+def has_two_letters(text: str) -> bool:
+    if text.isascii():
+        return ASCII_TWO_LETTERS.search(text) is not None
+    letters = 0
+    for c in text:
+        if c.isalpha():
+            letters += 1
+            if letters == 2:
+                return True
+    return False
+
+
+def is_camel_case(text: str) -> bool:
+    if text.isascii():
+        return ASCII_CAMEL_CASE.search(text) is not None
+    return any(a.islower() and b.isupper() for a, b in zip(text, text[1:]))
+
+
+def has_digit(text: str) -> bool:
+    if text.isascii():
+        return ASCII_DIGIT.search(text) is not None
+    return any(c.isdigit() for c in text)
+
+
+@lru_cache(maxsize=CLASSIFIER_CACHE_SIZE)
+def should_translate(text: str) -> bool:
+    """Check if text should be translated - STRICT: only obvious user messages"""
+    if not text or len(text) < 4:  # Minimum 4 characters
+        return False
+
+    # Must read like a sentence: contain a space, or start with a capital and carry punctuation
+    has_space = " " in text
+    if not has_space and not (text[0].isupper() and SENTENCE_PUNCTUATION.search(text)):
+        return False
+
+    # Must contain at least 2 letters (to skip single letter + numbers)
+    if not has_two_letters(text):
+        return False
+
+    # Java internals, paths and other technical strings
+    if text.startswith(SKIP_PREFIXES) or text.endswith(SKIP_SUFFIXES):
+        return False
+    if SKIP_CHARS.search(text):
+        return False
+    if "<" in text and ">" in text:  # Generics/HTML, <init> and <clinit>
+        return False
+    if text[0] == "(" and ")" in text:  # Method descriptors
+        return False
+    if text[0] == "L" and text[-1] == ";":  # Type descriptors
+        return False
+    if has_space:
+        return True
+
+    # Single tokens: keywords, naming conventions, resource locations and versions
+    if text in SKIP_WORDS:
+        return False
+    if ":" in text or "=" in text:  # namespace:path, assignments
+        return False
+    if text.islower():  # snake_case and single lowercase words
+        return False
+    if text.isupper() and ("_" in text or len(text) < 20):  # CONSTANT_CASE, all caps
+        return False
+    if is_camel_case(text):
+        return False
+    if "." in text and has_digit(text):  # Version numbers
+        return False
+    return True
+
+
+def should_translate_lang(text: str) -> bool:
+    """Lang file values are user-facing by definition, only text without words (e.g. "%s") is skipped"""
+    return has_two_letters(text)
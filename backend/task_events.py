@@ -0,0 +1,145 @@
+"""
+Per-task event streams for server-sent events
+Every task keeps a short history of numbered events so a client that reconnects with
+Last-Event-ID only receives what it missed, older gaps are answered with a snapshot
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Optional
+
+# Event ids are "<epoch>-<sequence>", ids from before a restart fall back to a snapshot
+EPOCH = format(int(time.time()), "x")
+
+
+def format_event(event: str, data: dict, event_id: str = None) -> str:
+    """One event in the text/event-stream wire format"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+def parse_event_id(value: Optional[str]) -> Optional[int]:
+    """Sequence number from a Last-Event-ID issued by this process, None otherwise"""
+    if not value:
+        return None
+    epoch, _, sequence = value.partition("-")
+    if epoch != EPOCH or not sequence.isdigit():
+        return None
+    return int(sequence)
+
+
+class TaskChannel:
+    def __init__(self, history_size: int):
+        self.sequence = 0
+        self.history: deque = deque(maxlen=history_size)  # (sequence, event name, data)
+        self.changed = asyncio.Event()
+        self.last_data: Dict[str, dict] = {}
+
+    def publish(self, event: str, data: dict):
+        self.sequence += 1
+        self.history.append((self.sequence, event, data))
+        # Wake every waiting subscriber, later waits use a fresh event
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def since(self, sequence: int) -> Optional[list]:
+        """Events after sequence, None when some of them already fell out of the history"""
+        if sequence > self.sequence:
+            return None
+        if self.history and sequence < self.history[0][0] - 1:
+            return None
+        return [entry for entry in self.history if entry[0] > sequence]
+
+
+class TaskEventHub:
+    """Fan-out of task events to any number of SSE subscribers
+
+    publish() must be called from the event loop thread. Identical
+    consecutive events of a kind are dropped, so saving a task without
+    changing what clients see costs nothing.
+    """
+
+    def __init__(self, history_size: int = 256, heartbeat: float = 15.0):
+        self.history_size = history_size
+        self.heartbeat = heartbeat
+        self.channels: Dict[str, TaskChannel] = {}
+
+    def channel(self, task_id: str) -> TaskChannel:
+        channel = self.channels.get(task_id)
+        if channel is None:
+            channel = self.channels[task_id] = TaskChannel(self.history_size)
+        return channel
+
+    def publish(self, task_id: str, event: str, data: dict):
+        channel = self.channel(task_id)
+        if channel.last_data.get(event) == data:
+            return
+        channel.last_data[event] = data
+        channel.publish(event, data)
+
+    def prune(self, keep: Callable[[str], bool]) -> int:
+        """Drop the channels of tasks that no longer exist"""
+        stale = [task_id for task_id in self.channels if not keep(task_id)]
+        for task_id in stale:
+            channel = self.channels.pop(task_id)
+            channel.changed.set()
+        return len(stale)
+
+    async def stream(self, task_id: str, last_event_id: Optional[str], snapshot: Callable[[], dict],
+                     is_finished: Callable[[dict], bool], idle: Callable[[], Optional[dict]] = None) -> AsyncIterator[str]:
+        """Yield SSE frames for a task until it reaches a finished state
+
+        snapshot() returns the task's current state, sent first when the
+        client has no usable Last-Event-ID. idle() may return extra data
+        (e.g. the queue position) sent as an "idle" event on heartbeats.
+        """
+        channel = self.channel(task_id)
+        sequence = parse_event_id(last_event_id)
+        missed = channel.since(sequence) if sequence is not None else None
+
+        if missed is None:
+            state = snapshot()
+            yield format_event("snapshot", state, f"{EPOCH}-{channel.sequence}")
+            if is_finished(state):
+                return
+            sequence = channel.sequence
+        else:
+            for entry_sequence, event, data in missed:
+                yield format_event(event, data, f"{EPOCH}-{entry_sequence}")
+                if event == "state" and is_finished(data):
+                    return
+            sequence = channel.sequence
+            state = snapshot()
+            if is_finished(state):
+                yield format_event("snapshot", state, f"{EPOCH}-{sequence}")
+                return
+
+        while self.channels.get(task_id) is channel:
+            # Events published while the last frames were sent are picked up without waiting
+            if channel.sequence == sequence:
+                try:
+                    await asyncio.wait_for(channel.changed.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    extra = idle() if idle else None
+                    yield format_event("idle", extra) if extra else ": keepalive\n\n"
+                    continue
+
+            missed = channel.since(sequence)
+            if missed is None:
+                # Fell behind the history, start over from the current state
+                state = snapshot()
+                yield format_event("snapshot", state, f"{EPOCH}-{channel.sequence}")
+                if is_finished(state):
+                    return
+                sequence = channel.sequence
+                continue
+            for entry_sequence, event, data in missed:
+                yield format_event(event, data, f"{EPOCH}-{entry_sequence}")
+                sequence = entry_sequence
+                if event == "state" and is_finished(data):
+                    return
@@ -0,0 +1,331 @@
+"""
+Persistent store for bytecode translation tasks
+Status records stay in memory for fast polling and are written to SQLite after every state change,
+large payloads (translation pairs) live only in SQLite, one row per pair so reviews can be paged,
+next to the spilled string indexes of tasks in review
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+ACTIVE_STATUSES = ("queued", "processing")
+TERMINAL_STATUSES = ("review", "completed", "failed")  # Nothing calls the provider after these
+
+# Orderings accepted when paging review pairs
+REVIEW_SORTS = {
+    "index": "pair_index",
+    "occurrences": "occurrences DESC, pair_index",
+    "original": "original, pair_index",
+}
+
+# Fields of the status record shown in task listings
+SUMMARY_FIELDS = (
+    "task_id", "kind", "status", "filename", "jar_count", "target_lang", "ai_model", "progress", "error",
+    "total_strings", "changed_strings", "from_cache", "created_at", "updated_at",
+)
+
+
+class TaskStore:
+    """Task status records backed by SQLite, with TTL and size-based eviction
+
+    Records are plain dicts that callers update in place (progress, ETA, ...)
+    and persist with save() when the task changes state. save() serializes
+    the record right away, the SQLite writes of everything saved meanwhile
+    happen together in a thread so the event loop never waits on disk.
+    Tasks survive a restart, but the API key is never written to disk: it
+    stays in memory while a task may still call the provider and is wiped
+    once it reaches review, completed or failed, so an unfinished task has
+    to be uploaded again after a restart.
+    """
+
+    def __init__(self, db_path: str, ttl: float, max_tasks: int):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_tasks = max_tasks
+        self.tasks: Dict[str, dict] = {}
+        self.listeners: List[Callable[[str, dict], None]] = []  # Called with (task_id, record) after every save
+        self.pending: Dict[str, tuple] = {}  # task_id -> row not written yet
+        self.flusher: Optional[asyncio.Task] = None
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    record TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_pairs (
+                    task_id TEXT NOT NULL REFERENCES tasks (task_id) ON DELETE CASCADE,
+                    pair_index INTEGER NOT NULL,
+                    original TEXT NOT NULL,
+                    translated TEXT NOT NULL,
+                    occurrences INTEGER NOT NULL,
+                    changed INTEGER NOT NULL,
+                    PRIMARY KEY (task_id, pair_index)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_indexes (
+                    task_id TEXT PRIMARY KEY REFERENCES tasks (task_id) ON DELETE CASCADE,
+                    data BLOB NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks (updated_at)")
+            rows = conn.execute("SELECT task_id, record FROM tasks").fetchall()
+        for task_id, record in rows:
+            self.tasks[task_id] = json.loads(record)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.tasks
+
+    def __getitem__(self, task_id: str) -> dict:
+        return self.tasks[task_id]
+
+    def get(self, task_id: str) -> Optional[dict]:
+        return self.tasks.get(task_id)
+
+    def next_counter(self, prefix: str) -> int:
+        """First free number for task ids of the form <prefix>_<n>, so ids stay unique across restarts"""
+        numbers = [
+            int(task_id[len(prefix) + 1:]) for task_id in self.tasks
+            if task_id.startswith(prefix + "_") and task_id[len(prefix) + 1:].isdigit()
+        ]
+        return max(numbers, default=-1) + 1
+
+    def create(self, task_id: str, record: dict) -> dict:
+        now = time.time()
+        record.setdefault("task_id", task_id)
+        record.setdefault("created_at", now)
+        self.tasks[task_id] = record
+        self.save(task_id)
+        return record
+
+    def save(self, task_id: str):
+        """Persist a task's current status record, call after every state change
+
+        Inside a running event loop the write happens shortly after in a
+        thread, await flush() to wait for it. Without one it happens now.
+        """
+        record = self.tasks[task_id]
+        record["updated_at"] = time.time()
+        if record.get("status") in TERMINAL_STATUSES:
+            record["api_key"] = ""
+        self.pending[task_id] = self._row(task_id)
+        for listener in self.listeners:
+            listener(task_id, record)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self.flusher is not None and not self.flusher.done():
+            return  # The running flusher picks up what was saved meanwhile
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            with self._connect() as conn:
+                self._write_rows(conn, self._take_pending())
+            return
+        self.flusher = loop.create_task(self._flush_pending())
+
+    def _row(self, task_id: str) -> tuple:
+        record = self.tasks[task_id]
+        stored = {key: value for key, value in record.items() if key != "api_key"}
+        return (task_id, record.get("status", ""), record["created_at"], record["updated_at"],
+                json.dumps(stored, ensure_ascii=False))
+
+    def _take_pending(self) -> List[tuple]:
+        rows = list(self.pending.values())
+        self.pending.clear()
+        return rows
+
+    def _write_rows(self, conn, rows: List[tuple]):
+        conn.executemany(
+            "INSERT INTO tasks (task_id, status, created_at, updated_at, record) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (task_id) DO UPDATE SET status = excluded.status, "
+            "updated_at = excluded.updated_at, record = excluded.record "
+            "WHERE excluded.updated_at >= tasks.updated_at",
+            rows
+        )
+
+    def _write_batch(self, rows: List[tuple]):
+        with self._connect() as conn:
+            self._write_rows(conn, rows)
+
+    async def _flush_pending(self):
+        # One flusher at a time, rows written meanwhile by set_payload are protected by updated_at
+        while self.pending:
+            await asyncio.to_thread(self._write_batch, self._take_pending())
+
+    async def flush(self):
+        """Wait until every saved record is written, e.g. before shutting down"""
+        self._schedule_flush()
+        if self.flusher is not None:
+            await self.flusher
+
+    async def set_payload(self, task_id: str, translation_pairs: List[dict]):
+        """Replace the review pairs of a task, written in a thread like the task rows"""
+        # The pairs reference the task row, which may still be waiting for the flusher
+        await asyncio.to_thread(self._write_payload, task_id, self._row(task_id), translation_pairs)
+
+    def _write_payload(self, task_id: str, row: tuple, translation_pairs: List[dict]):
+        with self._connect() as conn:
+            self._write_rows(conn, [row])
+            conn.execute("DELETE FROM task_pairs WHERE task_id = ?", (task_id,))
+            conn.executemany(
+                "INSERT INTO task_pairs (task_id, pair_index, original, translated, occurrences, changed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (task_id, pair["index"], pair["original"], pair["translated"],
+                     pair["occurrences"], int(pair["changed"]))
+                    for pair in translation_pairs
+                ]
+            )
+
+    async def set_index(self, task_id: str, data: bytes):
+        """Keep an encoded string index with the task, it goes away when the task is evicted"""
+        await asyncio.to_thread(self._write_index, task_id, data)
+
+    def _write_index(self, task_id: str, data: bytes):
+        with self._connect() as conn:
+            # Skipped when the task was evicted meanwhile
+            conn.execute(
+                "INSERT OR REPLACE INTO task_indexes (task_id, data) "
+                "SELECT ?, ? WHERE EXISTS (SELECT 1 FROM tasks WHERE task_id = ?)",
+                (task_id, data, task_id)
+            )
+
+    async def get_index(self, task_id: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read_index, task_id)
+
+    def _read_index(self, task_id: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM task_indexes WHERE task_id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    async def delete_index(self, task_id: str):
+        await asyncio.to_thread(self._delete_index, task_id)
+
+    def _delete_index(self, task_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM task_indexes WHERE task_id = ?", (task_id,))
+
+    def get_payload(self, task_id: str) -> List[dict]:
+        """All review pairs of a task in index order"""
+        return self.review_pairs(task_id, limit=None)[1]
+
+    def review_pairs(self, task_id: str, offset: int = 0, limit: Optional[int] = 100, changed_only: bool = False,
+                     search: str = "", sort: str = "index") -> Tuple[int, List[dict]]:
+        """One page of review pairs, returns (total matching, page)
+
+        search matches a substring of the original or the translation.
+        """
+        where = "task_id = ?"
+        params = [task_id]
+        if changed_only:
+            where += " AND changed = 1"
+        if search:
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where += " AND (original LIKE ? ESCAPE '\\' OR translated LIKE ? ESCAPE '\\')"
+            params += [pattern, pattern]
+        order = REVIEW_SORTS.get(sort, REVIEW_SORTS["index"])
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM task_pairs WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT pair_index, original, translated, occurrences, changed FROM task_pairs "
+                f"WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [-1 if limit is None else limit, offset]
+            ).fetchall()
+        return total, [
+            {"index": index, "original": original, "translated": translated,
+             "occurrences": occurrences, "changed": bool(changed)}
+            for index, original, translated, occurrences, changed in rows
+        ]
+
+    def pairs_by_index(self, task_id: str, indices) -> Dict[int, Tuple[str, str]]:
+        """{index: (original, translated)} for the requested pair indices that exist"""
+        indices = sorted(set(indices))
+        pairs = {}
+        with self._connect() as conn:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(indices), 500):
+                chunk = indices[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT pair_index, original, translated FROM task_pairs "
+                    f"WHERE task_id = ? AND pair_index IN ({','.join('?' * len(chunk))})",
+                    [task_id] + chunk
+                ).fetchall()
+                for index, original, translated in rows:
+                    pairs[index] = (original, translated)
+        return pairs
+
+    def changed_pairs(self, task_id: str) -> Dict[int, Tuple[str, str]]:
+        """{index: (original, translated)} for every pair whose translation differs from the original"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT pair_index, original, translated FROM task_pairs WHERE task_id = ? AND changed = 1",
+                (task_id,)
+            ).fetchall()
+        return {index: (original, translated) for index, original, translated in rows}
+
+    def unfinished(self) -> Iterator[Tuple[str, dict]]:
+        """Tasks that were queued or processing, e.g. when the server went down"""
+        for task_id, record in list(self.tasks.items()):
+            if record.get("status") in ACTIVE_STATUSES:
+                yield task_id, record
+
+    def list_summaries(self, offset: int = 0, limit: int = 50, status: str = None) -> Tuple[int, List[dict]]:
+        """Newest first page of task summaries, returns (total matching, page)"""
+        records = [
+            record for record in self.tasks.values()
+            if status is None or record.get("status") == status
+        ]
+        records.sort(key=lambda record: record.get("created_at", 0), reverse=True)
+        page = [
+            {field: record[field] for field in SUMMARY_FIELDS if field in record}
+            for record in records[offset:offset + limit]
+        ]
+        return len(records), page
+
+    async def evict(self) -> int:
+        """Drop finished tasks not updated within ttl, then the oldest finished ones beyond max_tasks"""
+        cutoff = time.time() - self.ttl
+        finished = sorted(
+            (record.get("updated_at", 0), task_id)
+            for task_id, record in self.tasks.items()
+            if record.get("status") not in ACTIVE_STATUSES
+        )
+        excess = len(self.tasks) - self.max_tasks
+        expired = []
+        for updated_at, task_id in finished:
+            if updated_at < cutoff or len(expired) < excess:
+                expired.append(task_id)
+        if not expired:
+            return 0
+
+        for task_id in expired:
+            del self.tasks[task_id]
+            self.pending.pop(task_id, None)
+        await asyncio.to_thread(self._delete_rows, expired)
+        return len(expired)
+
+    def _delete_rows(self, task_ids: List[str]):
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM tasks WHERE task_id = ?", [(task_id,) for task_id in task_ids])
@@ -0,0 +1,124 @@
+"""
+Persistent translation memory shared across tasks
+Stored in a local SQLite file, keyed by normalized source text, target language and provider/model
+"""
+import hashlib
+import sqlite3
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+SQLITE_MAX_VARIABLES = 900  # Stay below SQLite's default bound parameter limit
+
+
+def normalize_source(text: str) -> str:
+    """Normalize source text so equivalent Unicode spellings share an entry"""
+    return unicodedata.normalize("NFC", text)
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha1(normalize_source(text).encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """Translation cache with age- and size-based eviction
+    
+    Every operation opens its own short-lived connection, so the methods are
+    safe to call from worker threads via asyncio.to_thread.
+    """
+    
+    def __init__(self, db_path: str, max_entries: int, max_age: float):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                    source_hash TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    translated TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (source_hash, target_lang, provider)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+    
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def lookup(self, texts: Iterable[str], target_lang: str, provider: str) -> Dict[str, str]:
+        """Return {text: translation} for every text that is in the memory"""
+        by_hash = {}
+        for text in texts:
+            by_hash.setdefault(source_hash(text), []).append(text)
+        if not by_hash:
+            return {}
+        
+        found = {}
+        now = time.time()
+        hashes = list(by_hash)
+        with self._connect() as conn:
+            for i in range(0, len(hashes), SQLITE_MAX_VARIABLES):
+                chunk = hashes[i:i + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT source_hash, translated FROM translations "
+                    f"WHERE target_lang = ? AND provider = ? AND source_hash IN ({placeholders})",
+                    [target_lang, provider, *chunk]
+                ).fetchall()
+                for hash_value, translated in rows:
+                    for text in by_hash[hash_value]:
+                        found[text] = translated
+                conn.execute(
+                    f"UPDATE translations SET last_used = ? "
+                    f"WHERE target_lang = ? AND provider = ? AND source_hash IN ({placeholders})",
+                    [now, target_lang, provider, *chunk]
+                )
+        return found
+    
+    def store(self, pairs: List[Tuple[str, str]], target_lang: str, provider: str):
+        """Remember (source, translated) pairs from a successful translation"""
+        if not pairs:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO translations "
+                "(source_hash, target_lang, provider, source, translated, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source_hash, target_lang, provider) "
+                "DO UPDATE SET translated = excluded.translated, last_used = excluded.last_used",
+                [
+                    (source_hash(source), target_lang, provider, normalize_source(source), translated, now, now)
+                    for source, translated in pairs
+                ]
+            )
+        self.evict()
+    
+    def evict(self) -> int:
+        """Drop entries not used within max_age, then the least recently used beyond max_entries"""
+        with self._connect() as conn:
+            removed = conn.execute(
+                "DELETE FROM translations WHERE last_used < ?",
+                (time.time() - self.max_age,)
+            ).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                ).rowcount
+        return removed
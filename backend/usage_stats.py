@@ -0,0 +1,99 @@
+"""
+Usage statistics kept in memory and flushed to stats.json in the background
+Totals stay at the top level of the file ({"visits": n, "usage": n}) so older files keep loading
+"""
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional
+
+
+def today() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+
+class UsageStats:
+    """Counters for visits and translation usage, with per-day and per-provider buckets
+
+    increment() only touches memory. flush() writes the file when something
+    changed, by replacing it atomically where possible.
+    """
+
+    def __init__(self, path: str, keep_days: int = 90):
+        self.path = path
+        self.keep_days = keep_days
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.stats = self._load()
+
+    def _load(self) -> dict:
+        stats = {"visits": 0, "usage": 0, "daily": {}, "providers": {}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stats.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Could not read {self.path}, starting with empty stats: {e}")
+            # Keep the unreadable file around instead of overwriting it on the next flush
+            try:
+                shutil.copyfile(self.path, self.path + ".corrupt")
+            except OSError:
+                pass
+        return stats
+
+    def increment(self, key: str, provider: Optional[str] = None):
+        with self.lock:
+            stats = self.stats
+            stats[key] = stats.get(key, 0) + 1
+            day = stats["daily"].setdefault(today(), {})
+            day[key] = day.get(key, 0) + 1
+            if provider:
+                providers = stats["providers"].setdefault(provider, {})
+                providers[key] = providers.get(key, 0) + 1
+            self.dirty = True
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+    def _prune_days(self):
+        cutoff = (datetime.datetime.now(datetime.timezone.utc).date()
+                  - datetime.timedelta(days=self.keep_days)).isoformat()
+        for day in [day for day in self.stats["daily"] if day < cutoff]:
+            del self.stats["daily"][day]
+
+    def flush(self) -> bool:
+        """Write the counters if they changed since the last flush, returns whether it wrote"""
+        with self.lock:
+            if not self.dirty:
+                return False
+            self._prune_days()
+            data = json.dumps(self.stats, ensure_ascii=False)
+            self.dirty = False
+
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".stats-", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError:
+                os.remove(tmp_path)
+                # A file bind-mounted into a container cannot be replaced, rewrite it in place
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            with self.lock:
+                self.dirty = True
+            print(f"Failed to write {self.path}: {e}")
+            return False
+        return True
@@ -40,7 +40,7 @@ export const messages = {
         lang: {
             title: "Language File Translator",
             info_title: "Smart Token Management & JAR Support",
-            info_desc: "Supports .json, .lang, and .jar files. JAR files are automatically unpacked to extract language files from assets/*/lang/. Files are split into optimal batches based on AI model limits to prevent API errors.",
+            info_desc: "Supports .json, .lang, and .jar files. JAR files are translated on the server: the en_us files in assets/*/lang/ are translated and added to the jar or written as a resource pack, and the job keeps running if you close this page. Files are split into optimal batches based on AI model limits to prevent API errors.",
             upload: "Upload Language Files",
             upload_hint: "Supports .json, .lang, and .jar files",
             select_lang: "Target Language",
@@ -74,7 +74,10 @@ export const messages = {
             deselect_all: "Deselect All",
             confirm_selection: "Confirm",
             cancel_selection: "Cancel",
-            no_files_selected: "Please select at least one file"
+            no_files_selected: "Please select at least one file",
+            output_format: "Output",
+            output_jar: "Translated JAR",
+            output_resourcepack: "Resource pack (.zip)"
         },
         bytecode: {
             title: "Bytecode Translator",
@@ -101,12 +104,22 @@ export const messages = {
             confirm_clear: "Remove all files? This will not cancel processing tasks.",
             empty_state: "Upload JAR files to start bytecode translation",
             review_title: "Review Translations",
+            failed_strings: "{{count}} strings could not be translated and keep their original text",
             selected: "selected",
             show_review: "Show Details",
             hide_review: "Hide Details",
             apply_translations: "Apply Selected",
             reject_all: "Reject All",
-            confirm_reject: "Are you sure you want to reject all translations and start over?"
+            confirm_reject: "Are you sure you want to reject all translations and start over?",
+            include_annotations: "Also translate annotation string values",
+            modpack_mode: "Translate all files as one modpack (jars or a zip of jars, shared strings translated once)",
+            search: "Search...",
+            changed_only: "Changed only",
+            sort_index: "Jar order",
+            sort_occurrences: "Most used",
+            sort_original: "Alphabetical",
+            previous_page: "Previous",
+            next_page: "Next"
         },
         stats: {
             title: "Statistics",
@@ -116,7 +129,9 @@ export const messages = {
             info_visits: "Total visits counts every page load",
             info_usage: "Usage counts bytecode translation tasks only",
             info_lang: "Language file translations are processed in your browser",
-            refresh: "Refresh Stats"
+            refresh: "Refresh Stats",
+            today: "Today (UTC)",
+            providers: "Usage by AI Model"
         },
         notfound: {
             title: "System Error: Page Not Found",
@@ -165,7 +180,7 @@ export const messages = {
         lang: {
             title: "语言文件翻译器",
             info_title: "智能Token管理 & JAR支持",
-            info_desc: "支持 .json、.lang 和 .jar 文件。JAR 文件会自动解包，提取 assets/*/lang/ 中的语言文件。文件会根据 AI 模型限制自动分批处理，防止 API 错误。",
+            info_desc: "支持 .json、.lang 和 .jar 文件。JAR 文件在服务器上翻译：assets/*/lang/ 中的 en_us 文件会被翻译并加入 JAR，或生成资源包，关闭页面后任务仍会继续。文件会根据 AI 模型限制自动分批处理，防止 API 错误。",
             upload: "上传语言文件",
             upload_hint: "支持 .json、.lang 和 .jar 文件",
             select_lang: "目标语言",
@@ -199,7 +214,10 @@ export const messages = {
             deselect_all: "取消全选",
             confirm_selection: "确认",
             cancel_selection: "取消",
-            no_files_selected: "请至少选择一个文件"
+            no_files_selected: "请至少选择一个文件",
+            output_format: "输出",
+            output_jar: "翻译后的 JAR",
+            output_resourcepack: "资源包 (.zip)"
         },
         bytecode: {
             title: "字节码翻译器",
@@ -226,12 +244,22 @@ export const messages = {
             confirm_clear: "删除所有文件？这不会取消正在处理的任务。",
             empty_state: "上传 JAR 文件开始字节码翻译",
             review_title: "审查翻译结果",
+            failed_strings: "{{count}} 个字符串未能翻译，保留原文",
             selected: "已选",
             show_review: "显示详情",
             hide_review: "隐藏详情",
             apply_translations: "应用所选",
             reject_all: "全部拒绝",
-            confirm_reject: "确定要拒绝所有翻译并重新开始吗？"
+            confirm_reject: "确定要拒绝所有翻译并重新开始吗？",
+            include_annotations: "同时翻译注解中的字符串值",
+            modpack_mode: "将所有文件作为一个整合包翻译（JAR 或包含 JAR 的 zip，共用字符串只翻译一次）",
+            search: "搜索...",
+            changed_only: "仅显示已改动",
+            sort_index: "按 JAR 顺序",
+            sort_occurrences: "按出现次数",
+            sort_original: "按字母顺序",
+            previous_page: "上一页",
+            next_page: "下一页"
         },
         stats: {
             title: "统计信息",
@@ -241,7 +269,9 @@ export const messages = {
             info_visits: "总访问量统计每次页面加载",
             info_usage: "使用次数仅统计字节码翻译任务",
             info_lang: "语言文件翻译在浏览器中处理",
-            refresh: "刷新统计"
+            refresh: "刷新统计",
+            today: "今日 (UTC)",
+            providers: "各 AI 模型使用次数"
         },
         notfound: {
             title: "系统错误：页面未找到",
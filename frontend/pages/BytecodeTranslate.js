@@ -15,7 +15,7 @@ export default {
 
                 <div>
                     <label class="block text-sm text-cyber-primary mb-1 font-pixel text-xs">{{ $t('bytecode.upload') }}</label>
-                    <input ref="fileInput" type="file" multiple accept=".jar" @change="handleFiles" :disabled="processing" class="block w-full text-sm text-gray-400 file:mr-4 file:py-2 file:px-4 file:rounded-none file:border-0 file:text-sm file:font-semibold file:bg-cyber-primary file:text-black hover:file:bg-white hover:file:text-cyber-primary transition disabled:opacity-50 font-tech cursor-pointer"/>
+                    <input ref="fileInput" type="file" multiple :accept="modpackMode ? '.jar,.zip' : '.jar'" @change="handleFiles" :disabled="processing" class="block w-full text-sm text-gray-400 file:mr-4 file:py-2 file:px-4 file:rounded-none file:border-0 file:text-sm file:font-semibold file:bg-cyber-primary file:text-black hover:file:bg-white hover:file:text-cyber-primary transition disabled:opacity-50 font-tech cursor-pointer"/>
                 </div>
                 <div>
                     <label class="block text-sm text-cyber-primary mb-1 font-pixel text-xs">{{ $t('bytecode.select_lang') }}</label>
@@ -43,6 +43,16 @@ export default {
                     <label class="block text-sm text-cyber-primary mb-1 font-pixel text-xs">{{ $t('lang.api_key') }}</label>
                     <input v-model="apiKey" type="password" :disabled="processing" placeholder="sk-..." class="w-full bg-black/50 border border-cyber-primary/30 rounded-none p-2 text-white placeholder-gray-600 disabled:opacity-50 focus:border-cyber-primary focus:ring-1 focus:ring-cyber-primary outline-none font-mono"/>
                 </div>
+                <div class="md:col-span-4">
+                    <label class="inline-flex items-center gap-2 text-sm text-gray-400 font-tech cursor-pointer">
+                        <input v-model="includeAnnotations" type="checkbox" :disabled="processing" class="w-4 h-4 accent-cyber-secondary cursor-pointer"/>
+                        {{ $t('bytecode.include_annotations') }}
+                    </label>
+                    <label class="inline-flex items-center gap-2 text-sm text-gray-400 font-tech cursor-pointer ml-6">
+                        <input v-model="modpackMode" type="checkbox" :disabled="processing" class="w-4 h-4 accent-cyber-secondary cursor-pointer"/>
+                        {{ $t('bytecode.modpack_mode') }}
+                    </label>
+                </div>
             </div>
 
             <!-- Action Buttons -->
@@ -88,11 +98,21 @@ export default {
                         </div>
                         <p class="text-xs text-gray-500 mt-1 font-mono">
                             <span v-if="file.progress > 0">{{ file.progress }}% - </span>
-                            <span v-if="file.currentBatch && file.totalBatches">Batch {{ file.currentBatch }}/{{ file.totalBatches }}</span>
+                            <span v-if="file.stringsTotal">{{ file.stringsDone }}/{{ file.stringsTotal }} strings</span>
+                            <span v-else-if="file.currentBatch && file.totalBatches">Batch {{ file.currentBatch }}/{{ file.totalBatches }}</span>
                             <span v-if="file.etaSeconds > 0"> - ETA: {{ formatETA(file.etaSeconds) }}</span>
-                            <span v-if="!file.currentBatch"> - {{ file.statusMessage || (file.status === 'queued' ? 'Waiting in queue...' : 'Processing...') }}</span>
+                            <span v-if="!file.currentBatch && !file.stringsDone"> - {{ file.statusMessage || (file.status === 'queued' ? 'Waiting in queue...' : 'Processing...') }}</span>
                         </p>
                     </div>
+                    <div v-if="file.isPack && file.jars.length > 0 && file.status !== 'pending'" class="mt-2 pl-2 max-h-40 overflow-y-auto space-y-1">
+                        <div v-for="jar in file.jars" :key="jar.name" class="flex items-center gap-2 text-xs font-mono">
+                            <span class="flex-1 truncate text-gray-400">{{ jar.name }}</span>
+                            <span class="text-gray-600">{{ jar.status }}</span>
+                            <div class="w-24 bg-black h-1 border border-gray-700">
+                                <div class="bg-cyber-secondary h-full transition-all duration-300" :style="{width: jar.progress + '%'}"></div>
+                            </div>
+                        </div>
+                    </div>
                     <div v-if="file.status === 'failed'" class="mt-2 pl-2">
                         <p class="text-xs text-red-400 font-mono">{{ file.errorMessage }}</p>
                         <button @click="retryFile(file.id)" class="mt-2 bg-yellow-600 text-white px-4 py-2 rounded-none hover:bg-yellow-700 transition text-sm font-pixel text-xs">
@@ -105,7 +125,7 @@ export default {
                         <div class="bg-cyber-dark/50 border border-cyber-secondary/30 rounded p-3">
                             <div class="flex justify-between items-center mb-2">
                                 <p class="text-cyber-secondary font-pixel text-xs">
-                                    {{ $t('bytecode.review_title') }}: {{ Object.keys(file.selectedTranslations || {}).length }}/{{ (file.translationPairs || []).length }} {{ $t('bytecode.selected') }}
+                                    {{ $t('bytecode.review_title') }}: {{ selectedCount(file) }}/{{ file.totalStrings }} {{ $t('bytecode.selected') }}
                                 </p>
                                 <div class="flex gap-2">
                                     <button @click="toggleReview(file.id)" class="text-xs text-cyber-primary hover:text-white transition font-tech">
@@ -119,32 +139,68 @@ export default {
                                     </button>
                                 </div>
                             </div>
+                            <p v-if="file.failedStrings" class="text-xs text-yellow-400 font-mono" :title="formatFailureReasons(file)">
+                                {{ $t('bytecode.failed_strings', { count: file.failedStrings }) }}
+                            </p>
                             
-                            <div v-if="file.showReview" class="mt-3 max-h-96 overflow-y-auto space-y-2 border-t border-gray-700 pt-2">
-                                <div v-for="(pair, index) in file.translationPairs" :key="index" 
-                                     class="flex items-start gap-2 p-2 bg-black/30 rounded hover:bg-black/50 transition">
-                                    <input 
-                                        type="checkbox"
-                                        :id="'trans-' + file.id + '-' + index"
-                                        v-model="file.selectedTranslations[pair.original]"
-                                        :true-value="pair.translated"
-                                        :false-value="undefined"
-                                        class="mt-1 w-4 h-4 accent-cyber-secondary cursor-pointer flex-shrink-0"
-                                    />
-                                    <label :for="'trans-' + file.id + '-' + index" class="flex-1 cursor-pointer">
-                                        <div class="text-gray-400 text-xs font-mono mb-1">
-                                            <span class="text-gray-600">原文:</span> {{ pair.original }}
-                                        </div>
-                                        <div class="text-cyber-secondary text-xs font-mono">
-                                            <span class="text-gray-600">译文:</span> {{ pair.translated }}
-                                        </div>
+                            <div v-if="file.showReview" class="mt-3 border-t border-gray-700 pt-2">
+                                <div class="flex flex-wrap items-center gap-2 mb-2">
+                                    <input v-model="file.review.search" @keyup.enter="loadReviewPage(file, 0)" type="text" :placeholder="$t('bytecode.search')"
+                                           class="flex-1 min-w-0 bg-black/50 border border-cyber-primary/30 rounded-none px-2 py-1 text-white text-xs placeholder-gray-600 focus:border-cyber-primary outline-none font-mono"/>
+                                    <label class="inline-flex items-center gap-1 text-xs text-gray-400 font-tech cursor-pointer">
+                                        <input v-model="file.review.changedOnly" @change="loadReviewPage(file, 0)" type="checkbox" class="w-3 h-3 accent-cyber-secondary cursor-pointer"/>
+                                        {{ $t('bytecode.changed_only') }}
                                     </label>
+                                    <select v-model="file.review.sort" @change="loadReviewPage(file, 0)" class="bg-black/50 border border-cyber-primary/30 rounded-none px-2 py-1 text-white text-xs outline-none font-mono">
+                                        <option value="index">{{ $t('bytecode.sort_index') }}</option>
+                                        <option value="occurrences">{{ $t('bytecode.sort_occurrences') }}</option>
+                                        <option value="original">{{ $t('bytecode.sort_original') }}</option>
+                                    </select>
+                                </div>
+                                
+                                <div class="max-h-96 overflow-y-auto space-y-2">
+                                    <div v-for="pair in file.review.pairs" :key="pair.index" 
+                                         class="flex items-start gap-2 p-2 bg-black/30 rounded hover:bg-black/50 transition">
+                                        <input 
+                                            type="checkbox"
+                                            :id="'trans-' + file.id + '-' + pair.index"
+                                            :checked="isSelected(file, pair)"
+                                            @change="toggleSelection(file, pair)"
+                                            class="mt-1 w-4 h-4 accent-cyber-secondary cursor-pointer flex-shrink-0"
+                                        />
+                                        <div class="flex-1 min-w-0">
+                                            <label :for="'trans-' + file.id + '-' + pair.index" class="block text-gray-400 text-xs font-mono mb-1 cursor-pointer">
+                                                <span class="text-gray-600">原文:</span> {{ pair.original }}
+                                                <span v-if="pair.occurrences > 1" class="text-gray-600">(×{{ pair.occurrences }})</span>
+                                            </label>
+                                            <input
+                                                type="text"
+                                                :value="file.overrides[pair.index] ?? pair.translated"
+                                                @change="setOverride(file, pair, $event.target.value)"
+                                                class="w-full bg-transparent border-b border-transparent hover:border-gray-700 focus:border-cyber-secondary text-cyber-secondary text-xs font-mono outline-none"
+                                            />
+                                        </div>
+                                    </div>
+                                </div>
+                                
+                                <div class="flex justify-between items-center mt-2 text-xs text-gray-400 font-mono">
+                                    <span>{{ file.review.total ? file.review.offset + 1 : 0 }}-{{ file.review.offset + file.review.pairs.length }} / {{ file.review.total }}</span>
+                                    <div class="flex gap-2">
+                                        <button @click="loadReviewPage(file, file.review.offset - reviewPageSize)" :disabled="file.review.offset === 0"
+                                                class="text-cyber-primary hover:text-white transition font-tech disabled:opacity-50 disabled:cursor-not-allowed">
+                                            {{ $t('bytecode.previous_page') }}
+                                        </button>
+                                        <button @click="loadReviewPage(file, file.review.offset + reviewPageSize)" :disabled="file.review.offset + reviewPageSize >= file.review.total"
+                                                class="text-cyber-primary hover:text-white transition font-tech disabled:opacity-50 disabled:cursor-not-allowed">
+                                            {{ $t('bytecode.next_page') }}
+                                        </button>
+                                    </div>
                                 </div>
                             </div>
                             
                             <div class="mt-3 flex gap-2">
                                 <button @click="applyTranslations(file.id)" 
-                                        :disabled="Object.keys(file.selectedTranslations || {}).length === 0"
+                                        :disabled="selectedCount(file) === 0"
                                         class="bg-cyber-secondary text-black px-4 py-2 rounded-none hover:bg-white transition font-pixel text-xs disabled:opacity-50 disabled:cursor-not-allowed">
                                     {{ $t('bytecode.apply_translations') }}
                                 </button>
@@ -182,8 +238,11 @@ export default {
             targetLang: 'zh_cn',
             selectedAI: 'Deepseek',
             apiKey: '',
+            includeAnnotations: false,
+            modpackMode: false,
             processing: false,
-            pollInterval: null
+            pollInterval: null,
+            reviewPageSize: 100
         };
     },
     computed: {
@@ -220,9 +279,12 @@ export default {
                 progress: 0,
                 currentBatch: 0,
                 totalBatches: 0,
+                stringsDone: 0,
+                stringsTotal: 0,
                 etaSeconds: 0,
-                translationPairs: [],  // Store translation results
-                selectedTranslations: {},  // Track user selections
+                isPack: false,
+                jars: [],  // Per-jar progress of a modpack task
+                ...this.emptyReview(),
                 showReview: false  // Toggle review panel
             }));
             this.files.push(...newFiles);
@@ -251,32 +313,111 @@ export default {
                 file.taskId = null;
                 file.errorMessage = '';
                 file.statusMessage = '';
-                file.translationPairs = [];
-                file.selectedTranslations = {};
+                Object.assign(file, this.emptyReview());
+            }
+        },
+
+        emptyReview() {
+            return {
+                totalStrings: 0,
+                changedStrings: 0,
+                failedStrings: 0,  // Strings the provider never returned a usable translation for
+                failureReasons: {},
+                // Selection is tracked by pair index: with selectAll every changed pair
+                // counts unless excluded, selectedIndices adds pairs on top of that
+                selectAll: true,
+                excludedIndices: {},
+                selectedIndices: {},
+                overrides: {},  // Edited translations by pair index
+                review: { pairs: [], total: 0, offset: 0, search: '', changedOnly: true, sort: 'index' }
+            };
+        },
+
+        async loadReviewPage(file, offset) {
+            if (!file.taskId) return;
+            const params = new URLSearchParams({
+                offset: Math.max(offset, 0),
+                limit: this.reviewPageSize,
+                changed_only: file.review.changedOnly,
+                search: file.review.search,
+                sort: file.review.sort
+            });
+            try {
+                const response = await fetch(`${API_BASE}/translate/bytecode/review/${file.taskId}?${params}`);
+                if (response.ok) {
+                    const page = await response.json();
+                    file.review.pairs = page.pairs;
+                    file.review.total = page.total;
+                    file.review.offset = page.offset;
+                }
+            } catch (error) {
+                console.error('Review load error:', error);
+            }
+        },
+
+        isSelected(file, pair) {
+            if (file.selectAll && pair.changed) {
+                return !file.excludedIndices[pair.index];
+            }
+            return !!file.selectedIndices[pair.index];
+        },
+
+        toggleSelection(file, pair) {
+            const selected = this.isSelected(file, pair);
+            if (file.selectAll && pair.changed) {
+                if (selected) file.excludedIndices[pair.index] = true;
+                else delete file.excludedIndices[pair.index];
+            } else {
+                if (selected) delete file.selectedIndices[pair.index];
+                else file.selectedIndices[pair.index] = true;
+            }
+        },
+
+        setOverride(file, pair, value) {
+            if (value === pair.translated) {
+                delete file.overrides[pair.index];
+            } else {
+                file.overrides[pair.index] = value;
+            }
+            // Editing a translation selects it
+            if (!this.isSelected(file, pair)) {
+                this.toggleSelection(file, pair);
+            }
+        },
+
+        selectedCount(file) {
+            const extra = Object.keys(file.selectedIndices).length;
+            if (file.selectAll) {
+                return file.changedStrings - Object.keys(file.excludedIndices).length + extra;
             }
+            return extra;
         },
 
         toggleReview(fileId) {
             const file = this.files.find(f => f.id === fileId);
             if (file) {
                 file.showReview = !file.showReview;
+                if (file.showReview && file.review.pairs.length === 0) {
+                    this.loadReviewPage(file, 0);
+                }
             }
         },
 
         selectAllTranslations(fileId) {
             const file = this.files.find(f => f.id === fileId);
-            if (file && file.translationPairs) {
-                file.selectedTranslations = {};
-                file.translationPairs.forEach(pair => {
-                    file.selectedTranslations[pair.original] = pair.translated;
-                });
+            if (file) {
+                file.selectAll = true;
+                file.excludedIndices = {};
+                file.selectedIndices = {};
             }
         },
 
         deselectAllTranslations(fileId) {
             const file = this.files.find(f => f.id === fileId);
             if (file) {
-                file.selectedTranslations = {};
+                file.selectAll = false;
+                file.excludedIndices = {};
+                file.selectedIndices = {};
             }
         },
 
@@ -284,7 +425,7 @@ export default {
             const file = this.files.find(f => f.id === fileId);
             if (!file || !file.taskId) return;
 
-            const selectedCount = Object.keys(file.selectedTranslations).length;
+            const selectedCount = this.selectedCount(file);
             if (selectedCount === 0) {
                 alert(this.$t('bytecode.no_selection'));
                 return;
@@ -296,7 +437,10 @@ export default {
 
                 const formData = new FormData();
                 formData.append('task_id', file.taskId);
-                formData.append('selected_translations', JSON.stringify(file.selectedTranslations));
+                formData.append('select_all', file.selectAll);
+                formData.append('excluded_indices', JSON.stringify(Object.keys(file.excludedIndices).map(Number)));
+                formData.append('selected_indices', JSON.stringify(Object.keys(file.selectedIndices).map(Number)));
+                formData.append('overrides', JSON.stringify(file.overrides));
 
                 const response = await fetch(`${API_BASE}/translate/bytecode/apply`, {
                     method: 'POST',
@@ -322,8 +466,7 @@ export default {
             if (file && confirm(this.$t('bytecode.confirm_reject'))) {
                 file.status = 'pending';
                 file.taskId = null;
-                file.translationPairs = [];
-                file.selectedTranslations = {};
+                Object.assign(file, this.emptyReview());
             }
         },
 
@@ -333,32 +476,59 @@ export default {
             try {
                 const response = await fetch(`${API_BASE}/translate/bytecode/status/${file.taskId}`);
                 if (response.ok) {
-                    const status = await response.json();
-                    file.status = status.status;
-                    file.progress = status.progress || 0;
-                    file.currentBatch = status.current_batch || 0;
-                    file.totalBatches = status.total_batches || 0;
-                    file.etaSeconds = status.eta_seconds || 0;
-
-                    if (status.status === 'failed') {
-                        file.errorMessage = status.error || 'Processing failed';
-                    } else if (status.status === 'review') {
-                        // Translation completed, show review UI
-                        file.translationPairs = status.translation_pairs || [];
-                        file.selectedTranslations = {};
-                        // Auto-select all by default
-                        file.translationPairs.forEach(pair => {
-                            file.selectedTranslations[pair.original] = pair.translated;
-                        });
-                    } else if (status.status === 'completed') {
-                        file.statusMessage = 'Ready for download';
-                    }
+                    this.applyTaskUpdate(file, await response.json());
                 }
             } catch (error) {
                 console.error('Status check error:', error);
             }
         },
 
+        applyTaskUpdate(file, update) {
+            // Takes a full status response or a compact event, only the fields present change
+            const previousStatus = file.status;
+            if (update.status) file.status = update.status;
+            if (update.progress !== undefined) file.progress = update.progress || 0;
+            if (update.current_batch !== undefined) file.currentBatch = update.current_batch || 0;
+            if (update.total_batches !== undefined) file.totalBatches = update.total_batches || 0;
+            if (update.strings_done !== undefined) file.stringsDone = update.strings_done || 0;
+            if (update.strings_total !== undefined) file.stringsTotal = update.strings_total || 0;
+            if (update.eta_seconds !== undefined) file.etaSeconds = update.eta_seconds || 0;
+            if (Array.isArray(update.jars)) {
+                // Full status response
+                file.jars = update.jars.map(jar => ({ name: jar.name, status: jar.status, progress: jar.progress || 0 }));
+            } else if (update.jars) {
+                // "jars" event: {jar number: [status, progress]} for the jars that changed
+                for (const [jarNo, [status, progress]] of Object.entries(update.jars)) {
+                    const jar = file.jars[Number(jarNo)];
+                    if (jar) Object.assign(jar, { status, progress });
+                }
+            }
+
+            if (file.status === 'queued' && update.queue_position) {
+                file.statusMessage = `Queue position ${update.queue_position}` +
+                    (update.estimated_wait_seconds > 0 ? ` - ~${this.formatETA(update.estimated_wait_seconds)}` : '');
+            } else if (file.status === 'failed' && update.status) {
+                file.errorMessage = update.error || 'Processing failed';
+            } else if (file.status === 'review' && previousStatus !== 'review') {
+                // Translation completed, pairs are paged in from the review endpoint
+                // All changed strings are selected by default
+                Object.assign(file, this.emptyReview());
+                file.totalStrings = update.total_strings || 0;
+                file.changedStrings = update.changed_strings || 0;
+                file.failedStrings = update.failed_strings || 0;
+                file.failureReasons = update.failure_reasons || {};
+                if (file.showReview) {
+                    this.loadReviewPage(file, 0);
+                }
+            } else if (file.status === 'completed') {
+                file.statusMessage = 'Ready for download';
+            }
+        },
+
+        formatFailureReasons(file) {
+            return Object.entries(file.failureReasons).map(([reason, count]) => `${reason}: ${count}`).join('\n');
+        },
+
         formatFileSize(bytes) {
             if (bytes < 1024) return bytes + ' B';
             if (bytes < 1024 * 1024) return (bytes / 1024).toFixed(1) + ' KB';
@@ -409,8 +579,16 @@ export default {
 
             this.processing = true;
 
+            if (this.modpackMode) {
+                this.combinePendingFiles();
+            }
+            // Packs (new or retried) are uploaded as one task each
+            for (const pack of this.pendingFiles.filter(file => file.isPack)) {
+                await this.uploadModpack(pack);
+            }
+
             // Upload all pending files
-            for (const file of this.pendingFiles) {
+            for (const file of this.pendingFiles.filter(file => !file.isPack)) {
                 try {
                     file.status = 'queued';
                     file.statusMessage = 'Uploading...';
@@ -420,6 +598,7 @@ export default {
                     formData.append('target_lang', this.targetLang);
                     formData.append('ai_model', this.selectedAI);
                     formData.append('api_key', this.apiKey);
+                    formData.append('include_annotations', this.includeAnnotations);
 
                     const response = await fetch(`${API_BASE}/translate/bytecode`, {
                         method: 'POST',
@@ -441,8 +620,113 @@ export default {
                 }
             }
 
-            // Start polling for status updates
-            this.startPolling();
+            // Follow the tasks over server-sent events, polling where unsupported
+            this.watchTasks();
+        },
+
+        combinePendingFiles() {
+            // Every pending file goes into one modpack entry, strings shared between jars are translated once
+            const members = this.pendingFiles.filter(file => !file.isPack);
+            if (members.length === 0) return;
+            this.files = this.files.filter(file => !members.includes(file));
+            this.files.push({
+                ...members[0],
+                id: Date.now() + Math.random(),
+                name: members.length === 1 ? members[0].name : `modpack (${members.length})`,
+                size: members.reduce((total, file) => total + file.size, 0),
+                file: null,
+                memberFiles: members.map(file => file.file),
+                isPack: true
+            });
+        },
+
+        async uploadModpack(pack) {
+            try {
+                pack.status = 'queued';
+                pack.statusMessage = 'Uploading...';
+
+                const formData = new FormData();
+                pack.memberFiles.forEach(file => formData.append('files', file));
+                formData.append('target_lang', this.targetLang);
+                formData.append('ai_model', this.selectedAI);
+                formData.append('api_key', this.apiKey);
+                formData.append('include_annotations', this.includeAnnotations);
+
+                const response = await fetch(`${API_BASE}/translate/modpack`, {
+                    method: 'POST',
+                    body: formData
+                });
+
+                if (!response.ok) {
+                    const error = await response.json().catch(() => ({}));
+                    throw new Error(error.detail || `Upload failed: ${response.statusText}`);
+                }
+
+                const result = await response.json();
+                pack.taskId = result.task_id;
+                pack.name = result.filename;
+                pack.statusMessage = `Queued for processing (${result.jars} jars)`;
+                // Jar names and their progress come with the full status
+                await this.checkFileStatus(pack);
+
+            } catch (error) {
+                console.error('Upload error:', error);
+                pack.status = 'failed';
+                pack.errorMessage = error.message;
+            }
+        },
+
+        watchTasks() {
+            if (typeof EventSource === 'undefined') {
+                this.startPolling();
+                return;
+            }
+            for (const file of this.files) {
+                if (file.taskId && !this.eventSources[file.id] && (file.status === 'queued' || file.status === 'processing')) {
+                    this.openEventSource(file);
+                }
+            }
+            this.updateProcessing();
+        },
+
+        openEventSource(file) {
+            // The browser reconnects on its own and resumes with Last-Event-ID
+            const source = new EventSource(`${API_BASE}/translate/bytecode/events/${file.taskId}`);
+            this.eventSources[file.id] = source;
+
+            const onUpdate = (event) => {
+                this.applyTaskUpdate(file, JSON.parse(event.data));
+                if (file.status !== 'queued' && file.status !== 'processing') {
+                    this.closeEventSource(file.id);
+                }
+            };
+            source.addEventListener('snapshot', onUpdate);
+            source.addEventListener('state', onUpdate);
+            source.addEventListener('progress', onUpdate);
+            source.addEventListener('idle', onUpdate);
+            source.addEventListener('jars', onUpdate);
+            source.onerror = () => {
+                // Closed for good (e.g. task unknown after a restart), fall back to polling
+                if (source.readyState === EventSource.CLOSED) {
+                    this.closeEventSource(file.id);
+                    this.startPolling();
+                }
+            };
+        },
+
+        closeEventSource(fileId) {
+            const source = this.eventSources[fileId];
+            if (source) {
+                source.close();
+                delete this.eventSources[fileId];
+            }
+            this.updateProcessing();
+        },
+
+        updateProcessing() {
+            if (Object.keys(this.eventSources).length === 0 && !this.pollInterval) {
+                this.processing = false;
+            }
         },
 
         startPolling() {
@@ -472,7 +756,7 @@ export default {
                 clearInterval(this.pollInterval);
                 this.pollInterval = null;
             }
-            this.processing = false;
+            this.updateProcessing();
         },
 
         async downloadFile(fileId) {
@@ -500,7 +784,11 @@ export default {
             }
         }
     },
+    created() {
+        this.eventSources = {};  // Not reactive, keyed by file id
+    },
     beforeUnmount() {
+        Object.keys(this.eventSources).forEach(fileId => this.closeEventSource(fileId));
         this.stopPolling();
     }
 };
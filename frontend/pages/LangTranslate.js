@@ -95,10 +95,9 @@ export default {
                     <div class="absolute top-0 left-0 w-1 h-full bg-gray-700 group-hover:bg-cyber-primary transition-colors"></div>
                     <div class="flex justify-between items-center mb-2 pl-2">
                         <div class="flex-1">
-                            <span class="text-white font-mono" :class="{'text-green-400 font-bold': file.isRepackagedJar}">{{ file.name }}</span>
+                            <span class="text-white font-mono">{{ file.name }}</span>
                             <span v-if="file.size" class="text-gray-500 text-xs ml-2 font-mono">({{ formatFileSize(file.size) }})</span>
-                            <span v-if="!file.isRepackagedJar" class="text-cyan-400 text-xs ml-2 font-mono">→ .{{ file.outputFormat }}</span>
-                            <span v-if="file.isRepackagedJar" class="text-green-400 text-xs ml-2 font-semibold font-pixel">📦 Repackaged JAR</span>
+                            <span class="text-cyan-400 text-xs ml-2 font-mono">→ .{{ file.outputFormat }}</span>
                         </div>
                         <div class="flex items-center gap-2">
                             <span class="px-3 py-1 rounded-none text-xs font-pixel uppercase" :class="getStatusClass(file.status)">
@@ -166,6 +165,14 @@ export default {
                         </div>
                     </div>
                     
+                    <div class="mb-6">
+                        <label class="block text-sm text-cyber-primary mb-1 font-pixel text-xs">{{ $t('lang.output_format') }}</label>
+                        <select v-model="jarSelectionModal.output" class="w-full bg-black/50 border border-cyber-primary/30 rounded-none p-2 text-white focus:border-cyber-primary focus:ring-1 focus:ring-cyber-primary outline-none font-mono">
+                            <option value="jar">{{ $t('lang.output_jar') }}</option>
+                            <option value="resourcepack">{{ $t('lang.output_resourcepack') }}</option>
+                        </select>
+                    </div>
+                    
                     <div class="flex gap-3">
                         <button @click="selectAllJarFiles" class="flex-1 bg-blue-600 text-white py-2 px-4 rounded hover:bg-blue-700 transition">
                             {{ $t('lang.select_all') }}
@@ -194,7 +201,7 @@ export default {
                 jarName: '',
                 jarFile: null,
                 availableFiles: [],
-                originalZip: null
+                output: 'jar'
             }
         };
     },
@@ -271,59 +278,6 @@ export default {
             }
         },
 
-        // Extract language files from JAR
-        async extractLangFilesFromJar(jarFile) {
-            const zip = await JSZip.loadAsync(jarFile);
-            const langFiles = [];
-            
-            // Store the original ZIP for later repackaging
-            const jarId = 'jar_' + Date.now() + '_' + Math.random();
-            
-            // Find all files in assets/*/lang/ directories
-            const langFilePattern = /^assets\/[^\/]+\/lang\/[^\/]+\.(json|lang)$/;
-            
-            for (const [path, zipEntry] of Object.entries(zip.files)) {
-                if (!zipEntry.dir && langFilePattern.test(path)) {
-                    const content = await zipEntry.async('string');
-                    const fileName = path.split('/').pop();
-                    const modName = path.split('/')[1]; // Extract mod name from path
-                    
-                    // Create a virtual file
-                    const blob = new Blob([content], { type: 'text/plain' });
-                    const file = new File([blob], fileName, { type: 'text/plain' });
-                    
-                    const isLangFile = fileName.endsWith('.lang');
-                    const outputFormat = isLangFile ? 'lang' : 'json';
-                    
-                    langFiles.push({
-                        id: Date.now() + Math.random(),
-                        name: `[${jarFile.name}] ${modName}/${fileName}`,
-                        originalName: fileName,
-                        size: content.length,
-                        file: file,
-                        outputFormat: outputFormat,
-                        status: 'pending',
-                        progress: 0,
-                        progressText: '',
-                        outputBlob: null,
-                        outputName: '',
-                        errorMessage: '',
-                        jarSource: jarFile.name,
-                        jarSourceId: jarId,
-                        jarPath: path,
-                        modName: modName,
-                        originalZip: zip // Store reference to original ZIP
-                    });
-                }
-            }
-            
-            if (langFiles.length === 0) {
-                throw new Error('No language files found in assets/*/lang/ directories');
-            }
-            
-            return langFiles;
-        },
-
         removeFile(fileId) {
             const index = this.files.findIndex(f => f.id === fileId);
             if (index !== -1) {
@@ -345,6 +299,7 @@ export default {
                     file.progressText = '';
                     file.outputBlob = null;
                     file.errorMessage = '';
+                    file.taskId = null;
                 }
             });
         },
@@ -356,6 +311,7 @@ export default {
                 file.progress = 0;
                 file.progressText = '';
                 file.errorMessage = '';
+                file.taskId = null;
             }
         },
 
@@ -407,6 +363,12 @@ export default {
                     fileInfo.progressText = 'Reading file...';
                     fileInfo.errorMessage = '';
                     
+                    // Jars are translated by the backend, which also builds the output
+                    if (fileInfo.serverJob) {
+                        await this.translateJarOnServer(fileInfo);
+                        continue;
+                    }
+                    
                     const content = await this.readFileContent(fileInfo.file);
                     const isJson = fileInfo.name.endsWith('.json');
                     
@@ -559,11 +521,6 @@ export default {
                     fileInfo.progress = 100;
                     fileInfo.progressText = `Completed! (${entries.length} entries translated)`;
                     
-                    // Check if all files from the same JAR are completed and repackage
-                    if (fileInfo.jarSourceId) {
-                        await this.checkAndRepackageJar(fileInfo.jarSourceId);
-                    }
-                    
                 } catch (error) {
                     console.error('Translation error:', error);
                     fileInfo.status = 'failed';
@@ -576,78 +533,120 @@ export default {
             this.cancelRequested = false;
         },
 
-        // Check if all files from a JAR are completed and repackage
-        async checkAndRepackageJar(jarId) {
-            const jarFiles = this.files.filter(f => f.jarSourceId === jarId);
-            const allCompleted = jarFiles.every(f => f.status === 'completed');
-            
-            if (!allCompleted || jarFiles.length === 0) {
-                return; // Not all files are completed yet
+        // Queue a jar on the backend, wait for it and fetch the result
+        async translateJarOnServer(fileInfo) {
+            if (!fileInfo.taskId) {
+                const formData = new FormData();
+                formData.append('file', fileInfo.file);
+                formData.append('target_lang', this.targetLang);
+                formData.append('ai_model', this.selectedAI);
+                formData.append('api_key', this.apiKey);
+                formData.append('output', fileInfo.langOutput);
+                formData.append('entries', JSON.stringify(fileInfo.langEntries));
+                
+                const response = await fetch(`${API_BASE}/translate/lang`, {
+                    method: 'POST',
+                    body: formData
+                });
+                if (!response.ok) {
+                    const error = await response.json().catch(() => ({}));
+                    throw new Error(error.detail || `Upload failed (${response.status})`);
+                }
+                fileInfo.taskId = (await response.json()).task_id;
             }
             
-            // Check if already repackaged
-            if (this.files.some(f => f.repackagedJarId === jarId)) {
-                return; // Already created the repackaged JAR
+            // The task keeps running on the server if this page goes away
+            const task = await this.watchServerTask(fileInfo);
+            if (!task) {
+                fileInfo.status = 'cancelled';
+                fileInfo.progressText = 'Cancelled by user';
+                return;
+            }
+            if (task.status === 'failed') {
+                throw new Error(task.error || 'Translation failed');
             }
             
-            try {
-                // Get the original ZIP from the first file
-                const originalZip = jarFiles[0].originalZip;
-                if (!originalZip) {
-                    console.error('Original ZIP not found');
-                    return;
-                }
-                
-                // Clone the original ZIP
-                const newZip = new JSZip();
+            const response = await fetch(`${API_BASE}/translate/bytecode/download/${fileInfo.taskId}`);
+            if (!response.ok) {
+                throw new Error('Download failed');
+            }
+            const baseName = fileInfo.name.replace(/\.jar$/i, '');
+            fileInfo.outputBlob = await response.blob();
+            fileInfo.outputName = fileInfo.langOutput === 'resourcepack'
+                ? `${baseName}_${this.targetLang}_resources.zip`
+                : `translated_${fileInfo.name}`;
+            fileInfo.status = 'completed';
+            fileInfo.progress = 100;
+            fileInfo.progressText = `Completed! (${fileInfo.langEntries.length} language files translated)`;
+            if (task.failed_strings) {
+                fileInfo.progressText += ` - ${task.failed_strings} texts could not be translated and keep their original text`;
+            }
+        },
+
+        // Resolves with the task's final state, or null when the user cancels
+        watchServerTask(fileInfo) {
+            return new Promise((resolve, reject) => {
+                const task = {};
+                let source = null;
+                let timer = null;
+                let finished = false;
                 
-                // Copy all files from original JAR
-                for (const [path, zipEntry] of Object.entries(originalZip.files)) {
-                    if (!zipEntry.dir) {
-                        const content = await zipEntry.async('blob');
-                        newZip.file(path, content);
+                const finish = (result, error) => {
+                    if (finished) return;
+                    finished = true;
+                    if (source) source.close();
+                    clearTimeout(timer);
+                    clearInterval(cancelCheck);
+                    error ? reject(error) : resolve(result);
+                };
+                const update = (data) => {
+                    Object.assign(task, data);
+                    if (['completed', 'failed', 'review'].includes(task.status)) {
+                        finish(task);
+                        return;
                     }
-                }
-                
-                // Replace translated language files
-                for (const file of jarFiles) {
-                    if (file.outputContent && file.jarPath) {
-                        newZip.file(file.jarPath, file.outputContent);
+                    fileInfo.progress = task.progress || 0;
+                    if (task.status === 'queued') {
+                        fileInfo.progressText = task.queue_position ? `Queued (position ${task.queue_position})` : 'Queued';
+                    } else if (task.strings_total) {
+                        fileInfo.progressText = `Translated ${task.strings_done || 0}/${task.strings_total} texts`;
+                    } else {
+                        fileInfo.progressText = 'Reading language files...';
                     }
-                }
-                
-                // Generate the new JAR
-                const jarBlob = await newZip.generateAsync({ 
-                    type: 'blob',
-                    compression: 'DEFLATE',
-                    compressionOptions: { level: 6 }
-                });
-                
-                // Add a virtual "repackaged JAR" entry to the files list
-                const jarName = jarFiles[0].jarSource;
-                const baseName = jarName.replace(/\.jar$/i, '');
-                
-                this.files.push({
-                    id: Date.now() + Math.random(),
-                    name: `${baseName}_${this.targetLang}.jar`,
-                    size: jarBlob.size,
-                    file: null,
-                    outputFormat: 'jar',
-                    status: 'completed',
-                    progress: 100,
-                    progressText: `Repackaged JAR with ${jarFiles.length} translated language files`,
-                    outputBlob: jarBlob,
-                    outputName: `${baseName}_${this.targetLang}.jar`,
-                    errorMessage: '',
-                    repackagedJarId: jarId,
-                    isRepackagedJar: true
-                });
-                
-                console.log(`Successfully repackaged JAR: ${jarName}`);
+                };
+                // Polling is only the fallback where event streams are unavailable
+                const poll = async () => {
+                    try {
+                        const response = await fetch(`${API_BASE}/translate/bytecode/status/${fileInfo.taskId}`);
+                        if (!response.ok) {
+                            throw new Error(`Status check failed (${response.status})`);
+                        }
+                        update(await response.json());
+                        if (!finished) timer = setTimeout(poll, 2000);
+                    } catch (error) {
+                        finish(null, error);
+                    }
+                };
+                const cancelCheck = setInterval(() => {
+                    if (this.cancelRequested) finish(null);
+                }, 250);
                 
-            } catch (error) {
-                console.error('Failed to repackage JAR:', error);
-            }
+                if (typeof EventSource === 'undefined') {
+                    poll();
+                    return;
+                }
+                // The browser reconnects on its own and resumes with Last-Event-ID
+                source = new EventSource(`${API_BASE}/translate/bytecode/events/${fileInfo.taskId}`);
+                const onEvent = (event) => update(JSON.parse(event.data));
+                ['snapshot', 'state', 'progress', 'idle'].forEach(name => source.addEventListener(name, onEvent));
+                source.onerror = () => {
+                    // Closed for good (e.g. task unknown after a restart), fall back to polling
+                    if (source.readyState === EventSource.CLOSED && !finished) {
+                        source = null;
+                        poll();
+                    }
+                };
+            });
         },
 
         // Estimate tokens (rough: 1 token ≈ 4 characters)
@@ -870,8 +869,8 @@ Translations:`;
             const zip = await JSZip.loadAsync(jarFile);
             const availableFiles = [];
             
-            const jarId = 'jar_' + Date.now() + '_' + Math.random();
-            const langFilePattern = /^assets\/[^\/]+\/lang\/[^\/]+\.(json|lang)$/;
+            // The backend translates the English files into the target language
+            const langFilePattern = /^assets\/[^\/]+\/lang\/en_us\.(json|lang)$/i;
             
             for (const [path, zipEntry] of Object.entries(zip.files)) {
                 if (!zipEntry.dir && langFilePattern.test(path)) {
@@ -900,9 +899,8 @@ Translations:`;
                 show: true,
                 jarName: jarFile.name,
                 jarFile: jarFile,
-                jarId: jarId,
                 availableFiles: availableFiles,
-                originalZip: zip
+                output: 'jar'
             };
         },
         
@@ -930,32 +928,24 @@ Translations:`;
                 return;
             }
             
-            // Add selected files to the queue
-            selectedFiles.forEach(fileInfo => {
-                const blob = new Blob([fileInfo.content], { type: 'text/plain' });
-                const file = new File([blob], fileInfo.fileName, { type: 'text/plain' });
-                
-                const outputFormat = fileInfo.isLangFile ? 'lang' : 'json';
-                
-                this.files.push({
-                    id: Date.now() + Math.random(),
-                    name: `[${this.jarSelectionModal.jarName}] ${fileInfo.modName}/${fileInfo.fileName}`,
-                    originalName: fileInfo.fileName,
-                    size: fileInfo.size,
-                    file: file,
-                    outputFormat: outputFormat,
-                    status: 'pending',
-                    progress: 0,
-                    progressText: '',
-                    outputBlob: null,
-                    outputName: '',
-                    errorMessage: '',
-                    jarSource: this.jarSelectionModal.jarName,
-                    jarSourceId: this.jarSelectionModal.jarId,
-                    jarPath: fileInfo.path,
-                    modName: fileInfo.modName,
-                    originalZip: this.jarSelectionModal.originalZip
-                });
+            // The whole jar is one backend job, limited to the selected files
+            const modal = this.jarSelectionModal;
+            this.files.push({
+                id: Date.now() + Math.random(),
+                name: modal.jarName,
+                size: modal.jarFile.size,
+                file: modal.jarFile,
+                outputFormat: modal.output === 'resourcepack' ? 'zip' : 'jar',
+                status: 'pending',
+                progress: 0,
+                progressText: '',
+                outputBlob: null,
+                outputName: '',
+                errorMessage: '',
+                serverJob: true,
+                taskId: null,
+                langOutput: modal.output,
+                langEntries: selectedFiles.map(f => f.path)
             });
             
             // Close modal
@@ -24,6 +24,28 @@ export default {
                 </div>
             </div>
 
+            <!-- Today and Providers -->
+            <div class="grid grid-cols-1 md:grid-cols-2 gap-6">
+                <div class="bg-cyber-dark p-6 rounded-none border border-gray-700">
+                    <h3 class="text-xl font-bold text-white mb-4 font-pixel">{{ $t('stats.today') }}</h3>
+                    <div class="flex justify-between text-gray-400 font-tech">
+                        <span>{{ $t('stats.visits') }}</span>
+                        <span class="text-cyber-primary font-mono">{{ todayStats.visits || 0 }}</span>
+                    </div>
+                    <div class="flex justify-between text-gray-400 font-tech">
+                        <span>{{ $t('stats.usage') }}</span>
+                        <span class="text-cyber-secondary font-mono">{{ todayStats.usage || 0 }}</span>
+                    </div>
+                </div>
+                <div class="bg-cyber-dark p-6 rounded-none border border-gray-700">
+                    <h3 class="text-xl font-bold text-white mb-4 font-pixel">{{ $t('stats.providers') }}</h3>
+                    <div v-for="(counts, provider) in stats.providers" :key="provider" class="flex justify-between text-gray-400 font-tech">
+                        <span>{{ provider }}</span>
+                        <span class="text-cyber-secondary font-mono">{{ counts.usage || 0 }}</span>
+                    </div>
+                </div>
+            </div>
+
             <!-- Info Card -->
             <div class="bg-cyber-dark p-6 rounded-none border border-gray-700 relative">
                 <div class="absolute -top-1 -left-1 w-3 h-3 border-t-2 border-l-2 border-gray-500"></div>
@@ -55,10 +77,19 @@ export default {
         return {
             stats: {
                 visits: 0,
-                usage: 0
+                usage: 0,
+                daily: {},
+                providers: {}
             }
         };
     },
+    computed: {
+        todayStats() {
+            // Days are bucketed in UTC
+            const today = new Date().toISOString().slice(0, 10);
+            return (this.stats.daily || {})[today] || {};
+        }
+    },
     mounted() {
         this.loadStats();
     },
@@ -18,7 +18,7 @@ for /f "tokens=2 delims= " %%a in ('tasklist ^| findstr /i "python.exe"') do (
 )
 
 REM 启动后端
-start "XTMC Backend" backend\venv\Scripts\python backend\main.py
+start "XTMC Backend" backend\venv\Scripts\python -m uvicorn main:app --app-dir backend --host 0.0.0.0 --port 8000
 REM 启动前端
 cd frontend
 start "XTMC Frontend" python -m http.server 8080 --bind 0.0.0.0
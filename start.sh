@@ -21,13 +21,13 @@ backend/venv/bin/pip install -q -r backend/requirements.txt
 
 # 停止旧进程
 echo "停止旧进程..."
-pkill -f "python.*backend/main.py" 2>/dev/null
+pkill -f "uvicorn main:app" 2>/dev/null
 pkill -f "python.*http.server 8080" 2>/dev/null
 sleep 1
 
 # 启动后端
 echo "启动后端服务 (端口 8000)..."
-nohup backend/venv/bin/python backend/main.py > backend.log 2>&1 &
+nohup backend/venv/bin/python -m uvicorn main:app --app-dir backend --host 0.0.0.0 --port 8000 > backend.log 2>&1 &
 BACKEND_PID=$!
 echo "后端 PID: $BACKEND_PID"
 
@@ -6,7 +6,7 @@ echo "停止 XTMC Translate 服务..."
 
 # 停止后端
 echo "停止后端服务..."
-pkill -f "python.*backend/main.py"
+pkill -f "uvicorn main:app"
 
 # 停止前端
 echo "停止前端服务..."